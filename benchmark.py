@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+import json, os, platform, random, statistics, sys
+from argparse import ArgumentParser
+from timeit import default_timer as timer
+from maze_solver.maze import Maze, TileType
+from maze_solver.solver import Solver
+
+# Repeatable micro benchmarks of maze operations, run headless (no visualizer) with fixed seeds.
+# "run" saves results as JSON baseline, "compare" checks new results against baseline.
+
+DEFAULT_SIZES = ["20x20", "50x50", "100x100", "200x200"]
+
+
+def create_folder(name):
+    parent_dir = os.getcwd()
+    path = os.path.join(parent_dir, name)
+    os.makedirs(path, exist_ok=True)
+
+
+def parse_size(size):
+    width, height = size.lower().split("x")
+    return int(width), int(height)
+
+
+def make_maze(width, height, seed):
+    random.seed(seed)
+    return Maze(width, height)
+
+
+# every benchmark gets fresh maze and returns function measured in every repeat,
+# setup (not measured) is called before every repeat
+def bench_generate(width, height, seed):
+    maze = Maze(width, height, init=False)
+
+    def setup():
+        random.seed(seed)
+
+    return setup, maze.generate
+
+
+def bench_search(heuristic):
+    def bench(width, height, seed):
+        maze = make_maze(width, height, seed)
+        solver = Solver(maze, (1, len(maze.data) - 2),
+                        (len(maze.data[0]) - 2, 1),
+                        init=False,
+                        heuristic_type=heuristic)
+        return maze.restart, solver.search
+
+    return bench
+
+
+def bench_tiles_count(width, height, seed):
+    maze = make_maze(width, height, seed)
+    Solver(maze, (1, len(maze.data) - 2), (len(maze.data[0]) - 2, 1))
+    return None, lambda: maze.get_tiles_count(TileType.CHECKED)
+
+
+def bench_str(width, height, seed):
+    maze = make_maze(width, height, seed)
+    Solver(maze, (1, len(maze.data) - 2), (len(maze.data[0]) - 2, 1))
+    return None, maze.__str__
+
+
+def bench_tile_writes(width, height, seed):
+    maze = make_maze(width, height, seed)
+    walkable = [(x, y) for y, row in enumerate(maze.data)
+                for x, tile in enumerate(row) if tile != TileType.WALL]
+
+    def write():
+        for x, y in walkable:
+            maze.set_checked(x, y)
+
+    return maze.restart, write
+
+
+BENCHMARKS = {
+    "generate": bench_generate,
+    "search_h0": bench_search(0),
+    "search_h1": bench_search(1),
+    "search_h2": bench_search(2),
+    "search_h3": bench_search(3),
+    "search_h4": bench_search(4),
+    "get_tiles_count": bench_tiles_count,
+    "str": bench_str,
+    "tile_writes": bench_tile_writes,
+}
+
+
+def measure(setup, function, repeat):  # times of every repeat [ms]
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        begin = timer()
+        function()
+        times.append((timer() - begin) * 1000)
+    return times
+
+
+def run_benchmarks(sizes, repeat=5, seed=578, names=None):
+    results = {}
+    for name in names or BENCHMARKS:
+        for size in sizes:
+            width, height = parse_size(size)
+            setup, function = BENCHMARKS[name](width, height, seed)
+            times = measure(setup, function, repeat)
+            key = name + "/" + size
+            results[key] = {
+                "min": round(min(times), 4),
+                "median": round(statistics.median(times), 4)
+            }
+            print("%-28s min %10.3f ms  median %10.3f ms" %
+                  (key, results[key]["min"], results[key]["median"]))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat
+        },
+        "results": results
+    }
+
+
+def save(data, path):
+    folder = os.path.dirname(path)
+    if folder:
+        create_folder(folder)
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+# compares minimum times, returns keys slower than baseline by more than threshold (0.1 - 10%)
+def compare(baseline, current, threshold=0.1):
+    regressions = []
+    for key, result in sorted(current["results"].items()):
+        if key not in baseline["results"]:
+            print("%-28s new" % key)
+            continue
+        before = baseline["results"][key]["min"]
+        after = result["min"]
+        ratio = after / before if before else 1
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "SLOWER"
+            regressions.append(key)
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        print("%-28s %10.3f -> %10.3f ms  %+7.1f%%  %s" %
+              (key, before, after, (ratio - 1) * 100, flag))
+    return regressions
+
+
+def parse_args():
+    parser = ArgumentParser(description="Maze benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and save results")
+    compare_parser = commands.add_parser(
+        "compare", help="Compare results (run now if not given) with baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current",
+                                nargs="?",
+                                default=None,
+                                help="Saved results, benchmarks are run if not given")
+    compare_parser.add_argument("-t",
+                                "--threshold",
+                                help="Allowed slowdown (0.1 - 10%%)",
+                                type=float,
+                                default=0.1)
+    for command in (run_parser, compare_parser):
+        command.add_argument("-s",
+                             "--sizes",
+                             nargs="+",
+                             default=DEFAULT_SIZES,
+                             help="Maze sizes, e.g. 20x20 50x30")
+        command.add_argument("-r", "--repeat", type=int, default=5)
+        command.add_argument("--seed", type=int, default=578)
+        command.add_argument("-b",
+                             "--bench",
+                             nargs="+",
+                             default=None,
+                             choices=list(BENCHMARKS),
+                             help="Benchmarks to run (default: all)")
+    run_parser.add_argument("-o",
+                            "--output",
+                            default=os.path.join("benchmarks",
+                                                 "baseline.json"))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "run":
+        save(run_benchmarks(args.sizes, args.repeat, args.seed, args.bench),
+             args.output)
+        print("Saved results to " + args.output)
+    else:
+        baseline = load(args.baseline)
+        if args.current is not None:
+            current = load(args.current)
+        else:
+            current = run_benchmarks(args.sizes, args.repeat, args.seed,
+                                     args.bench)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print("%d benchmarks slower than baseline by more than %d%%" %
+                  (len(regressions), args.threshold * 100))
+            sys.exit(1)
+        print("No regressions")
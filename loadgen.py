@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import asyncio, json, random, statistics
+from argparse import ArgumentParser
+from timeit import default_timer as timer
+
+# Load generator for serve.py: generates mazes first, then sends random solve requests from
+# many concurrent clients and reports latency percentiles and throughput.
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.waiting = {}  # request id -> future of response
+
+    @classmethod
+    async def connect(cls, host, port, unix_path=None):
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        client = cls(reader, writer)
+        client.listener = asyncio.ensure_future(client.__listen())
+        return client
+
+    async def __listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            self.waiting.pop(response["id"]).set_result(response)
+
+    async def request(self, **request):
+        self.next_id += 1
+        request["id"] = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[self.next_id] = future
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        response = await future
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        self.listener.cancel()
+
+
+def random_tile(rnd, rows, cols):  # rooms have odd coordinates
+    return [rnd.randrange(cols // 2) * 2 + 1, rnd.randrange(rows // 2) * 2 + 1]
+
+
+def pick_tile(rnd, maze, endpoints):  # with endpoints tiles are chosen from fixed set of maze
+    if not endpoints:
+        return random_tile(rnd, maze["rows"], maze["cols"])
+    return rnd.choice(endpoints[maze["maze"]])
+
+
+async def run(args):
+    rnd = random.Random(args.seed)
+    clients = [
+        await Client.connect(args.host, args.port, args.unix)
+        for _ in range(args.concurrency)
+    ]
+    start = timer()
+    mazes = await asyncio.gather(*(clients[i % len(clients)].request(
+        op="generate", width=args.width, height=args.height,
+        seed=args.seed + i) for i in range(args.mazes)))
+    print("Generated %d mazes in %.3f s" % (len(mazes), timer() - start))
+
+    endpoints = {
+        maze["maze"]: [
+            random_tile(rnd, maze["rows"], maze["cols"])
+            for _ in range(args.endpoints)
+        ]
+        for maze in mazes
+    } if args.endpoints else None
+    latencies = []
+    remaining = args.requests
+
+    async def worker(client):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            maze = rnd.choice(mazes)
+            begin = timer()
+            await client.request(op="solve",
+                                 maze=maze["maze"],
+                                 start=pick_tile(rnd, maze, endpoints),
+                                 end=pick_tile(rnd, maze, endpoints),
+                                 path=args.path)
+            latencies.append((timer() - begin) * 1000)
+
+    start = timer()
+    await asyncio.gather(*(worker(client) for client in clients))
+    elapsed = timer() - start
+    stats = await clients[0].request(op="stats")
+    for client in clients:
+        await client.close()
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print("%d solves, %d clients: %.1f req/s" %
+          (len(latencies), len(clients), len(latencies) / elapsed))
+    print("latency [ms]: p50 %.3f  p99 %.3f  max %.3f" %
+          (percentiles[49], percentiles[98], max(latencies)))
+    print("batches %d (%.2f solves per batch), searches %d" %
+          (stats["batches"], stats["solves"] / max(stats["batches"], 1),
+           stats["searches"]))
+
+
+def parse_args():
+    parser = ArgumentParser(description="Load generator for maze service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None)
+    parser.add_argument("-c", "--concurrency", type=int, default=16)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-m", "--mazes", type=int, default=4)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=578)
+    parser.add_argument("-e",
+                        "--endpoints",
+                        help="Starts and ends are chosen from this many tiles of every maze (0 - any tile)",
+                        type=int,
+                        default=0)
+    parser.add_argument("--path",
+                        help="Request whole paths, not only lengths",
+                        action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
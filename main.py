@@ -1,10 +1,12 @@
 #!/usr/bin/python3
 from argparse import ArgumentParser
+from contextlib import nullcontext
 
 from maze_solver.maze import Maze
+from maze_solver.profiling import Profiler
 from maze_solver.solver import Solver
 
-HEURISTIC_VALUES = {"ABS": 0, "SQRT": 1, "MAX": 2, "NONE": 3}
+HEURISTIC_VALUES = {"ABS": 0, "SQRT": 1, "MAX": 2, "NONE": 3, "ALT": 4}
 
 
 def parse_args():
@@ -15,25 +17,94 @@ def parse_args():
                         "--visualize",
                         action="store_true",
                         dest="visualize")
+    parser.add_argument("--fps",
+                        help="Display updates per second with -v, 0 - no limit",
+                        type=int,
+                        default=30)
+    parser.add_argument("--speed",
+                        help="Drawn tiles per second with -v, 0 - no limit",
+                        type=int,
+                        default=0)
     parser.add_argument('-e',
                         '--heuristic',
                         help="Heuristic function used with A*",
                         type=str,
                         default="ABS",
-                        choices=["ABS", "SQRT", "MAX", "NONE"])
+                        choices=list(HEURISTIC_VALUES))
+    parser.add_argument('--engine',
+                        help="A* implementation",
+                        type=str,
+                        default="heap",
+                        choices=Solver.ENGINES)
+    parser.add_argument('--profile',
+                        help="Profile maze generation and search",
+                        type=str,
+                        nargs="?",
+                        const="cprofile",
+                        default=None,
+                        choices=Profiler.KINDS)
+    parser.add_argument('--trace',
+                        help="Save search trace to file (see replay.py)",
+                        type=str,
+                        default=None)
+    parser.add_argument('--load',
+                        help="Load maze from .txt, .maze or .png file "
+                        "instead of generating it",
+                        type=str,
+                        default=None)
+    parser.add_argument('--save',
+                        help="Save solved maze to .txt, .maze or .png file",
+                        type=str,
+                        default=None)
+    parser.add_argument('--paths',
+                        help="Append found path to newline-delimited JSON file",
+                        type=str,
+                        default=None)
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
-    m = Maze(args.width, args.height, args.visualize)
+    profiler = Profiler(args.profile) if args.profile else None
+    visual_options = {"fps": args.fps, "speed": args.speed}
+    if args.load or args.save or args.paths:
+        from maze_solver import formats  # file formats need numpy
+    with profiler or nullcontext():
+        if args.load is not None:
+            m = formats.load_maze(args.load)
+            if args.visualize:
+                m.visual_options = visual_options
+                m.show()
+        else:
+            m = Maze(args.width,
+                     args.height,
+                     args.visualize,
+                     visual_options=visual_options)
     start = (1, len(m.data) - 2)
     end = (len(m.data[0]) - 2, 1)
     solver = Solver(m,
                     start,
                     end,
-                    heuristic_type=HEURISTIC_VALUES[args.heuristic])
+                    heuristic_type=HEURISTIC_VALUES[args.heuristic],
+                    engine=args.engine,
+                    profiler=profiler,
+                    trace=args.trace is not None)
+    if m.visual is not None:
+        m.visual.flush()
     print(m)
+    print(solver.stats)
+    if profiler is not None:
+        print(profiler.report())
+    if solver.trace is not None:
+        solver.trace.save(args.trace)
+        print("Saved " + str(len(solver.trace)) + " events to " + args.trace)
+    if args.save is not None:
+        formats.save_maze(m, args.save)
+        print("Saved maze to " + args.save)
+    if args.paths is not None:
+        formats.write_paths(args.paths, [formats.path_record(solver)],
+                            append=True)
+        print("Saved path to " + args.paths)
     print("Press Enter to exit")
     input()
 
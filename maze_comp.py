@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 
-import pandas as pd
 import matplotlib.pyplot as plt
-import math, time, random, csv, os, sys
-from timeit import default_timer as timer
+import csv, os, itertools
+from argparse import ArgumentParser
 from tqdm import tqdm
-from maze_solver.maze import Maze, TileType
+from maze_solver.aggregate import Aggregator
+from maze_solver.corpus import create_corpus
+from maze_solver.runner import BenchmarkRunner, make_jobs
 from maze_solver.solver import Solver
 
+METRICS = ['time [ms]', 'path length', 'visited tiles [%]', 'expanded tiles',
+           'expansions saved']
+PLOTTED = METRICS[:3]  # also checked for early stopping
+
 
 def create_folder(name):
     parent_dir = os.getcwd()
@@ -15,66 +20,110 @@ def create_folder(name):
     os.makedirs(path, exist_ok=True)
 
 
-def test_size(start_size, end_size, iterations, heuristic, jump):
+def test_size(start_size,
+              end_size,
+              iterations,
+              heuristics=range(4),
+              jump=1,
+              workers=None,
+              seed=578,
+              corpus=None,
+              engine="heap",
+              lockstep=False,
+              cache=None,
+              ci=None,
+              min_iterations=5,
+              count_tiles=False):
+    # ci - relative half width of 95% confidence interval of plotted metrics after which
+    # iterations of size and heuristic stop early, results are aggregated as they come
+    aggregates = Aggregator()
     folder_name = 'results'
     create_folder(folder_name)
-    filename = str(start_size) + "-" + str(end_size) + "_" + str(
-        iterations) + "_" + "_" + str(heuristic) + ".csv"
-    filename = os.path.join(folder_name, filename)
-    with open(filename, 'w', newline="") as csvfile:
-        csvwriter = csv.writer(csvfile, delimiter=",")
-
-        csvwriter.writerow([
+    files = {}
+    csvwriters = {}
+    for heuristic in heuristics:
+        filename = str(start_size) + "-" + str(end_size) + "_" + str(
+            iterations) + "_" + "_" + str(heuristic) + ".csv"
+        filename = os.path.join(folder_name, filename)
+        files[heuristic] = open(filename, 'w', newline="")
+        csvwriters[heuristic] = csv.writer(files[heuristic], delimiter=",")
+        csvwriters[heuristic].writerow([
             'iteration', 'size', 'time [ms]', 'path length',
-            'visited tiles [%]'
+            'visited tiles [%]', 'expanded tiles', 'expansions saved',
+            'iterations'
         ])
-        for size in tqdm(range(start_size, end_size + 1, jump)):
-
-            avg_time = 0
-            avg_path_length = 0
-            avg_visited_tiles = 0
-
-            for _ in range(iterations):
-                maze = Maze(size, size)
-                path = Solver(maze, (1, len(maze.data) - 2),
-                              (len(maze.data[0]) - 2, 1),
-                              init=False,
-                              heuristic_type=heuristic)
-
-                start = timer()
-                path.search()
-                end = timer()
-
-                data = path.calculate_data()
-
-                avg_time += round((end - start) * 1000, 2)
-                avg_path_length += data[4]
-                avg_visited_tiles += round(
-                    100 * (data[2] + data[3] + data[4]) /
-                    (data[0] + data[2] + data[3] + data[4]), 2)
-
-            avg_time /= iterations
-            avg_path_length /= iterations
-            avg_visited_tiles /= iterations
 
-            csvwriter.writerow([(size - start_size) / jump + 1, size, avg_time,
-                                avg_path_length, avg_visited_tiles])
-
-        print(chr(27) + "[2J")
-
-
-def make_time_plot(start_size, end_size, iterations):
+    sizes = [(size, size) for size in range(start_size, end_size + 1, jump)]
+    runner = BenchmarkRunner(workers)
+    if corpus is not None and not os.path.exists(corpus):
+        create_corpus(corpus, sizes, iterations, seed, workers)
+    lockstep = lockstep and 3 in heuristics
+    jobs = make_jobs(sizes, iterations,
+                     [h for h in heuristics if not (lockstep and h == 3)],
+                     seed, corpus, engine, cache, count_tiles)
+    if ci is not None:
+        grouped = {}
+        for job in jobs:
+            grouped.setdefault((job.width, job.height, job.heuristic),
+                               []).append(job)
+
+        def stop(key):  # jobs of converged group are never run, so they leave progress bar
+            if not aggregates.converged(key, PLOTTED, ci, min_iterations):
+                return False
+            progress.total -= len(grouped[key]) - aggregates.count(key)
+            progress.refresh()
+            return True
+
+        results = runner.run_adaptive(grouped, stop, min_iterations)
+    else:
+        results = runner.run(jobs)
+    if lockstep:  # all iterations of one size are solved in one call
+        results = itertools.chain(
+            runner.run_lockstep(sizes, iterations, seed, corpus), results)
+    try:
+        progress = tqdm(results,
+                        total=len(jobs) +
+                        (len(sizes) * iterations if lockstep else 0))
+        for result in progress:
+            data = result.tiles
+            aggregates.add(
+                (result.job.width, result.job.height, result.job.heuristic), {
+                    'time [ms]': result.time,
+                    'path length': data[4],
+                    'visited tiles [%]': 100 * (data[2] + data[3] + data[4]) /
+                    (data[0] + data[2] + data[3] + data[4]),
+                    'expanded tiles': result.expanded,
+                    'expansions saved': result.saved
+                })
+    finally:
+        for (width, height, heuristic) in sorted(aggregates.keys()):
+            csvwriters[heuristic].writerow(
+                [(width - start_size) / jump + 1, width] + [
+                    aggregates.get((width, height, heuristic), metric).mean
+                    for metric in METRICS
+                ] + [aggregates.count((width, height, heuristic))])
+        for csvfile in files.values():
+            csvfile.close()
+
+    print(chr(27) + "[2J")
+    print(runner.report())
+    return aggregates
+
+
+# averages with 95% confidence intervals, drawn from running statistics of aggregates
+def make_time_plot(start_size,
+                   end_size,
+                   iterations,
+                   aggregates,
+                   heuristics=range(4)):
     folder_name = 'plots'
     create_folder(folder_name)
     file_name = str(start_size) + "-" + str(end_size) + "_" + str(
         iterations) + ".jpg"
     file_name = os.path.join(folder_name, file_name)
 
-    column_names = [
-        'iteration', 'size', 'time [ms]', 'path length', 'visited tiles [%]'
-    ]
-
-    fig, axs = plt.subplots(nrows=4,
+    heuristics = list(heuristics)
+    fig, axs = plt.subplots(nrows=len(heuristics),
                             ncols=3,
                             tight_layout=True,
                             figsize=(10, 10))
@@ -82,36 +131,115 @@ def make_time_plot(start_size, end_size, iterations):
         'Average time [ms], path length and visited tiles [%] for sqare maze from size '
         + str(start_size) + ' to size ' + str(end_size) + '.')
 
-    for heuristic in range(4):
-        data = pd.read_csv('results/' + str(start_size) + '-' + str(end_size) +
-                           '_' + str(iterations) + '__' + str(heuristic) +
-                           '.csv')
-
-        for i in range(2, 5):
-            axs[heuristic][i - 2].plot(data['size'], data[column_names[i]])
-            axs[heuristic][i - 2].set_ylabel('average ' + column_names[i],
-                                             rotation=90)
+    axs = axs.reshape(len(heuristics), 3)  # one heuristic gives 1D array of axes
+    for row, heuristic in enumerate(heuristics):
+        keys = sorted(key for key in aggregates.keys() if key[2] == heuristic)
+        sizes = [key[0] for key in keys]
+        for i, column in enumerate(PLOTTED):
+            stats = [aggregates.get(key, column) for key in keys]
+            averages = [value.mean for value in stats]
+            widths = [
+                value.ci_half_width() if value.count > 1 else 0
+                for value in stats
+            ]
+            axs[row][i].plot(sizes, averages)
+            axs[row][i].fill_between(
+                sizes, [a - w for a, w in zip(averages, widths)],
+                [a + w for a, w in zip(averages, widths)],
+                alpha=0.3)
+            axs[row][i].set_ylabel('average ' + column, rotation=90)
 
     # plt.show()
     plt.savefig(file_name)
 
 
-def analysis_average_data(start_size=30, end_size=50, iterations=50, jump=1):
-    for heuristic in range(4):
-        test_size(start_size, end_size, iterations, heuristic, jump)
-    make_time_plot(start_size, end_size, iterations)
+def analysis_average_data(start_size=30,
+                          end_size=50,
+                          iterations=50,
+                          jump=1,
+                          workers=None,
+                          seed=578,
+                          corpus=None,
+                          engine="heap",
+                          heuristics=range(4),
+                          lockstep=False,
+                          cache=None,
+                          ci=None,
+                          min_iterations=5,
+                          count_tiles=False):
+    aggregates = test_size(start_size,
+                           end_size,
+                           iterations,
+                           heuristics=heuristics,
+                           lockstep=lockstep,
+                           jump=jump,
+                           workers=workers,
+                           seed=seed,
+                           corpus=corpus,
+                           engine=engine,
+                           cache=cache,
+                           ci=ci,
+                           min_iterations=min_iterations,
+                           count_tiles=count_tiles)
+    make_time_plot(start_size, end_size, iterations, aggregates, heuristics)
+
+
+def parse_args():
+    parser = ArgumentParser(description="Heuristics comparison for growing maze sizes")
+    parser.add_argument("start_size", nargs="?", type=int, default=30)
+    parser.add_argument("end_size", nargs="?", type=int, default=50)
+    parser.add_argument("iterations", nargs="?", type=int, default=50)
+    parser.add_argument("jump", nargs="?", type=int, default=1)
+    parser.add_argument("-j",
+                        "--workers",
+                        help="Number of worker processes (default: all cores)",
+                        type=int,
+                        default=None)
+    parser.add_argument("--seed", type=int, default=578)
+    parser.add_argument("--engine",
+                        help="Solver search engine",
+                        type=str,
+                        default="heap",
+                        choices=Solver.ENGINES)
+    parser.add_argument(
+        "--corpus",
+        help="Maze corpus file, generated first if it does not exist",
+        type=str,
+        default=None)
+    parser.add_argument("-e",
+                        "--heuristics",
+                        help="Compared heuristics: 0 - ABS, 1 - SQRT, 2 - MAX, 3 - NONE, 4 - ALT (landmarks)",
+                        type=int,
+                        nargs="+",
+                        default=[0, 1, 2, 3],
+                        choices=range(5))
+    parser.add_argument("--cache",
+                        help="Folder of maze and search result cache, unchanged runs are read from there",
+                        type=str,
+                        default=None)
+    parser.add_argument("--ci",
+                        help="Stop iterations of size and heuristic when 95%% confidence intervals of "
+                        "plotted metrics are narrower than this fraction of mean (e.g. 0.05)",
+                        type=float,
+                        default=None)
+    parser.add_argument("--min-iterations",
+                        help="Iterations run before and between checks of --ci",
+                        type=int,
+                        default=5)
+    parser.add_argument("--lockstep",
+                        help="Solve all mazes for heuristic 3 (NONE) at once with vectorized BFS",
+                        action="store_true")
+    parser.add_argument("--count-tiles",
+                        help="Count visited tiles on whole grid after every search instead of "
+                        "deriving them from expanded tiles (exact also for node based engines)",
+                        action="store_true")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    random.seed(578)
     # analysis_average_data(20, 50, 50)
-    if len(sys.argv) > 4:
-        analysis_average_data(int(sys.argv[1]), int(sys.argv[2]),
-                              int(sys.argv[3]), int(sys.argv[4]))
-    elif len(sys.argv) == 4:
-        analysis_average_data(int(sys.argv[1]), int(sys.argv[2]),
-                              int(sys.argv[3]))
-    elif len(sys.argv) == 3:
-        analysis_average_data(int(sys.argv[1]), int(sys.argv[2]))
-    else:
-        analysis_average_data()
+    args = parse_args()
+    analysis_average_data(args.start_size, args.end_size, args.iterations,
+                          args.jump, args.workers, args.seed, args.corpus,
+                          args.engine, args.heuristics, args.lockstep,
+                          args.cache, args.ci, args.min_iterations, args.count_tiles)
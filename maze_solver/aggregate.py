@@ -0,0 +1,125 @@
+import math
+
+Z_95 = 1.959964  # normal quantile of two-sided 95% confidence interval
+
+
+# Quantile sketch with relative accuracy: value v is counted in bucket ceil(log(v) / log(gamma)),
+# every value of bucket is within relative_accuracy of bucket value, so memory depends on
+# range of values (a few hundred buckets for 1% accuracy), not on number of values.
+class Sketch:
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}  # bucket -> count
+        self.negative = {}  # buckets of absolute values of negative values
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value > 0:
+            k = math.ceil(math.log(value) / self.log_gamma)
+            self.positive[k] = self.positive.get(k, 0) + 1
+        elif value < 0:
+            k = math.ceil(math.log(-value) / self.log_gamma)
+            self.negative[k] = self.negative.get(k, 0) + 1
+        else:
+            self.zeros += 1
+
+    def __value(self, k):  # value of bucket, relative error to every value in bucket is at most accuracy
+        return 2 * self.gamma**k / (self.gamma + 1)
+
+    def items(self):  # (value, count) of every bucket in ascending order
+        for k in sorted(self.negative, reverse=True):
+            yield -self.__value(k), self.negative[k]
+        if self.zeros:
+            yield 0, self.zeros
+        for k in sorted(self.positive):
+            yield self.__value(k), self.positive[k]
+
+    def quantile(self, q):  # q from 0 to 1
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self.items():
+            seen += count
+            if seen > rank:
+                return value
+        return value
+
+
+# Welford's running mean and variance, values are not kept (only in sketch if it is used)
+class RunningStats:
+    def __init__(self, sketch=False):
+        self.count = 0
+        self.mean = 0
+        self.m2 = 0  # sum of squared differences from mean
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = Sketch() if sketch else None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if self.sketch is not None:
+            self.sketch.add(value)
+
+    def variance(self):  # population variance
+        return self.m2 / self.count if self.count else 0
+
+    def sample_variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else math.inf
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+    def ci_half_width(self, z=Z_95):  # half width of confidence interval of mean
+        if self.count < 2:
+            return math.inf
+        return z * math.sqrt(self.sample_variance() / self.count)
+
+    def quantile(self, q):
+        if self.sketch is None:
+            raise ValueError("quantiles need RunningStats(sketch=True)")
+        return self.sketch.quantile(q)
+
+
+# RunningStats for every (key, metric), key is e.g. (size, heuristic)
+class Aggregator:
+    def __init__(self, sketch=False):
+        self.sketch = sketch
+        self.stats = {}  # key -> {metric -> RunningStats}
+
+    def add(self, key, values):  # values - {metric: value}
+        metrics = self.stats.setdefault(key, {})
+        for metric, value in values.items():
+            if metric not in metrics:
+                metrics[metric] = RunningStats(self.sketch)
+            metrics[metric].add(value)
+
+    def get(self, key, metric):
+        return self.stats[key][metric]
+
+    def count(self, key):  # number of added value sets
+        metrics = self.stats.get(key)
+        return next(iter(metrics.values())).count if metrics else 0
+
+    def keys(self):
+        return self.stats.keys()
+
+    # true when confidence interval of every metric is narrower than relative_width * |mean| on
+    # each side (metrics with mean 0 need width 0), at least min_count values are needed
+    def converged(self, key, metrics, relative_width, min_count=5, z=Z_95):
+        if self.count(key) < max(min_count, 2):
+            return False
+        for metric in metrics:
+            stats = self.stats[key][metric]
+            if stats.ci_half_width(z) > relative_width * abs(stats.mean):
+                return False
+        return True
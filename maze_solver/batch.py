@@ -0,0 +1,118 @@
+from collections import namedtuple, deque
+
+from .maze import Maze, TileType, plain_rows
+
+# length - number of steps from start to end (None if end can not be reached),
+# path - coordinates from start to end (both included) or None if paths were not requested
+PathResult = namedtuple("PathResult", ["start", "end", "length", "path"])
+
+
+# Solves many (start, end) pairs on one maze without writing anything into Maze.data.
+# One BFS distance field is computed per source and reused for all its goals,
+# so every source costs one linear pass no matter how many goals it has.
+class BatchSolver:
+    def __init__(self, maze: Maze):
+        self.maze = maze
+        self.reset()
+
+    # reads walls again and drops computed fields, has to be called after maze was changed
+    def reset(self):
+        data = plain_rows(self.maze.data)
+        self.h = len(data)  # height of maze
+        self.w = len(data[0])  # width of maze
+        self.walkable = bytearray(tile != TileType.WALL for row in data
+                                  for tile in row)
+        self.fields = {}  # source index -> (distances, parents)
+
+    def distance_field(self, source):
+        i = source[1] * self.w + source[0]
+        if i not in self.fields:
+            self.fields[i] = self.__bfs(i)
+        return self.fields[i]
+
+    def __bfs(self, source_i):
+        w = self.w
+        walkable = self.walkable
+        distances = [-1] * (w * self.h)  # -1 - tile not reachable
+        parents = [-1] * (w * self.h)
+        if not walkable[source_i]:
+            return distances, parents
+        distances[source_i] = 0
+        queue = deque([source_i])
+        while queue:
+            i = queue.popleft()
+            d = distances[i] + 1
+            x = i % w
+            for n_i in (i + 1 if x + 1 < w else -1, i - 1 if x > 0 else -1,
+                        i + w, i - w):
+                if 0 <= n_i < len(walkable) and walkable[n_i] and distances[
+                        n_i] == -1:
+                    distances[n_i] = d
+                    parents[n_i] = i
+                    queue.append(n_i)
+        return distances, parents
+
+    def __result(self, source, goal, field, paths):
+        distances, parents = field
+        i = goal[1] * self.w + goal[0]
+        length = distances[i]
+        if length == -1:
+            return PathResult(source, goal, None, None)
+        path = None
+        if paths:
+            path = []
+            while i != -1:
+                path.append((i % self.w, i // self.w))
+                i = parents[i]
+            path.reverse()
+        return PathResult(source, goal, length, path)
+
+    # one source and many goals
+    def solve_from(self, source, goals, paths=False):
+        field = self.distance_field(source)
+        return [self.__result(source, goal, field, paths) for goal in goals]
+
+    # list of (start, end) pairs, results are returned in the same order
+    def solve(self, pairs, paths=False):
+        return [
+            self.__result(start, end, self.distance_field(start), paths)
+            for start, end in pairs
+        ]
+
+    # like solve, but walls are the same in both directions, so field of either end can be used,
+    # fields which are not computed yet are chosen greedily by number of pairs they answer
+    def solve_shared(self, pairs, paths=False):
+        w = self.w
+        pairs = [(tuple(start), tuple(end)) for start, end in pairs]  # tiles are compared below
+        uncovered = [
+            k for k, (start, end) in enumerate(pairs)
+            if start[1] * w + start[0] not in self.fields
+            and end[1] * w + end[0] not in self.fields
+        ]
+        while uncovered:
+            counts = {}
+            for k in uncovered:
+                for x, y in pairs[k]:
+                    counts[(x, y)] = counts.get((x, y), 0) + 1
+            source = max(counts, key=counts.__getitem__)
+            self.distance_field(source)
+            uncovered = [k for k in uncovered if source not in pairs[k]]
+
+        results = []
+        for start, end in pairs:
+            if start[1] * w + start[0] in self.fields:
+                results.append(
+                    self.__result(start, end, self.distance_field(start),
+                                  paths))
+                continue
+            result = self.__result(end, start, self.distance_field(end),
+                                   paths)
+            results.append(
+                PathResult(
+                    start, end, result.length,
+                    result.path[::-1] if result.path is not None else None))
+        return results
+
+    def distances_from(self, source):  # distance to every tile as 2D list
+        distances = self.distance_field(source)[0]
+        return [distances[y * self.w:(y + 1) * self.w] for y in range(self.h)]
@@ -0,0 +1,232 @@
+import hashlib, os, random, struct
+from collections import OrderedDict, namedtuple
+from timeit import default_timer as timer
+
+import numpy as np
+
+from .maze import Maze, TileType, plain_rows
+from .solver import Solver, SearchStats
+
+# Disk tier layout (little endian), one file per entry in cache folder:
+#   maze-<width>x<height>-<seed>.bin - header (magic, rows, cols) and walls bit-packed row by row
+#   <key hash>.sol - header (magic, path length or -1, expanded, time), tile counts,
+#                    SearchStats values and (x, y) of every path tile
+
+MAZE_MAGIC = b"MAZECCH1"
+MAZE_HEADER = struct.Struct("<8sII")
+SOLUTION_MAGIC = b"MAZESOL1"
+SOLUTION_HEADER = struct.Struct("<8sqqd")
+TILES = struct.Struct("<%dQ" % len(TileType))
+STATS = struct.Struct("<" + "".join("d" if field.endswith("_time") else "q"
+                                    for field in SearchStats.FIELDS))
+
+# search result kept in cache, path - coordinates (None if there is no path),
+# tiles - tile counts of maze after search indexed by tile type, time - time of Solver.search [ms]
+Solution = namedtuple("Solution", ["path", "expanded", "tiles", "time", "stats"])
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0  # found in memory
+        self.disk_hits = 0  # found on disk (and loaded into memory)
+        self.misses = 0  # computed
+        self.evictions = 0  # dropped from memory because of capacity
+
+    def __repr__(self):
+        return "CacheStats(hits=%d, disk_hits=%d, misses=%d, evictions=%d)" % (
+            self.hits, self.disk_hits, self.misses, self.evictions)
+
+
+class LRUCache:
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # least recently used first
+        self.stats = CacheStats()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):  # None if key is not cached, hits are counted here, misses by caller
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+
+
+def _stats(values):  # SearchStats with values in order of FIELDS
+    stats = SearchStats()
+    for field, value in zip(SearchStats.FIELDS, values):
+        setattr(stats, field, value)
+    return stats
+
+
+def _walls(maze):  # bool array of walls
+    if maze.backend == "numpy":
+        return maze.data == TileType.WALL
+    return np.array(plain_rows(maze.data) if maze.backend == "list" else
+                    [maze.data.row(y) for y in range(len(maze.data))],
+                    dtype=np.uint8) == TileType.WALL
+
+
+# content hash of walls, other tile types (checked, path) do not change it
+def grid_hash(maze):
+    walls = _walls(maze)
+    digest = hashlib.sha1(struct.pack("<II", *walls.shape))
+    digest.update(np.packbits(walls).tobytes())
+    return digest.hexdigest()
+
+
+# Mazes are cached by generation parameters (width, height, seed) as bit-packed walls and every
+# call returns new Maze built from them, so cached mazes are never changed by searches.
+# Solutions are cached by grid_hash of maze, start, end, heuristic and engine.
+# With folder entries are also written to disk and read from there when they are not in memory,
+# so they are shared between processes and sessions.
+class MazeCache:
+    def __init__(self, capacity=128, folder=None):
+        self.mazes = LRUCache(capacity)
+        self.solutions = LRUCache(capacity)
+        self.folder = folder
+        if folder is not None:
+            os.makedirs(folder, exist_ok=True)
+
+    def stats(self):
+        return {"mazes": self.mazes.stats, "solutions": self.solutions.stats}
+
+    # the same maze as random.seed(seed); Maze(width, height, backend=backend)
+    def maze(self, width, height, seed, backend="list"):
+        start = timer()
+        key = (width, height, seed)
+        entry = self.mazes.get(key)
+        if entry is None:
+            entry = self.__load_maze(key)
+            if entry is not None:
+                self.mazes.stats.disk_hits += 1
+            else:
+                self.mazes.stats.misses += 1
+                random.seed(seed)
+                maze = Maze(width, height, backend=backend)
+                entry = (len(maze.data), len(maze.data[0]),
+                         np.packbits(_walls(maze)).tobytes())
+                self.__save_maze(key, entry)
+                self.mazes.put(key, entry)
+                return maze
+            self.mazes.put(key, entry)
+        rows, cols, packed = entry
+        walls = np.unpackbits(np.frombuffer(packed, dtype=np.uint8),
+                              count=rows * cols).reshape(rows, cols)
+        maze = Maze.from_walls(walls, backend)
+        maze.generation_time = (timer() - start) * 1000  # loading replaces generation
+        return maze
+
+    # runs solver.search or restores its result (path is marked in maze, checked tiles are not)
+    def search(self, solver: Solver) -> Solution:
+        key = (grid_hash(solver.maze), solver.start, solver.end, solver.h_type,
+               solver.engine)
+        solution = self.solutions.get(key)
+        if solution is None:
+            solution = self.__load_solution(key)
+            if solution is not None:
+                self.solutions.stats.disk_hits += 1
+                self.solutions.put(key, solution)
+        if solution is None:
+            self.solutions.stats.misses += 1
+            start = timer()
+            solver.search()
+            end = timer()
+            solution = Solution(
+                tuple(solver.path) if solver.path is not None else None,
+                solver.expanded,
+                solver.maze.get_tiles_counts(), (end - start) * 1000,
+                solver.stats)
+            self.solutions.put(key, solution)
+            self.__save_solution(key, solution)
+            return solution
+
+        solver.expanded = solution.expanded
+        solver.stats = _stats(solution.stats.row())
+        solver.path = list(
+            solution.path) if solution.path is not None else None
+        if solver.path is not None:
+            for x, y in solver.path:
+                solver.maze.set_path(x, y)
+        return solution
+
+    def __path(self, name):
+        return os.path.join(self.folder, name)
+
+    def __maze_name(self, key):
+        return "maze-%dx%d-%d.bin" % key
+
+    def __solution_name(self, key):
+        return hashlib.sha1(repr(key).encode()).hexdigest() + ".sol"
+
+    def __write(self, name, data):  # written under temporary name, so readers never see partial files
+        path = self.__path(name)
+        temporary = path + ".%d.tmp" % os.getpid()
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+
+    def __read(self, name):
+        if self.folder is None:
+            return None
+        try:
+            with open(self.__path(name), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def __save_maze(self, key, entry):
+        if self.folder is not None:
+            rows, cols, packed = entry
+            self.__write(self.__maze_name(key),
+                         MAZE_HEADER.pack(MAZE_MAGIC, rows, cols) + packed)
+
+    def __load_maze(self, key):
+        data = self.__read(self.__maze_name(key))
+        if data is None:
+            return None
+        magic, rows, cols = MAZE_HEADER.unpack_from(data)
+        if magic != MAZE_MAGIC:
+            raise ValueError(self.__maze_name(key) + " is not a cached maze")
+        return rows, cols, data[MAZE_HEADER.size:]
+
+    def __save_solution(self, key, solution):
+        if self.folder is None:
+            return
+        path = np.array(solution.path or [], dtype="<u4")
+        self.__write(
+            self.__solution_name(key),
+            SOLUTION_HEADER.pack(SOLUTION_MAGIC, -1 if solution.path is None
+                                 else len(path), solution.expanded,
+                                 solution.time) +
+            TILES.pack(*solution.tiles) + STATS.pack(*solution.stats.row()) +
+            path.tobytes())
+
+    def __load_solution(self, key):
+        data = self.__read(self.__solution_name(key))
+        if data is None:
+            return None
+        magic, length, expanded, time = SOLUTION_HEADER.unpack_from(data)
+        if magic != SOLUTION_MAGIC:
+            raise ValueError(self.__solution_name(key) +
+                             " is not a cached solution")
+        offset = SOLUTION_HEADER.size
+        tiles = list(TILES.unpack_from(data, offset))
+        offset += TILES.size
+        stats = _stats(STATS.unpack_from(data, offset))
+        offset += STATS.size
+        path = None
+        if length >= 0:
+            path = [(x, y) for x, y in np.frombuffer(
+                data, dtype="<u4", count=2 * length, offset=offset).reshape(
+                    length, 2).tolist()]
+        return Solution(path, expanded, tiles, time, stats)
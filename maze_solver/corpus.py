@@ -0,0 +1,112 @@
+import random, multiprocessing
+
+import numpy as np
+
+from .maze import Maze, TileType
+
+# Corpus file layout (little endian):
+#   header - magic and number of mazes
+#   index  - one entry per maze: grid size, generation seed, offset of its data and size given
+#            to Maze (different sizes have the same grid, e.g. 20 and 21)
+#   data   - walls of every maze bit-packed row by row, one bit per tile (1 - wall)
+
+MAGIC = b"MAZECRP2"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("count", "<u8")])
+ENTRY_DTYPE = np.dtype([("height", "<u4"), ("width", "<u4"), ("seed", "<u8"),
+                        ("offset", "<u8"), ("maze_height", "<u4"),
+                        ("maze_width", "<u4")])
+
+
+def grid_size(width, height):  # size of Maze.data for Maze(width, height)
+    return 2 * int(height / 2) + 1, 2 * int(width / 2) + 1
+
+
+def _generate_walls(job):
+    width, height, seed = job
+    random.seed(seed)
+    maze = Maze(width, height, backend="numpy")
+    return np.packbits(maze.data == TileType.WALL).tobytes()
+
+
+# generates count mazes for every (width, height) in sizes and saves them to path,
+# i-th maze of each size is the same maze as benchmark runner generates for i-th iteration
+def create_corpus(path, sizes, count, seed=578, workers=None):
+    from .runner import derive_seed
+
+    jobs = [(width, height, derive_seed(seed, width, height, i))
+            for (width, height) in sizes for i in range(count)]
+    index = np.zeros(len(jobs), dtype=ENTRY_DTYPE)
+    offset = HEADER_DTYPE.itemsize + ENTRY_DTYPE.itemsize * len(jobs)
+    for entry, (width, height, job_seed) in zip(index, jobs):
+        rows, cols = grid_size(width, height)
+        entry["height"] = rows
+        entry["width"] = cols
+        entry["seed"] = job_seed
+        entry["offset"] = offset
+        entry["maze_height"] = height
+        entry["maze_width"] = width
+        offset += (rows * cols + 7) // 8
+
+    header = np.array([(MAGIC, len(jobs))], dtype=HEADER_DTYPE)
+    workers = workers or multiprocessing.cpu_count()
+    with open(path, "wb") as corpus_file:
+        corpus_file.write(header.tobytes())
+        corpus_file.write(index.tobytes())
+        if workers == 1:
+            for data in map(_generate_walls, jobs):
+                corpus_file.write(data)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                for data in pool.imap(_generate_walls, jobs):
+                    corpus_file.write(data)
+    return MazeCorpus(path)
+
+
+class MazeCorpus:
+    def __init__(self, path):
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8,
+                                mode="r")  # pages are shared between processes
+        header = self.buffer[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header["magic"] == b"MAZECRP1":
+            raise ValueError(path + " is an old maze corpus file without maze "
+                             "sizes, create it again")
+        if header["magic"] != MAGIC:
+            raise ValueError(path + " is not a maze corpus file")
+        end = HEADER_DTYPE.itemsize + ENTRY_DTYPE.itemsize * int(
+            header["count"])
+        self.index = self.buffer[HEADER_DTYPE.itemsize:end].view(ENTRY_DTYPE)
+        self.__sizes = {}  # (width, height) given to Maze -> indexes of entries with that size
+        for i, entry in enumerate(self.index):
+            self.__sizes.setdefault(
+                (int(entry["maze_width"]), int(entry["maze_height"])),
+                []).append(i)
+
+    def __len__(self):
+        return len(self.index)
+
+    # index of iteration-th maze generated for Maze(width, height), with seed the maze must be
+    # generated with that seed (corpus created with other base seed has other mazes)
+    def find(self, width, height, iteration=0, seed=None):
+        entries = self.__sizes.get((width, height), [])
+        if iteration >= len(entries):
+            raise KeyError("corpus has only " + str(len(entries)) +
+                           " mazes of size " + str(width) + "x" +
+                           str(height))
+        i = entries[iteration]
+        if seed is not None and int(self.index[i]["seed"]) != seed:
+            raise KeyError("maze " + str(iteration) + " of size " +
+                           str(width) + "x" + str(height) +
+                           " in corpus has other seed")
+        return i
+
+    def walls(self, i):  # boolean array of walls of i-th maze
+        entry = self.index[i]
+        rows = int(entry["height"])
+        cols = int(entry["width"])
+        offset = int(entry["offset"])
+        packed = self.buffer[offset:offset + (rows * cols + 7) // 8]
+        return np.unpackbits(packed, count=rows * cols).reshape(rows, cols)
+
+    def maze(self, i, backend="list") -> Maze:
+        return Maze.from_walls(self.walls(i), backend=backend)
@@ -0,0 +1,374 @@
+import json, os, struct, zlib
+
+import numpy as np
+
+from .maze import Maze, TileType, TILE_CHARS
+from .stream import MazeFile, write_rows
+
+# Export formats of mazes, every one is written and read in blocks of rows, so whole file
+# (or its decoded copy) is never kept in memory next to the grid:
+#   .txt - TILE_CHARS row by row (all tile types, the same as str(maze))
+#   .maze - bit-packed walls with header of stream.MazeFile (size, seed, generator)
+#   .png - palette image, one tile is scale x scale pixels of visualizer color
+# Solved paths are kept in newline-delimited JSON, one path_record per line.
+
+BLOCK_ROWS = 256  # grid rows converted at once
+EXTENSIONS = {".txt": "text", ".maze": "binary", ".png": "png"}
+
+PALETTE = [(224, 224, 224), (0, 0, 0), (0, 255, 0), (255, 0, 0),
+           (0, 0, 255)]  # RGB indexed by tile type, the same as MazeVisualizer
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHUNK = struct.Struct(">I4s")
+PNG_HEADER = struct.Struct(">IIBBBBB")
+
+
+def _format(path):
+    kind = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if kind is None:
+        raise ValueError("unknown maze file extension: " + path +
+                         " (known: " + ", ".join(EXTENSIONS) + ")")
+    return kind
+
+
+def save_maze(maze, path, **options):  # format chosen by extension
+    kind = _format(path)
+    if kind == "text":
+        write_text(maze, path)
+    elif kind == "binary":
+        write_binary(maze, path, **options)
+    else:
+        write_png(maze, path, **options)
+
+
+def load_maze(path, backend="list", **options):
+    kind = _format(path)
+    if kind == "text":
+        return read_text(path, backend)
+    if kind == "binary":
+        return read_binary(path, backend)
+    return read_png(path, backend, **options)
+
+
+# grid of maze as uint8 arrays of at most rows rows
+def row_blocks(maze, rows=BLOCK_ROWS):
+    data = maze.data
+    height = len(data)
+    for y in range(0, height, rows):
+        end = min(y + rows, height)
+        if maze.backend == "numpy":
+            yield data[y:end]
+        elif maze.backend == "lazy":
+            if data.walls is not None and not data.overlay:
+                walls = data.walls
+                start = walls.offset + y * walls.row_bytes
+                packed = walls.buffer[start:start + (end - y) *
+                                      walls.row_bytes]
+                yield np.unpackbits(packed.reshape(end - y, walls.row_bytes),
+                                    axis=1,
+                                    count=walls.cols)
+            else:
+                yield np.array([data.row(i) for i in range(y, end)],
+                               dtype=np.uint8)
+        else:
+            yield np.array(data[y:end], dtype=np.uint8)
+
+
+# builds maze of given backend with rows x cols grid filled from blocks of grid rows
+# (uint8 tile types), grid is allocated once and blocks are dropped after they are copied
+def _from_blocks(rows, cols, blocks, backend):
+    if backend == "lazy":
+        raise ValueError("lazy backend can only open .maze files")
+    if not rows or not cols:
+        raise ValueError("maze file has no tiles")
+    maze = Maze(cols - 1, rows - 1, init=False, backend=backend)
+    if len(maze.data) != rows or len(maze.data[0]) != cols:  # grid of Maze has odd sizes
+        maze.data = np.empty((rows, cols),
+                             dtype=np.uint8) if backend == "numpy" else [
+                                 None
+                             ] * rows
+    y = 0
+    for block in blocks:
+        if y + len(block) > rows:
+            raise ValueError("maze file has more than %d rows" % rows)
+        maze.data[y:y + len(block)] = block if backend == "numpy" else block.tolist()
+        y += len(block)
+    if y != rows:
+        raise ValueError("maze file has %d rows, expected %d" % (y, rows))
+    return maze
+
+
+def write_text(maze, path):
+    lookup = np.full(256, ord("?"), dtype=np.uint8)
+    lookup[:len(TILE_CHARS)] = np.frombuffer(TILE_CHARS.encode(),
+                                             dtype=np.uint8)
+    with open(path, "wb") as file:
+        for block in row_blocks(maze):
+            lines = np.empty((block.shape[0], block.shape[1] + 1),
+                             dtype=np.uint8)
+            lines[:, :-1] = lookup[block]
+            lines[:, -1] = ord("\n")
+            file.write(lines.tobytes())
+
+
+def read_text(path, backend="list"):
+    lookup = np.full(256, 255, dtype=np.uint8)  # 255 - character of no tile type
+    lookup[np.frombuffer(TILE_CHARS.encode(),
+                         dtype=np.uint8)] = np.arange(len(TILE_CHARS))
+
+    def blocks(file, line, pending):
+        y = 0
+        while True:
+            data = file.read(BLOCK_ROWS * line)
+            pending += data
+            end = len(data) < BLOCK_ROWS * line
+            if end and len(pending) % line == line - 1:  # last row without newline
+                pending += b"\n"
+            size = len(pending) - len(pending) % line
+            chunk = np.frombuffer(pending, dtype=np.uint8,
+                                  count=size).reshape(-1, line)
+            if (chunk[:, -1] != ord("\n")).any() or (end and size < len(pending)):
+                newlines = np.flatnonzero(
+                    np.frombuffer(pending, dtype=np.uint8) == ord("\n"))
+                wrong = newlines != np.arange(len(newlines)) * line + line - 1
+                row = int(np.argmax(wrong)) if wrong.any() else len(newlines)
+                raise ValueError("%s: row %d has wrong length, expected %d" %
+                                 (path, y + row, line - 1))
+            block = lookup[chunk[:, :-1]]
+            if (block == 255).any():
+                row, x = np.argwhere(block == 255)[0]
+                raise ValueError("%s: unknown tile %r in row %d, column %d" %
+                                 (path, chr(chunk[row, x]), y + row, x))
+            if len(block):
+                yield block
+            y += len(block)
+            pending = pending[size:]
+            if end:
+                break
+
+    with open(path, "rb") as file:
+        first = file.readline().rstrip(b"\n")
+        line = len(first) + 1  # row with newline
+        rows = (os.fstat(file.fileno()).st_size + 1) // line  # last newline is optional
+        return _from_blocks(rows if first else 0, line - 1,
+                            blocks(file, line, first + b"\n"), backend)
+
+
+# seed and generator of maze file the maze was opened from (Maze.open), when its walls were not
+# changed, otherwise 0 and "" (mazes in memory do not know how they were generated)
+def _origin(maze):
+    data = maze.data
+    if maze.backend != "lazy" or data.walls is None:
+        return 0, ""
+    for i, tile in data.overlay.items():
+        if tile == TileType.WALL or data.base(i % data.cols,
+                                              i // data.cols) == TileType.WALL:
+            return 0, ""
+    return data.walls.seed, data.walls.generator
+
+
+# only walls are written, seed and generator are stored in header for reference,
+# by default they are taken from maze (see _origin)
+def write_binary(maze, path, seed=None, generator=None):
+    origin_seed, origin_generator = _origin(maze)
+    write_rows(path, len(maze.data), len(maze.data[0]),
+               (row for block in row_blocks(maze) for row in block),
+               origin_seed if seed is None else seed,
+               origin_generator if generator is None else generator)
+
+
+def read_binary(path, backend="list"):
+    if backend == "lazy":
+        return Maze.open(path)
+    walls = MazeFile(path)
+
+    def blocks():
+        for y in range(0, walls.rows, BLOCK_ROWS):
+            count = min(BLOCK_ROWS, walls.rows - y)
+            start = walls.offset + y * walls.row_bytes
+            yield np.unpackbits(walls.buffer[start:start + count *
+                                             walls.row_bytes].reshape(
+                                                 count, walls.row_bytes),
+                                axis=1,
+                                count=walls.cols)
+
+    return _from_blocks(walls.rows, walls.cols, blocks(), backend)
+
+
+def _png_chunk(file, kind, data):
+    file.write(PNG_CHUNK.pack(len(data), kind))
+    file.write(data)
+    file.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+
+# 4 bit palette PNG (two pixels in byte), IDAT chunks are written as soon as compressor outputs
+# data, low compression level is several times faster than default one with a bit larger file
+def write_png(maze, path, scale=1, level=1):
+    rows = len(maze.data)
+    width = len(maze.data[0]) * scale
+    compressor = zlib.compressobj(level)
+    with open(path, "wb") as file:
+        file.write(PNG_SIGNATURE)
+        _png_chunk(file, b"IHDR",
+                   PNG_HEADER.pack(width, rows * scale, 4, 3, 0, 0, 0))
+        _png_chunk(file, b"PLTE", bytes(c for color in PALETTE for c in color))
+        for block in row_blocks(maze):
+            pixels = np.zeros((len(block), width + width % 2),
+                              dtype=np.uint8)  # even number of pixels
+            pixels[:, :width] = np.minimum(block, len(PALETTE) - 1).repeat(
+                scale, axis=1)
+            lines = np.zeros((len(block), pixels.shape[1] // 2 + 1),
+                             dtype=np.uint8)  # first byte - filter type 0
+            lines[:, 1:] = pixels[:, 0::2] << 4 | pixels[:, 1::2]
+            data = compressor.compress(lines.repeat(scale, axis=0).tobytes())
+            if data:
+                _png_chunk(file, b"IDAT", data)
+        _png_chunk(file, b"IDAT", compressor.flush())
+        _png_chunk(file, b"IEND", b"")
+
+
+def _unfilter_row(kind, row, above):  # Average or Paeth filter of scanline with 1 byte pixels
+    left = 0
+    upper_left = 0
+    for x, (value, up) in enumerate(zip(row, above)):
+        if kind == 3:
+            left = (value + ((left + up) >> 1)) & 255
+        else:
+            p = left + up - upper_left
+            pa, pb, pc = abs(p - left), abs(p - up), abs(p - upper_left)
+            predictor = left if pa <= pb and pa <= pc else up if pb <= pc else upper_left
+            left = (value + predictor) & 255
+        row[x] = left
+        upper_left = up
+    return row
+
+
+# reads PNG written by write_png (or other palette PNG with colors of PALETTE), tile is the top left
+# pixel of every scale x scale square. Average and Paeth filters (not used by write_png) are decoded
+# byte by byte, so files of other programs are much slower to read.
+def read_png(path, backend="list", scale=1):
+
+    def chunks(file):
+        if file.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+            raise ValueError(path + " is not a PNG file")
+        while True:
+            head = file.read(PNG_CHUNK.size)
+            if len(head) < PNG_CHUNK.size:
+                raise ValueError(path + ": PNG file is truncated")
+            length, kind = PNG_CHUNK.unpack(head)
+            data = file.read(length)
+            file.read(4)  # crc
+            if kind == b"IEND":
+                return
+            yield kind, data
+
+    def unfilter(lines, previous):  # byte rows of scanlines, previous - last row before them
+        pixels = lines[:, 1:]
+        if not lines[:, 0].any():
+            return pixels
+        pixels = pixels.copy()
+        for i, kind in enumerate(lines[:, 0]):
+            if kind == 1:  # Sub
+                pixels[i] = np.cumsum(pixels[i], dtype=np.uint8)
+            elif kind == 2:  # Up
+                pixels[i] += pixels[i - 1] if i else previous
+            elif kind in (3, 4):  # Average, Paeth
+                pixels[i] = _unfilter_row(kind, pixels[i].tolist(),
+                                          (pixels[i - 1] if i else
+                                           previous).tolist())
+            elif kind:
+                raise ValueError(path + ": unknown PNG filter %d" % kind)
+        return pixels
+
+    def blocks(chunks, width, height, depth):
+        tiles = None
+        decompressor = zlib.decompressobj()
+        pending = b""
+        line = (width * depth + 7) // 8 + 1  # scanline starts with filter type
+        previous = np.zeros(line - 1, dtype=np.uint8)
+        y = 0  # pixel row of first pending scanline
+        for kind, data in chunks:
+            if kind == b"PLTE":
+                colors = [tuple(data[i:i + 3]) for i in range(0, len(data), 3)]
+                unknown = [c for c in colors if c not in PALETTE]
+                if unknown:
+                    raise ValueError(path + ": color %r is not a tile color" %
+                                     (unknown[0], ))
+                tiles = np.full(256, 255, dtype=np.uint8)
+                tiles[:len(colors)] = [PALETTE.index(c) for c in colors]
+            elif kind == b"IDAT":
+                if tiles is None:
+                    raise ValueError(path + ": PNG file has no palette")
+                pending += decompressor.decompress(data)
+                size = len(pending) - len(pending) % line
+                if not size:
+                    continue
+                lines = np.frombuffer(pending, dtype=np.uint8,
+                                      count=size).reshape(-1, line)
+                pending = pending[size:]
+                pixels = unfilter(lines, previous)
+                previous = pixels[-1].copy()
+                pixels = pixels[(-y) % scale::scale]
+                if depth < 8:  # several pixels in byte, first in high bits
+                    split = np.empty(pixels.shape + (8 // depth, ),
+                                     dtype=np.uint8)
+                    for i in range(8 // depth):
+                        split[:, :, i] = pixels >> (8 - depth *
+                                                    (i + 1)) & (1 << depth) - 1
+                    pixels = split.reshape(len(pixels), -1)[:, :width]
+                block = tiles[pixels[:, ::scale]]
+                y += len(lines)
+                if (block == 255).any():
+                    raise ValueError(path + ": pixel outside of palette")
+                if len(block):
+                    yield block
+        if tiles is None or y != height:
+            raise ValueError(path + ": PNG file is truncated")
+
+    with open(path, "rb") as file:
+        png_chunks = chunks(file)
+        kind, data = next(png_chunks)
+        if kind != b"IHDR":
+            raise ValueError(path + ": PNG file does not start with header")
+        width, height, depth, color, _, _, interlace = PNG_HEADER.unpack(data)
+        if depth not in (1, 2, 4, 8) or color != 3 or interlace:
+            raise ValueError(path +
+                             ": only palette PNG without interlace is supported")
+        return _from_blocks(-(-height // scale), -(-width // scale),
+                            blocks(png_chunks, width, height, depth), backend)
+
+
+# one line of paths file, path - list of [x, y] (None if there is no path)
+def path_record(solver, **fields):
+    record = {
+        "start": list(solver.start),
+        "end": list(solver.end),
+        "heuristic": solver.h_type,
+        "engine": solver.engine,
+        "length": -1 if solver.path is None else len(solver.path),
+        "expanded": solver.expanded,
+        "path": None if solver.path is None else [list(tile) for tile in
+                                                  solver.path]
+    }
+    record.update(fields)
+    return record
+
+
+def write_paths(path, records, append=False):  # records - dicts (e.g. path_record), one per line
+    with open(path, "a" if append else "w") as file:
+        for record in records:
+            file.write(json.dumps(record, separators=(",", ":")))
+            file.write("\n")
+
+
+def read_paths(path):  # yields records one by one, path tiles as (x, y) tuples
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                raise ValueError("%s:%d: %s" % (path, number, error))
+            if record.get("path") is not None:
+                record["path"] = [tuple(tile) for tile in record["path"]]
+            yield record
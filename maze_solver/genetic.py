@@ -0,0 +1,314 @@
+import multiprocessing
+from collections import deque
+from timeit import default_timer as timer
+
+import numpy as np
+
+from .maze import Maze, TileType, plain_rows
+
+MOVES_X = np.array([1, -1, 0, 0])  # genes: 0 - right, 1 - left, 2 - down, 3 - up
+MOVES_Y = np.array([0, 0, 1, -1])
+
+# fitness weights
+DISTANCE_WEIGHT = 10  # per tile of maze distance between closest reached tile and end
+COLLISION_WEIGHT = 1  # per move into a wall
+REVISIT_WEIGHT = 1  # per move into already visited tile
+REACHED_BONUS = 1000  # for reaching end, unused moves are added on top of it
+VISITED_BYTES = 1 << 26  # memory for visited tiles during evaluation, population is evaluated in parts
+
+
+# Everything needed to evaluate genomes, sent once to every island worker
+class Problem:
+    def __init__(self, walls, distances, start, end):
+        self.walls = walls  # bool array [y][x]
+        self.distances = distances  # maze distance of every tile to end, walls and unreachable - h * w
+        self.start = start  # starting point coordinates (x,y)
+        self.end = end  # end point coordinates (x,y)
+
+    # simulates population (in parts of at most VISITED_BYTES visited tiles), returns fitness of
+    # every genome and which genomes reached end
+    def evaluate(self, genomes):
+        h, w = self.walls.shape
+        part = max(1, VISITED_BYTES // (h * w))
+        if len(genomes) <= part:
+            return self.__evaluate(genomes)
+        results = [self.__evaluate(genomes[i:i + part])
+                   for i in range(0, len(genomes), part)]
+        return (np.concatenate([fitness for fitness, _ in results]),
+                np.concatenate([reached for _, reached in results]))
+
+    def __evaluate(self, genomes):  # all genomes are simulated at once
+        size, length = genomes.shape
+        h, w = self.walls.shape
+        individuals = np.arange(size)
+        x = np.full(size, self.start[0])
+        y = np.full(size, self.start[1])
+        closest = np.full(size, self.distances[self.start[1], self.start[0]])
+        collisions = np.zeros(size, dtype=np.int64)
+        revisits = np.zeros(size, dtype=np.int64)
+        finish = np.full(size, length)  # move count after which end was reached
+        visited = np.zeros((size, h * w), dtype=bool)
+        visited[individuals, y * w + x] = True
+        active = np.ones(size, dtype=bool)
+
+        for t in range(length):
+            genes = genomes[:, t]
+            n_x = x + MOVES_X[genes]
+            n_y = y + MOVES_Y[genes]
+            hit = self.walls[n_y, n_x] & active
+            move = active & ~hit
+            x = np.where(move, n_x, x)
+            y = np.where(move, n_y, y)
+            tiles = y * w + x
+            revisits += visited[individuals, tiles] & move
+            visited[individuals, tiles] |= move
+            collisions += hit
+            np.minimum(closest, self.distances[y, x], out=closest)
+            done = move & (x == self.end[0]) & (y == self.end[1])
+            finish[done] = t + 1
+            active &= ~done
+            if not active.any():
+                break
+
+        reached = finish < length
+        fitness = -(DISTANCE_WEIGHT * closest + COLLISION_WEIGHT * collisions +
+                    REVISIT_WEIGHT * revisits)
+        fitness = fitness + reached * (REACHED_BONUS + length - finish)
+        return fitness, reached
+
+    # genome of random depth-first walk from start: unvisited corridors are followed, dead ends are
+    # left by going back, moves after reaching end are random
+    def explore(self, rng, length):
+        h, w = self.walls.shape
+        walls = self.walls.ravel().tolist()
+        genome = rng.integers(4, size=length, dtype=np.int8)
+        steps = (1, -1, w, -w)  # index change of every gene
+        visited = bytearray(h * w)
+        end = self.end[1] * w + self.end[0]
+        i = self.start[1] * w + self.start[0]
+        visited[i] = True
+        stack = []  # genes which led to tiles on current branch
+        choices = rng.random(length)
+        for t in range(length):
+            if i == end:
+                break
+            genes = [g for g in range(4) if not walls[i + steps[g]]
+                     and not visited[i + steps[g]]]
+            if genes:
+                gene = genes[int(choices[t] * len(genes))]
+                stack.append(gene)
+                visited[i + steps[gene]] = True
+            elif stack:
+                gene = stack.pop() ^ 1  # opposite move (genes are in pairs right/left, down/up)
+            else:
+                break
+            genome[t] = gene
+            i += steps[gene]
+        return genome
+
+    def walk(self, genome):  # tiles visited by one genome until end is reached
+        x, y = self.start
+        walk = [(x, y)]
+        for gene in genome:
+            n_x = x + MOVES_X[gene]
+            n_y = y + MOVES_Y[gene]
+            if self.walls[n_y, n_x]:
+                continue
+            x = int(n_x)
+            y = int(n_y)
+            walk.append((x, y))
+            if (x, y) == self.end:
+                break
+        return walk
+
+
+# runs given number of generations on one population (island), returns new genomes, their fitness,
+# generator (its state is not shared with pool workers) and (best fitness, genomes which reached end)
+# of every generation
+def evolve(problem, genomes, rng, generations, mutation, tournament, elite):
+    size, length = genomes.shape
+    fitness, _ = problem.evaluate(genomes)
+    history = []
+    for _ in range(generations):
+        order = np.argsort(-fitness, kind="stable")
+        elites = genomes[order[:elite]]
+
+        # tournament selection
+        contestants = rng.integers(size, size=(size, tournament))
+        winners = contestants[np.arange(size),
+                              np.argmax(fitness[contestants], axis=1)]
+        parents = genomes[winners]
+
+        # one point crossover of neighbouring parents
+        half = size // 2
+        first = parents[:half]
+        second = parents[half:2 * half]
+        points = rng.integers(1, length, size=half)[:, None]
+        mask = np.arange(length) < points
+        children = np.concatenate((np.where(mask, first, second),
+                                   np.where(mask, second, first),
+                                   parents[2 * half:]))
+
+        mutated = rng.random(children.shape) < mutation
+        children[mutated] = rng.integers(4, size=int(mutated.sum()))
+        children[:elite] = elites
+
+        genomes = children
+        fitness, reached = problem.evaluate(genomes)
+        history.append((int(fitness.max()), int(reached.sum())))
+    return genomes, fitness, rng, history
+
+
+def _evolve_island(args):
+    return evolve(*args)
+
+
+class GeneticSolver:
+    def __init__(self,
+                 maze: Maze,
+                 start,
+                 end,
+                 init=True,
+                 population=200,
+                 generations=200,
+                 genome_length=None,
+                 mutation=0.01,
+                 tournament=3,
+                 elite=2,
+                 seeded=0.5,
+                 islands=1,
+                 migration=20,
+                 workers=None,
+                 seed=None):
+        self.maze = maze
+        self.start = start  # starting point coordinates (x,y)
+        self.end = end  # end point coordinates (x,y)
+        self.population = population  # genomes per island
+        self.generations = generations
+        self.mutation = mutation  # probability of changing every gene
+        self.tournament = tournament  # genomes competing in one selection
+        self.elite = elite  # best genomes copied to next generation without changes
+        self.seeded = seeded  # part of first population made of depth-first walks instead of random moves
+        self.islands = islands  # independent populations, evolved in parallel when islands > 1
+        self.migration = migration  # generations between migrations of best genomes
+        self.workers = workers
+        self.seed = seed
+
+        walls = np.asarray(plain_rows(maze.data)) == TileType.WALL
+        self.problem = Problem(walls, self.__distances(walls), start, end)
+        if genome_length is None:  # simple path can not be longer than number of walkable tiles
+            genome_length = int((~walls).sum())  # every island keeps population * genome_length bytes
+        self.genome_length = genome_length
+
+        self.path = None
+        self.reached = False
+        self.history = []  # (best fitness, genomes which reached end) of every generation
+        self.converged = None  # first generation in which end was reached
+        self.generations_per_second = 0
+        self.expanded = 0  # number of evaluated genomes
+        if init:
+            self.search()
+
+    def __distances(self, walls):  # bfs distance of every tile to end
+        h, w = walls.shape
+        distances = np.full((h, w), h * w, dtype=np.int64)
+        distances[self.end[1], self.end[0]] = 0
+        queue = deque([self.end])
+        while queue:
+            x, y = queue.popleft()
+            d = distances[y, x] + 1
+            for n_x, n_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= n_x < w and 0 <= n_y < h and not walls[
+                        n_y, n_x] and distances[n_y, n_x] > d:
+                    distances[n_y, n_x] = d
+                    queue.append((n_x, n_y))
+        return distances
+
+    def search(self):
+        rngs = [
+            np.random.default_rng(seed)
+            for seed in np.random.SeedSequence(self.seed).spawn(self.islands)
+        ]
+        populations = [
+            rng.integers(4,
+                         size=(self.population, self.genome_length),
+                         dtype=np.int8) for rng in rngs
+        ]
+        for rng, genomes in zip(rngs, populations):
+            for i in range(int(self.population * self.seeded)):
+                genomes[i] = self.problem.explore(rng, self.genome_length)
+        fitness = [None] * self.islands
+        self.history = []
+        begin = timer()
+        pool = None
+        if self.islands > 1:
+            pool = multiprocessing.Pool(self.workers or min(
+                self.islands, multiprocessing.cpu_count()))
+        try:
+            done = 0
+            while done < self.generations:
+                epoch = min(self.migration, self.generations - done)
+                jobs = [(self.problem, populations[i], rngs[i], epoch,
+                         self.mutation, self.tournament, self.elite)
+                        for i in range(self.islands)]
+                results = pool.map(_evolve_island,
+                                   jobs) if pool else map(_evolve_island, jobs)
+                histories = []
+                for i, (genomes, island_fitness, rng,
+                        history) in enumerate(results):
+                    populations[i] = genomes
+                    fitness[i] = island_fitness
+                    rngs[i] = rng
+                    histories.append(history)
+                self.history.extend(
+                    (max(f for f, _ in values), sum(r for _, r in values))
+                    for values in zip(*histories))
+                done += epoch
+                if self.islands > 1:
+                    self.__migrate(populations, fitness)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        elapsed = timer() - begin
+        self.generations_per_second = self.generations / elapsed if elapsed else 0
+        self.expanded = self.islands * self.population * (self.generations +
+                                                          1)
+
+        best_island = max(range(self.islands), key=lambda i: fitness[i].max())
+        best = populations[best_island][int(np.argmax(fitness[best_island]))]
+        walk = self.problem.walk(best)
+        self.reached = walk[-1] == self.end
+        self.converged = next((generation + 1
+                               for generation, (_, reached) in enumerate(
+                                   self.history) if reached), None)
+        self.__update_maze(walk)
+        return self.path
+
+    def __migrate(self, populations, fitness):  # best genome of every island replaces worst of next one
+        best = [genomes[int(np.argmax(f))].copy()
+                for genomes, f in zip(populations, fitness)]
+        for i in range(self.islands):
+            target = (i + 1) % self.islands
+            worst = int(np.argmin(fitness[target]))
+            populations[target][worst] = best[i]
+            fitness[target][worst] = fitness[i].max()
+
+    def __update_maze(self, walk):
+        for x, y in walk:
+            self.maze.set_checked(x, y)
+        if not self.reached:
+            self.path = None
+            return
+        path = []  # walk without loops
+        positions = {}
+        for tile in walk:
+            if tile in positions:
+                del path[positions[tile] + 1:]
+                positions = {t: i for i, t in enumerate(path)}
+            else:
+                positions[tile] = len(path)
+                path.append(tile)
+        for x, y in path:
+            self.maze.set_path(x, y)
+        self.path = path
@@ -0,0 +1,195 @@
+import math
+from heapq import heappush, heappop
+
+from .maze import TileType, plain_rows
+from .solver import heuristic
+
+
+# Maze contracted to a weighted graph: junctions and dead ends (walkable tiles without exactly two
+# walkable neighbours) are nodes, corridors between them are edges weighted by corridor length.
+# Searches run on nodes only, corridor tiles are added back when path is rebuilt.
+class JunctionGraph:
+    def __init__(self, maze):
+        data = plain_rows(maze.data)
+        self.h = len(data)  # height of maze
+        self.w = len(data[0])  # width of maze
+        self.walkable = bytearray(tile != TileType.WALL for row in data
+                                  for tile in row)
+        self.nodes = [
+            i for i in range(len(self.walkable))
+            if self.walkable[i] and len(self.neighbours(i)) != 2
+        ]  # tile indexes of nodes
+        self.node_id = {i: k for k, i in enumerate(self.nodes)}
+        self.edges = [[] for _ in self.nodes
+                      ]  # node -> list of (neighbour node, length, first step)
+        for k, i in enumerate(self.nodes):
+            for step in self.neighbours(i):
+                end, length = self.follow(i, step)
+                if end != i and end in self.node_id:  # corridors looping back to same node are never useful
+                    self.edges[k].append((self.node_id[end], length, step))
+
+    def neighbours(self, i):  # indexes of walkable neighbours of tile
+        w = self.w
+        x = i % w
+        y = i // w
+        walkable = self.walkable
+        neighbours = []
+        if x + 1 < w and walkable[i + 1]:
+            neighbours.append(i + 1)
+        if x > 0 and walkable[i - 1]:
+            neighbours.append(i - 1)
+        if y + 1 < self.h and walkable[i + w]:
+            neighbours.append(i + w)
+        if y > 0 and walkable[i - w]:
+            neighbours.append(i - w)
+        return neighbours
+
+    # follows corridor which starts with step next to origin until node or stop tile,
+    # returns reached tile and number of steps
+    def follow(self, origin, step, stop=-1):
+        previous = origin
+        i = step
+        length = 1
+        while i != stop and i not in self.node_id:
+            neighbours = self.neighbours(i)
+            n_i = neighbours[0] if neighbours[0] != previous else neighbours[1]
+            if n_i == origin:  # corridor loop without any node
+                break
+            previous = i
+            i = n_i
+            length += 1
+        return i, length
+
+    def corridor(self, origin, step, stop=-1):  # tiles of corridor after origin up to reached tile
+        tiles = [step]
+        previous = origin
+        i = step
+        while i != stop and i not in self.node_id:
+            neighbours = self.neighbours(i)
+            n_i = neighbours[0] if neighbours[0] != previous else neighbours[1]
+            if n_i == origin:
+                break
+            previous = i
+            i = n_i
+            tiles.append(i)
+        return tiles
+
+    # A* over nodes, start and end can be any walkable tiles, counters are added to stats
+    # (solver.SearchStats) if given, landmarks are needed for landmark heuristic,
+    # returns indexes of path tiles (None if there is no path) and tile indexes of expanded nodes
+    def search(self, start, end, h_type=0, stats=None, landmarks=None):
+        w = self.w
+        start_i = start[1] * w + start[0]
+        end_i = end[1] * w + end[0]
+        expanded = []
+        if not self.walkable[start_i] or not self.walkable[end_i]:
+            return None, expanded
+        if start_i == end_i:
+            return [start_i], expanded
+
+        # tiles inside corridors are connected with nodes on both corridor ends
+        if end_i in self.node_id:
+            goal_links = {self.node_id[end_i]: (0, None)}
+        else:
+            goal_links = {}  # node -> (distance to end, first step from end)
+            for step in self.neighbours(end_i):
+                n_i, length = self.follow(end_i, step)
+                if n_i in self.node_id:  # both corridor ends can reach the same node, keep shorter one
+                    k = self.node_id[n_i]
+                    if length < goal_links.get(k, (math.inf, None))[0]:
+                        goal_links[k] = (length, step)
+
+        best = math.inf
+        best_node = None  # node before end, None - end reached directly from start
+        g_score = {}
+        parent = {}  # node -> (previous node or None for start, first step)
+        open_n = []
+        generated = peak_open = reopened = evaluations = 0
+
+        def f_h(k):
+            nonlocal evaluations
+            evaluations += 1
+            i = self.nodes[k]
+            return heuristic(h_type, i % w, i // w, end, self.h, w, landmarks)
+
+        if start_i in self.node_id:
+            k = self.node_id[start_i]
+            g_score[k] = 0
+            parent[k] = (None, None)
+            heappush(open_n, (f_h(k), f_h(k), k))
+            generated = peak_open = 1
+        else:
+            for step in self.neighbours(start_i):
+                n_i, length = self.follow(start_i, step, end_i)
+                if n_i == end_i:  # end lies on the same corridor as start
+                    if length < best:
+                        best = length
+                        best_node = None
+                        best_step = step
+                elif n_i in self.node_id:
+                    k = self.node_id[n_i]
+                    if length < g_score.get(k, math.inf):
+                        g_score[k] = length
+                        parent[k] = (None, step)
+                        heappush(open_n, (length + f_h(k), f_h(k), k))
+                        generated += 1
+            peak_open = len(open_n)
+
+        closed = set()
+        while open_n:
+            f, _, k = heappop(open_n)
+            if f >= best:
+                break
+            if k in closed:  # outdated entry of already checked node
+                continue
+            closed.add(k)
+            expanded.append(self.nodes[k])
+            if k in goal_links and g_score[k] + goal_links[k][0] < best:
+                best = g_score[k] + goal_links[k][0]
+                best_node = k
+            for n_k, length, step in self.edges[k]:
+                f_c = g_score[k] + length
+                if n_k in closed or f_c >= g_score.get(n_k, math.inf):
+                    continue
+                if len(self.edges[n_k]) == 1 and n_k not in goal_links:  # dead end
+                    continue
+                if n_k in g_score:
+                    reopened += 1
+                g_score[n_k] = f_c
+                parent[n_k] = (k, step)
+                heappush(open_n, (f_c + f_h(n_k), f_h(n_k), n_k))
+                generated += 1
+                peak_open = max(peak_open, len(open_n))
+
+        if stats is not None:
+            stats.generated += generated
+            stats.peak_open = max(stats.peak_open, peak_open)
+            stats.reopened += reopened
+            stats.heuristic_evaluations += evaluations
+        if best == math.inf:
+            return None, expanded
+        if best_node is None:
+            return [start_i] + self.corridor(start_i, best_step,
+                                             end_i), expanded
+        return self.__rebuild(start_i, end_i, best_node, parent,
+                              goal_links), expanded
+
+    def __rebuild(self, start_i, end_i, k, parent, goal_links):
+        length, step = goal_links[k]
+        path = []
+        if step is not None:  # corridor from end back to last node
+            path.extend(self.corridor(end_i, step)[:-1])
+            path.reverse()
+            path.append(end_i)
+        tail = path
+        path = []
+        while k is not None:
+            previous, step = parent[k]
+            origin = self.nodes[previous] if previous is not None else start_i
+            tiles = self.corridor(origin, step) if step is not None else []
+            tiles.reverse()
+            path.extend(tiles)
+            k = previous
+        path.append(start_i)
+        path.reverse()
+        return path + tail
@@ -0,0 +1,437 @@
+import array, math, multiprocessing
+from collections import deque
+from heapq import heappush, heappop
+
+from .maze import TileType, plain_rows
+from .solver import heuristic, LANDMARKS
+
+UNREACHED = -1
+CLUSTER = 64  # default size of tiles
+LANDMARK_COUNT = 16  # landmarks of abstract graph used for landmark heuristic
+
+
+# walkable tiles of one cluster (x0, y0, width, height) with one tile margin around it,
+# margin keeps tiles of neighbouring clusters (or 0 outside of grid)
+def _cluster_block(walkable, grid_w, grid_h, x0, y0, width, height):
+    block = bytearray((width + 2) * (height + 2))
+    for y in range(max(y0 - 1, 0), min(y0 + height + 1, grid_h)):
+        x_from = max(x0 - 1, 0)
+        x_to = min(x0 + width + 1, grid_w)
+        start = (y - y0 + 1) * (width + 2) + (x_from - x0 + 1)
+        block[start:start + x_to - x_from] = walkable[y * grid_w + x_from:y *
+                                                      grid_w + x_to]
+    return block
+
+
+# bfs on block without leaving cluster, stops when target is reached
+def _bfs(inside, bw, source, target=None):
+    distances = array.array("i", [UNREACHED]) * len(inside)
+    distances[source] = 0
+    queue = deque([source])
+    while queue:
+        i = queue.popleft()
+        if i == target:
+            break
+        d = distances[i] + 1
+        for n_i in (i + 1, i - 1, i + bw, i - bw):
+            if inside[n_i] and distances[n_i] == UNREACHED:
+                distances[n_i] = d
+                queue.append(n_i)
+    return distances
+
+
+# finds transitions of one cluster (tiles with walkable neighbour in other cluster) and their links:
+# other transitions reachable inside cluster with distance and crossings to walkable neighbours in
+# other clusters (distance 1), links of k-th transition are targets/lengths[offsets[k]:offsets[k + 1]],
+# runs in pool workers
+def _preprocess_cluster(job):
+    block, x0, y0, width, height, grid_w = job
+    bw = width + 2
+    inside = bytearray(len(block))  # walkable tiles of cluster without margin
+    for ly in range(1, height + 1):
+        inside[ly * bw + 1:ly * bw + 1 + width] = block[ly * bw + 1:ly * bw +
+                                                        1 + width]
+    local = []  # block indexes of transitions
+    for ly in range(1, height + 1):
+        for lx in range(1, width + 1):
+            i = ly * bw + lx
+            if inside[i] and ((lx == 1 and block[i - 1]) or
+                              (lx == width and block[i + 1]) or
+                              (ly == 1 and block[i - bw]) or
+                              (ly == height and block[i + bw])):
+                local.append(i)
+    cells = [(y0 + i // bw - 1) * grid_w + x0 + i % bw - 1 for i in local]
+    offsets = array.array("i", [0])
+    targets = array.array("q")  # tile indexes
+    lengths = array.array("i")
+    for source, i in zip(local, cells):
+        reached = _bfs(inside, bw, source)
+        for target, n_i in zip(local, cells):
+            d = reached[target]
+            if d > 0:  # transitions of the same cluster
+                targets.append(n_i)
+                lengths.append(d)
+        lx = source % bw
+        ly = source // bw
+        for crossing, n_i in ((lx == width and block[source + 1], i + 1),
+                              (lx == 1 and block[source - 1], i - 1),
+                              (ly == height and block[source + bw],
+                               i + grid_w), (ly == 1 and block[source - bw],
+                                             i - grid_w)):
+            if crossing:  # walkable neighbour in next cluster
+                targets.append(n_i)
+                lengths.append(1)
+        offsets.append(len(targets))
+    return cells, (offsets, targets, lengths)
+
+
+# Hierarchical A* (HPA*): grid is split into cluster x cluster tiles, walkable tiles on tile borders
+# with walkable neighbour in next tile are transitions. Distances between transitions inside every
+# tile are precomputed (in parallel with process pool) as sparse links, so search runs on small abstract
+# graph (transitions connected inside tiles and across borders) and only tiles on found path are searched
+# again to get exact tiles. Every crossing is a transition, so found paths are shortest paths.
+# Wall changes received from Maze.set_wall/set_empty recompute only affected tiles.
+# Landmark heuristic uses distances between landmarks and transitions on abstract graph (built on
+# first such search). New walls only make paths longer, so these distances stay admissible and are
+# kept, removed walls make them outdated and they are computed again on next landmark search.
+class HierarchicalGraph:
+    def __init__(self,
+                 maze,
+                 cluster=CLUSTER,
+                 workers=None,
+                 landmarks=LANDMARK_COUNT):
+        self.maze = maze
+        data = plain_rows(maze.data)
+        self.h = len(data)  # height of maze
+        self.w = len(data[0])  # width of maze
+        self.cluster = cluster
+        self.cw = math.ceil(self.w / cluster)  # clusters in one row
+        self.ch = math.ceil(self.h / cluster)
+        self.walkable = bytearray(tile != TileType.WALL for row in data
+                                  for tile in row)
+        size = self.cw * self.ch
+        self.transitions = [None] * size  # cluster -> tile indexes of transitions
+        self.links_of = [None] * size  # cluster -> (offsets, targets, lengths) links of its transitions
+        self.position = {}  # transition tile index -> position in transitions of its cluster
+        self.dead_ends = set()  # transitions with one link (links are symmetric, so only way back)
+        self.dirty = set()  # clusters changed since last search
+        self.landmark_count = landmarks
+        self.landmarks = None  # tile indexes of landmarks, None - not computed or outdated
+        self.landmark_distances = [
+            None
+        ] * size  # cluster -> distances of its transitions to every landmark (-1 - unreachable)
+
+        jobs = (self.__job(c) for c in range(size))
+        if multiprocessing.current_process().daemon:  # pool workers can not start own pools
+            workers = 1
+        workers = workers or multiprocessing.cpu_count()
+        if workers == 1 or size == 1:
+            results = map(_preprocess_cluster, jobs)
+            self.__store_all(results)
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                self.__store_all(
+                    pool.imap(_preprocess_cluster, jobs,
+                              max(1, size // (4 * workers))))
+        maze.add_wall_listener(self.wall_changed)
+
+    def __bounds(self, c):  # x0, y0, width, height of cluster
+        x0 = c % self.cw * self.cluster
+        y0 = c // self.cw * self.cluster
+        return x0, y0, min(self.cluster, self.w - x0), min(self.cluster,
+                                                            self.h - y0)
+
+    def __job(self, c):
+        x0, y0, width, height = self.__bounds(c)
+        return (_cluster_block(self.walkable, self.w, self.h, x0, y0, width,
+                               height), x0, y0, width, height, self.w)
+
+    def __store_all(self, results):
+        for c, result in enumerate(results):
+            self.__store(c, result)
+
+    def __store(self, c, result):
+        cells, links = result
+        if self.landmarks is not None:  # transitions of cluster without new walkable tiles are subset of old ones
+            count = len(self.landmarks)
+            old = self.landmark_distances[c]
+            kept = array.array("i")
+            for i in cells:
+                k = self.position[i] * count
+                kept.extend(old[k:k + count])
+            self.landmark_distances[c] = kept
+        if self.transitions[c] is not None:
+            for i in self.transitions[c]:
+                del self.position[i]
+                self.dead_ends.discard(i)
+        self.transitions[c] = cells
+        self.links_of[c] = links
+        offsets = links[0]
+        for k, i in enumerate(cells):
+            self.position[i] = k
+            if offsets[k + 1] - offsets[k] == 1:
+                self.dead_ends.add(i)
+
+    def cluster_of(self, i):
+        return (i // self.w) // self.cluster * self.cw + (
+            i % self.w) // self.cluster
+
+    def close(self):  # stop receiving wall changes
+        self.maze.remove_wall_listener(self.wall_changed)
+
+    def wall_changed(self, x, y, is_wall):
+        i = y * self.w + x
+        self.walkable[i] = not is_wall
+        if not is_wall:  # paths can be shorter now
+            self.landmarks = None
+        for n_x, n_y in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= n_x < self.w and 0 <= n_y < self.h:  # neighbours in next clusters can become transitions
+                self.dirty.add(self.cluster_of(n_y * self.w + n_x))
+
+    def update(self):  # recomputes clusters changed since last update
+        for c in sorted(self.dirty):
+            self.__store(c, _preprocess_cluster(self.__job(c)))
+        self.dirty = set()
+
+    def links(self, i):  # (transition, distance) pairs reachable from transition in one step
+        offsets, targets, lengths = self.links_of[self.cluster_of(i)]
+        k = self.position[i]
+        return zip(targets[offsets[k]:offsets[k + 1]],
+                   lengths[offsets[k]:offsets[k + 1]])
+
+    def __dijkstra(self, source):  # distances from transition to every reachable transition
+        distances = {source: 0}
+        open_n = [(0, source)]
+        while open_n:
+            d, i = heappop(open_n)
+            if d > distances[i]:
+                continue
+            for n_i, length in self.links(i):
+                if d + length < distances.get(n_i, math.inf):
+                    distances[n_i] = d + length
+                    heappush(open_n, (d + length, n_i))
+        return distances
+
+    # landmarks chosen one by one as transitions farthest from already chosen ones (as in landmarks.Landmarks)
+    def update_landmarks(self):
+        self.update()
+        first = next((cells[0] for cells in self.transitions if cells), None)
+        landmarks = []
+        count = self.landmark_count
+        tables = [array.array("i", [UNREACHED]) * (len(cells) * count)
+                  for cells in self.transitions]  # written right away, only one distance dict is kept
+        if first is not None:
+            nearest = self.__dijkstra(first)  # distance to closest landmark, first from any transition
+            for l in range(count):
+                landmark = max(nearest, key=nearest.__getitem__)
+                if nearest[landmark] <= 0:  # every reachable transition is a landmark already
+                    break
+                distances = self.__dijkstra(landmark)
+                landmarks.append(landmark)
+                for i, d in distances.items():
+                    tables[self.cluster_of(i)][self.position[i] * count + l] = d
+                    if d < nearest[i]:
+                        nearest[i] = d
+        if len(landmarks) < count:  # rows of found landmarks only
+            found = len(landmarks)
+            tables = [array.array("i", [table[k + l]
+                                        for k in range(0, len(table), count)
+                                        for l in range(found)])
+                      for table in tables]
+        self.landmark_distances = tables
+        self.landmarks = landmarks
+
+    # lower bounds of distances from transitions to end, uses exact distances from landmarks to end:
+    # path from landmark to end enters end cluster through one of transitions or stays inside it
+    def __landmark_heuristic(self, end_i, goal, to_end, end_frame):
+        count = len(self.landmarks)
+        end_c = self.cluster_of(end_i)
+        targets = []
+        for l, landmark in enumerate(self.landmarks):
+            best = math.inf
+            for i, d in goal.items():
+                d_l = self.landmark_distances[end_c][self.position[i] * count + l]
+                if d_l != UNREACHED and d_l + d < best:
+                    best = d_l + d
+            if self.cluster_of(landmark) == end_c:
+                d = to_end[self.__to_block(landmark, end_frame)]
+                if d != UNREACHED and d < best:
+                    best = d
+            targets.append(best)
+
+        def estimate(i):
+            row = self.position[i] * count
+            distances = self.landmark_distances[self.cluster_of(i)]
+            best = 0
+            for l, t in enumerate(targets):
+                d = distances[row + l]
+                if d == UNREACHED or t == math.inf:
+                    continue
+                d -= t
+                if d < 0:
+                    d = -d
+                if d > best:
+                    best = d
+            return best
+
+        return estimate
+
+    def __local_bfs(self, i, target=None):  # bfs from tile inside its cluster
+        c = self.cluster_of(i)
+        x0, y0, width, height = self.__bounds(c)
+        block = _cluster_block(self.walkable, self.w, self.h, x0, y0, width,
+                               height)
+        bw = width + 2
+        inside = bytearray(len(block))
+        for ly in range(1, height + 1):
+            inside[ly * bw + 1:ly * bw + 1 + width] = block[ly * bw + 1:ly *
+                                                            bw + 1 + width]
+        frame = (x0, y0, bw)
+        if target is not None:
+            target = self.__to_block(target, frame)
+        return _bfs(inside, bw, self.__to_block(i, frame), target), frame
+
+    def __to_block(self, i, frame):
+        x0, y0, bw = frame
+        return (i // self.w - y0 + 1) * bw + i % self.w - x0 + 1
+
+    def __from_block(self, b, frame):
+        x0, y0, bw = frame
+        return (y0 + b // bw - 1) * self.w + x0 + b % bw - 1
+
+    # A* on abstract graph, counters are added to stats (solver.SearchStats) if given,
+    # returns indexes of path tiles (None if there is no path) and tile indexes of expanded transitions
+    def search(self, start, end, h_type=0, stats=None, landmarks=None):
+        self.update()
+        w = self.w
+        start_i = start[1] * w + start[0]
+        end_i = end[1] * w + end[0]
+        expanded = []
+        if not self.walkable[start_i] or not self.walkable[end_i]:
+            return None, expanded
+        if start_i == end_i:
+            return [start_i], expanded
+        start_c = self.cluster_of(start_i)
+        end_c = self.cluster_of(end_i)
+        from_start, start_frame = self.__local_bfs(start_i)
+        to_end, end_frame = self.__local_bfs(end_i)
+
+        best = math.inf
+        best_node = None  # transition before end, None - end reached inside start cluster
+        if start_c == end_c:
+            d = from_start[self.__to_block(end_i, start_frame)]
+            if d != UNREACHED:
+                best = d
+        goal = {}  # transition of end cluster -> distance to end
+        for i in self.transitions[end_c]:
+            d = to_end[self.__to_block(i, end_frame)]
+            if d != UNREACHED:
+                goal[i] = d
+
+        g_score = {}
+        parent = {}  # transition -> previous transition, None for start
+        open_n = []
+        generated = peak_open = reopened = evaluations = 0
+
+        if h_type == LANDMARKS and landmarks is None:  # landmarks of abstract graph
+            if self.landmarks is None:
+                self.update_landmarks()
+            estimate = self.__landmark_heuristic(end_i, goal, to_end,
+                                                 end_frame)
+        else:
+            estimate = lambda i: heuristic(h_type, i % w, i // w, end, self.h,
+                                           w, landmarks)
+
+        def f_h(i):
+            nonlocal evaluations
+            evaluations += 1
+            return estimate(i)
+
+        for i in self.transitions[start_c]:
+            d = from_start[self.__to_block(i, start_frame)]
+            if d != UNREACHED:
+                g_score[i] = d
+                parent[i] = None
+                h = f_h(i)
+                heappush(open_n, (d + h, h, i))
+                generated += 1
+        peak_open = len(open_n)
+
+        closed = set()
+        links_of = self.links_of
+        position = self.position
+        cluster = self.cluster
+        cw = self.cw
+        dead_ends = self.dead_ends
+        while open_n:
+            f, _, i = heappop(open_n)
+            if f >= best:
+                break
+            if i in closed:  # outdated entry of already checked transition
+                continue
+            closed.add(i)
+            expanded.append(i)
+            g = g_score[i]
+            if i in goal and g + goal[i] < best:
+                best = g + goal[i]
+                best_node = i
+            offsets, targets, lengths = links_of[(i // w) // cluster * cw +
+                                                 (i % w) // cluster]  # self.links inlined
+            k = position[i]
+            first = offsets[k]
+            last = offsets[k + 1]
+            for n_i, d in zip(targets[first:last], lengths[first:last]):
+                f_c = g + d
+                if n_i in closed or f_c >= g_score.get(n_i, math.inf):
+                    continue
+                if n_i in dead_ends and n_i not in goal:
+                    continue
+                if n_i in g_score:
+                    reopened += 1
+                g_score[n_i] = f_c
+                parent[n_i] = i
+                h = f_h(n_i)
+                heappush(open_n, (f_c + h, h, n_i))
+                generated += 1
+            peak_open = max(peak_open, len(open_n))
+
+        if stats is not None:
+            stats.generated += generated
+            stats.peak_open = max(stats.peak_open, peak_open)
+            stats.reopened += reopened
+            stats.heuristic_evaluations += evaluations
+        if best == math.inf:
+            return None, expanded
+        if best_node is None:
+            return self.__refine(start_i, end_i), expanded
+        nodes = [end_i]
+        i = best_node
+        while i is not None:
+            nodes.append(i)
+            i = parent[i]
+        nodes.append(start_i)
+        nodes.reverse()
+        path = [start_i]
+        for a, b in zip(nodes, nodes[1:]):
+            if a == b:  # start or end is a transition
+                continue
+            if self.cluster_of(a) != self.cluster_of(b):
+                path.append(b)
+            else:
+                path.extend(self.__refine(a, b)[1:])
+        return path, expanded
+
+    def __refine(self, a, b):  # shortest path between two tiles of the same cluster
+        distances, frame = self.__local_bfs(b, a)  # path is followed back from a by decreasing distances
+        k = self.__to_block(a, frame)
+        bw = frame[2]
+        path = [a]
+        d = distances[k]
+        while d:
+            d -= 1
+            for n_k in (k + 1, k - 1, k + bw, k - bw):
+                if distances[n_k] == d:
+                    k = n_k
+                    break
+            path.append(self.__from_block(k, frame))
+        return path
@@ -0,0 +1,146 @@
+from heapq import heappush, heappop
+
+from .maze import Maze, TileType, plain_rows
+from .solver import heuristic, LANDMARKS
+
+INF = float("inf")
+
+
+# Lifelong Planning A* (LPA*) between fixed start and end. Search state (g, rhs and open list)
+# is kept between calls of search(), wall changes are received from Maze.set_wall/set_empty
+# and only tiles affected by them are repaired on the next search.
+class IncrementalSolver:
+    def __init__(self, maze: Maze, start, end, heuristic_type=0):
+        self.maze = maze
+        data = plain_rows(maze.data)
+        self.h = len(data)  # height of maze
+        self.w = len(data[0])  # width of maze
+        self.start = start  # starting point coordinates (x,y)
+        self.end = end  # end point coordinates (x,y)
+        if heuristic_type == LANDMARKS:  # landmark distances are not valid after wall changes
+            raise ValueError("Landmark heuristic can not be used with changing walls")
+        self.h_type = heuristic_type  # choose which heuristic to use
+        self.walkable = bytearray(tile != TileType.WALL for row in data
+                                  for tile in row)
+
+        size = self.w * self.h
+        self.g = [INF] * size
+        self.rhs = [INF] * size
+        self.open_n = []  # heap of (k1, k2, index), outdated entries are skipped
+        self.open_keys = {}  # index -> current key of tiles in open list
+        self.start_i = start[1] * self.w + start[0]
+        self.end_i = end[1] * self.w + end[0]
+        self.rhs[self.start_i] = 0
+        self.__push(self.start_i)
+
+        self.changed = []  # tiles changed since last search
+        self.expanded = 0  # tiles expanded by last search
+        self.path = None
+        self.marked = []  # tiles marked as FINAL_PATH by mark_path
+        maze.add_wall_listener(self.wall_changed)
+
+    def close(self):  # stop receiving wall changes
+        self.maze.remove_wall_listener(self.wall_changed)
+
+    def wall_changed(self, x, y, is_wall):
+        i = y * self.w + x
+        self.walkable[i] = not is_wall
+        self.changed.append(i)
+
+    def __key(self, i):
+        m = min(self.g[i], self.rhs[i])
+        return (m + heuristic(self.h_type, i % self.w, i // self.w, self.end,
+                              self.h, self.w), m)
+
+    def __push(self, i):
+        key = self.__key(i)
+        self.open_keys[i] = key
+        heappush(self.open_n, (key[0], key[1], i))
+
+    def __adjacent(self, i):  # tiles next to tile inside grid, rows do not wrap
+        w = self.w
+        x = i % w
+        for n_i in (i + 1 if x + 1 < w else -1, i - 1 if x > 0 else -1, i + w,
+                    i - w):
+            if 0 <= n_i < len(self.walkable):
+                yield n_i
+
+    def __neighbours(self, i):
+        walkable = self.walkable
+        for n_i in self.__adjacent(i):
+            if walkable[n_i]:
+                yield n_i
+
+    def __update(self, i):
+        if i != self.start_i:
+            if self.walkable[i]:
+                self.rhs[i] = min((self.g[p] + 1 for p in self.__neighbours(i)),
+                                  default=INF)
+            else:
+                self.rhs[i] = INF
+        self.open_keys.pop(i, None)  # old heap entry becomes outdated
+        if self.g[i] != self.rhs[i]:
+            self.__push(i)
+
+    def __top_key(self):
+        open_n = self.open_n
+        while open_n and self.open_keys.get(open_n[0][2]) != open_n[0][:2]:
+            heappop(open_n)  # skip outdated entries
+        if not open_n:
+            return None
+        return open_n[0][:2]
+
+    def __compute_shortest_path(self):
+        g = self.g
+        rhs = self.rhs
+        end_i = self.end_i
+        while True:
+            top = self.__top_key()
+            if top is None or (top >= self.__key(end_i)
+                               and rhs[end_i] == g[end_i]):
+                break
+            i = heappop(self.open_n)[2]
+            del self.open_keys[i]
+            self.expanded += 1
+            if g[i] > rhs[i]:  # overconsistent - tile got better path
+                g[i] = rhs[i]
+                for n_i in self.__neighbours(i):
+                    self.__update(n_i)
+            else:  # underconsistent - path through tile got worse
+                g[i] = INF
+                self.__update(i)
+                for n_i in self.__neighbours(i):
+                    self.__update(n_i)
+
+    # repairs search after wall changes and returns path coordinates from start to end
+    def search(self):
+        self.expanded = 0
+        changed = self.changed
+        self.changed = []
+        for i in changed:
+            self.__update(i)
+            for n_i in self.__adjacent(i):
+                self.__update(n_i)
+        self.__compute_shortest_path()
+        self.path = self.__extract_path()
+        return self.path
+
+    def __extract_path(self):
+        if self.g[self.end_i] == INF:
+            return None
+        i = self.end_i
+        path = [i]
+        while i != self.start_i:
+            i = min(self.__neighbours(i), key=self.g.__getitem__)
+            path.append(i)
+        path.reverse()
+        return [(i % self.w, i // self.w) for i in path]
+
+    # writes current path as FINAL_PATH tiles, tiles of previous path are cleared
+    def mark_path(self):
+        for x, y in self.marked:
+            if self.maze.get_tile(x, y) == TileType.FINAL_PATH:
+                self.maze._set_tile(x, y, TileType.EMPTY)
+        self.marked = self.path or []
+        for x, y in self.marked:
+            self.maze.set_path(x, y)
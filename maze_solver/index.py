@@ -0,0 +1,116 @@
+from collections import deque
+
+from .maze import Maze, TileType, plain_rows
+
+
+# Distance oracle for perfect mazes (mazes made by Maze.generate are spanning trees, so there
+# is exactly one path between every two tiles). Walkable tiles are rooted in one tree, every tile
+# stores its depth, parent and one jump pointer (skew-binary jump pointers), which gives linear
+# time construction and O(log n) lowest common ancestor queries.
+class MazeIndex:
+    def __init__(self, maze: Maze, root=None):
+        self.maze = maze
+        data = plain_rows(maze.data)
+        self.h = len(data)  # height of maze
+        self.w = len(data[0])  # width of maze
+        if root is None:
+            root = (1, 1)
+        self.root = root
+
+        size = self.w * self.h
+        self.depth = [-1] * size  # -1 - wall or tile not connected with root
+        self.parent = [-1] * size
+        self.jump = [-1] * size
+
+        root_i = root[1] * self.w + root[0]
+        if data[root[1]][root[0]] == TileType.WALL:
+            raise ValueError("Root of maze index can not be a wall")
+        self.depth[root_i] = 0
+        self.parent[root_i] = root_i
+        self.jump[root_i] = root_i
+        queue = deque([root_i])
+        while queue:  # bfs visits parents before children, so jump pointers of parents are ready
+            i = queue.popleft()
+            x = i % self.w
+            y = i // self.w
+            for n_x, n_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if n_x < 0 or n_y < 0 or n_x >= self.w or n_y >= self.h or data[
+                        n_y][n_x] == TileType.WALL:
+                    continue
+                n_i = n_y * self.w + n_x
+                if self.depth[n_i] != -1:
+                    continue
+                self.depth[n_i] = self.depth[i] + 1
+                self.parent[n_i] = i
+                self.jump[n_i] = self.__jump_pointer(i)
+                queue.append(n_i)
+
+    def __jump_pointer(self, p):  # jump pointer of child of p
+        depth = self.depth
+        jump = self.jump
+        if depth[p] - depth[jump[p]] == depth[jump[p]] - depth[jump[jump[p]]]:
+            return jump[jump[p]]
+        return p
+
+    def __index(self, tile):
+        i = tile[1] * self.w + tile[0]
+        if self.depth[i] == -1:
+            raise ValueError("Tile " + str(tile) +
+                             " is a wall or is not connected with root")
+        return i
+
+    def __ancestor(self, i, depth):  # ancestor of i on given depth
+        while self.depth[i] > depth:
+            if self.depth[self.jump[i]] >= depth:
+                i = self.jump[i]
+            else:
+                i = self.parent[i]
+        return i
+
+    def __lca(self, i, j):  # lowest common ancestor of two tiles
+        if self.depth[i] > self.depth[j]:
+            i = self.__ancestor(i, self.depth[j])
+        else:
+            j = self.__ancestor(j, self.depth[i])
+        while i != j:
+            if self.jump[i] != self.jump[j]:
+                i = self.jump[i]
+                j = self.jump[j]
+            else:
+                i = self.parent[i]
+                j = self.parent[j]
+        return i
+
+    def lca(self, start, end):
+        i = self.__lca(self.__index(start), self.__index(end))
+        return i % self.w, i // self.w
+
+    # number of steps between two tiles
+    def distance(self, start, end):
+        i = self.__index(start)
+        j = self.__index(end)
+        return self.depth[i] + self.depth[j] - 2 * self.depth[self.__lca(i, j)]
+
+    # coordinates of path from start to end (both included)
+    def path(self, start, end):
+        i = self.__index(start)
+        j = self.__index(end)
+        lca = self.__lca(i, j)
+        first = []
+        while i != lca:
+            first.append(i)
+            i = self.parent[i]
+        second = []
+        while j != lca:
+            second.append(j)
+            j = self.parent[j]
+        first.append(lca)
+        first.extend(reversed(second))
+        return [(i % self.w, i // self.w) for i in first]
+
+    # writes path as FINAL_PATH tiles into maze
+    def mark_path(self, start, end):
+        path = self.path(start, end)
+        for x, y in path:
+            self.maze.set_path(x, y)
+        return path
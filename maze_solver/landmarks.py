@@ -0,0 +1,84 @@
+import array
+from collections import deque
+from timeit import default_timer as timer
+
+from .maze import TileType, plain_rows
+
+
+# Landmark (ALT) heuristic: BFS distances from a few landmark tiles are stored for every tile,
+# by triangle inequality |d(L, a) - d(L, b)| <= d(a, b) for every landmark L, so maximum over
+# landmarks is admissible and consistent lower bound of maze distance between a and b.
+# Landmarks are chosen one by one as tiles farthest from already chosen ones.
+class Landmarks:
+    def __init__(self, maze, count=8):
+        start = timer()
+        self.count = count  # requested number of landmarks
+        data = plain_rows(maze.data)
+        self.h = len(data)  # height of maze
+        self.w = len(data[0])  # width of maze
+        self.walkable = bytearray(tile != TileType.WALL for row in data
+                                  for tile in row)
+        self.landmarks = []  # tile indexes of landmarks
+        self.distances = []  # distance array of every landmark, -1 - wall or unreachable tile
+        self.targets = {}  # tile index -> distances of tile to every landmark
+
+        first = next((i for i in range(len(self.walkable))
+                      if self.walkable[i]), None)
+        if first is not None:
+            nearest = self.__bfs(first)  # distance to closest landmark, first from any walkable tile
+            for _ in range(count):
+                landmark = max(range(len(nearest)), key=nearest.__getitem__)
+                if nearest[landmark] <= 0:  # every reachable tile is a landmark already
+                    break
+                distances = self.__bfs(landmark)
+                self.landmarks.append(landmark)
+                self.distances.append(distances)
+                if len(self.landmarks) == 1:
+                    nearest = array.array("i", distances)
+                else:
+                    for i, d in enumerate(distances):
+                        if d < nearest[i]:
+                            nearest[i] = d
+        self.build_time = (timer() - start) * 1000  # [ms]
+
+    def __bfs(self, source):
+        w = self.w
+        walkable = self.walkable
+        distances = array.array("i", [-1]) * len(walkable)
+        distances[source] = 0
+        queue = deque([source])
+        while queue:
+            i = queue.popleft()
+            d = distances[i] + 1
+            x = i % w
+            for n_i in (i + 1 if x + 1 < w else -1, i - 1 if x > 0 else -1,
+                        i + w, i - w):
+                if 0 <= n_i < len(walkable) and walkable[
+                        n_i] and distances[n_i] == -1:
+                    distances[n_i] = d
+                    queue.append(n_i)
+        return distances
+
+    def __target(self, i):  # distances of tile to landmarks, cached for repeated targets
+        target = self.targets.get(i)
+        if target is None:
+            target = tuple(distances[i] for distances in self.distances)
+            self.targets[i] = target
+        return target
+
+    # lower bound of maze distance between tile (x, y) and target (x, y)
+    def estimate(self, x, y, target):
+        i = y * self.w + x
+        best = 0
+        for distances, t in zip(
+                self.distances,
+                self.__target(target[1] * self.w + target[0])):
+            d = distances[i]
+            if d < 0 or t < 0:  # tile or target not connected with landmark
+                continue
+            d -= t
+            if d < 0:
+                d = -d
+            if d > best:
+                best = d
+        return best
@@ -0,0 +1,55 @@
+import numpy as np
+
+
+# BFS run on many same-sized mazes at once: walls (count x rows x cols, non zero - wall) are stacked
+# and wavefronts of all mazes are advanced together with array shifts and masks.
+# Mazes which reached end are dropped from the stack, so remaining steps work on smaller arrays.
+# Returns per maze number of path tiles (start and end included, -1 if end is not reachable) and
+# number of visited tiles (tiles reached up to the level of end, all reachable tiles if end is not
+# reachable). start and end are (x, y) shared by all mazes.
+def lockstep_bfs(walls, start, end):
+    walls = np.asarray(walls) != 0
+    count = walls.shape[0]
+    lengths = np.full(count, -1, dtype=np.int64)
+    visited = np.zeros(count, dtype=np.int64)
+    s_x, s_y = start
+    e_x, e_y = end
+
+    free = ~walls  # walkable tiles which were not reached yet
+    frontier = np.zeros_like(free)
+    frontier[:, s_y, s_x] = free[:, s_y, s_x]
+    free[:, s_y, s_x] = False
+    walkable = (~walls).sum(axis=(1, 2))  # walkable tiles of every maze
+    active = np.arange(count)  # mazes still in the stack
+    grown = np.empty_like(frontier)
+    step = 1
+    while len(active):
+        done = frontier[:, e_y, e_x]
+        if done.any():
+            ids = active[done]
+            lengths[ids] = step
+            visited[ids] = walkable[ids] - free[done].sum(axis=(1, 2))
+        stuck = ~frontier.any(axis=(1, 2))  # nothing left to expand, end is not reachable
+        if stuck.any():
+            ids = active[stuck]
+            visited[ids] = walkable[ids] - free[stuck].sum(axis=(1, 2))
+        finished = done | stuck
+        if finished.any():
+            keep = ~finished
+            active = active[keep]
+            free = free[keep]
+            frontier = frontier[keep]
+            grown = np.empty_like(frontier)
+            if not len(active):
+                break
+
+        grown[:] = False
+        grown[:, 1:, :] |= frontier[:, :-1, :]
+        grown[:, :-1, :] |= frontier[:, 1:, :]
+        grown[:, :, 1:] |= frontier[:, :, :-1]
+        grown[:, :, :-1] |= frontier[:, :, 1:]
+        grown &= free
+        free ^= grown  # grown tiles are reached now
+        frontier, grown = grown, frontier
+        step += 1
+    return lengths, visited
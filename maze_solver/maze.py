@@ -1,13 +1,28 @@
-import enum, time, math, random, sys
-from os import environ
+import enum, random
 from collections import Counter
+from timeit import default_timer as timer
 
-from anytree import AnyNode
+import __future__
 
-environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
-import pygame
+np = None  # numpy is optional and imported only for numpy grid backend
+
+
+def _import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError("numpy is required for numpy grid backend")
+        np = numpy
+
+
+# rows of grid which are fast to index with data[y][x] (numpy arrays are converted to lists)
+def plain_rows(data):
+    if np is not None and isinstance(data, np.ndarray):
+        return data.tolist()
+    return data
 
-import __future__
 
 # Randomized Kruskal's algorithm implementation
 
@@ -20,20 +35,45 @@ class TileType(enum.IntEnum):
     FINAL_PATH = 4
 
 
+TILE_CHARS = " X.?+"  # text representation of tiles indexed by tile type, "?" for unknown tiles
+
+
 class Maze:
-    def __init__(self, width, height, visualisation=False, init=True):
+    # list - list of lists of ints, numpy - uint8 ndarray,
+    # lazy - walls read on demand from maze file (see Maze.open) with sparse overlay of changes
+    BACKENDS = ("list", "numpy", "lazy")
+
+    def __init__(self,
+                 width,
+                 height,
+                 visualisation=False,
+                 init=True,
+                 backend="list",
+                 visual_options=None):
+        if backend not in self.BACKENDS:
+            raise ValueError("Unknown grid backend: " + str(backend))
+        if backend in ("numpy", "lazy"):
+            _import_numpy()
+        self.backend = backend
         self.h = int(
             height / 2
         )  # size of walkable tiles is two times smaller, because of edge spacing
         self.w = int(width / 2)
+        self.visual = None
+        self.visual_options = visual_options or {
+        }  # MazeVisualizer arguments, e.g. fps and speed
         if visualisation:
-            self.visual = MazeVisualizer(height + 1, width + 1)
-        else:
-            self.visual = None
-
-        self.nodes = self.__create_nodes(
-        )  # generate tree nodes for every walkable tile
-        self.edges = self.__create_edges()  # generate edges of nodes
+            self._attach_visualizer(height + 1, width + 1)
+
+        self.wall_listeners = [
+        ]  # callbacks (x, y, is_wall) called when set_wall/set_empty changes a wall
+        self._junction_graph = None  # cached JunctionGraph, dropped when walls change
+        self._landmarks = None  # cached Landmarks, dropped when walls change
+        self._hierarchy = None  # cached HierarchicalGraph, updated (not dropped) when walls change
+        self._nodes = None  # tree nodes and edges are built only on demand
+        self._edges = None
+        self.generation_time = 0  # time of last generate() [ms]
+        self.trace = None  # SearchTrace recording tile writes, see start_trace
         if init:
             self.generate()  # generate maze data
         else:
@@ -41,24 +81,61 @@ class Maze:
 
         self.current_tile = None
 
+    # builds maze from 2D array of walls (non zero - wall) without generating it
+    @classmethod
+    def from_walls(cls, walls, backend="list"):
+        if backend == "lazy":  # lazy grid is backed by a maze file
+            raise ValueError("lazy backend can only open .maze files")
+        maze = cls(len(walls[0]) - 1,
+                   len(walls) - 1,
+                   init=False,
+                   backend=backend)
+        if backend == "numpy":
+            maze.data = (np.asarray(walls) != 0).astype(np.uint8)
+        else:
+            if hasattr(walls, "tolist"):  # numpy array
+                walls = walls.tolist()
+            maze.data = [[TileType.WALL if tile else TileType.EMPTY
+                          for tile in row] for row in walls]
+        return maze
+
+    # opens maze file written by stream.write_maze_file without loading it into memory
+    @classmethod
+    def open(cls, path):
+        from .stream import MazeFile, LazyGrid
+        walls = MazeFile(path)
+        maze = cls(walls.cols - 1, walls.rows - 1, init=False, backend="lazy")
+        maze.data = LazyGrid(walls.rows, walls.cols, walls)
+        return maze
+
     def __str__(self):
-        result = ""
-        for y in range(len(self.data)):
-            for x in range(len(self.data[0])):
-                if self.data[y][x] == TileType.WALL:
-                    result += "X"
-                elif self.data[y][x] == TileType.EMPTY:
-                    result += " "
-                elif self.data[y][x] == TileType.CHECKED:
-                    result += "."
-                elif self.data[y][x] == TileType.FINAL_PATH:
-                    result += "+"
-                else:
-                    result += "?"
-            result += "\n"
-        return result
+        if self.backend == "numpy":
+            lookup = np.full(256, ord("?"), dtype=np.uint8)
+            lookup[:len(TILE_CHARS)] = np.frombuffer(TILE_CHARS.encode(),
+                                                     dtype=np.uint8)
+            rows = np.empty((self.data.shape[0], self.data.shape[1] + 1),
+                            dtype=np.uint8)
+            rows[:, :-1] = lookup[self.data]
+            rows[:, -1] = ord("\n")
+            return rows.tobytes().decode()
+        lookup = TILE_CHARS.__getitem__
+        return "".join("".join(map(lookup, row)) + "\n" for row in self.data)
+
+    @property
+    def nodes(self):
+        if self._nodes is None:
+            self._nodes = self.__create_nodes(
+            )  # generate tree nodes for every walkable tile
+        return self._nodes
+
+    @property
+    def edges(self):
+        if self._edges is None:
+            self._edges = self.__create_edges()  # generate edges of nodes
+        return self._edges
 
     def __create_nodes(self):
+        from anytree import AnyNode  # only this tree needs anytree
         nodes = []
         for i in range(self.h):
             for j in range(self.w):
@@ -82,58 +159,200 @@ class Maze:
 
     # maze generation
     def generate(self):
+        start = timer()
         self.__zero()
 
-        edges_temp = self.edges.copy(
-        )  # copy edge list - edges are popped from list so we have to copy it to have it saved
+        # edges are encoded as 2 * id + direction (0 - right neighbour, 1 - lower neighbour)
+        # in the same order as in __create_edges, so shuffling gives the same layout for a given seed
+        edges_temp = [
+            2 * (i * self.w + j) + d for i in range(self.h)
+            for j in range(self.w) for d in (0, 1)
+            if (d == 0 and j != self.w - 1) or (d == 1 and i != self.h - 1)
+        ]
         random.shuffle(edges_temp)
-        while (edges_temp):
-
-            id_1 = edges_temp[-1][0]  # id of first node
-            id_2 = edges_temp[-1][1]  # id of second node
-            node_1 = next(x for x in self.nodes
-                          if x.id == id_1)  # search for first node variable
-            node_2 = next(x for x in self.nodes
-                          if x.id == id_2)  # search for second node variable
-
-            if not node_1.is_root:
-                node_1 = node_1.ancestors[0]  # root of first node
-            if not node_2.is_root:
-                node_2 = node_2.ancestors[0]  # root of second node
-            if node_1.id == node_2.id:  # check if nodes are in same tree
+        sets = DisjointSet(self.w * self.h)
+        # without anything watching tile writes numpy walls are written at once after the loop
+        batched = (self.backend == "numpy" and self.visual is None
+                   and self.trace is None and not self.wall_listeners)
+        walls = []  # edges between connected nodes, used when batched
+        for edge in reversed(edges_temp):  # edges were popped from the end
+            id_1 = edge >> 1  # id of first node
+            id_2 = id_1 + self.w if edge & 1 else id_1 + 1  # id of second node
+            if not sets.union(id_1,
+                              id_2):  # check if nodes are in same tree
+                if batched:
+                    walls.append(edge)
+                    continue
                 x, y = self.__get_cords(id_1, id_2)
                 self.set_wall(x + 1, y +
                               1)  # nodes are connected, so we save this edge
-            else:  # nodes are not connected, because we assigned 0 values before we do not change any maze value
-                temp = list(node_1.children)  # save first node children
-                temp.append(node_2)  # add second node as first node's child
-                node_1.children = temp
-            edges_temp.pop()  # remove checked edge
-
-        for i in range(2 * self.h + 1):  # fill bouding box and corners
-            for j in range(2 * self.w + 1):
-                if i == 0 or i == 2 * self.h or j == 0 or j == 2 * self.w or (
-                        i % 2 == 0 and j % 2 == 0):
+            # nodes were not connected, because we assigned 0 values before we do not change any maze value
+        if walls:
+            walls = np.array(walls, dtype=np.int64)
+            ids = walls >> 1
+            down = walls & 1  # the same coordinates as __get_cords gives, shifted by border
+            self.data[2 * (ids // self.w) + 1 + down,
+                      2 * (ids % self.w) + 2 - down] = TileType.WALL
+
+        self.__fill_border()
+        self.generation_time = (timer() - start) * 1000
+
+    def __fill_border(self):  # fill bouding box and corners
+        if self.visual is None and self.backend != "lazy":  # without visualisation whole rows are filled at once
+            if self.backend == "numpy":
+                self.data[[0, -1], :] = TileType.WALL
+                self.data[:, [0, -1]] = TileType.WALL
+                self.data[::2, ::2] = TileType.WALL
+            else:
+                self.data[0][:] = [TileType.WALL] * len(self.data[0])
+                self.data[-1][:] = [TileType.WALL] * len(self.data[-1])
+                for row in self.data:
+                    row[0] = row[-1] = TileType.WALL
+                for row in self.data[::2]:
+                    row[::2] = [TileType.WALL] * len(row[::2])
+            return
+        height = 2 * self.h + 1
+        width = 2 * self.w + 1
+        for i in range(0, height, 2):
+            if i == 0 or i == height - 1:
+                for j in range(width):
+                    self.set_wall(j, i)
+            else:
+                self.set_wall(0, i)
+                for j in range(2, width, 2):
                     self.set_wall(j, i)
+                self.set_wall(width - 1, i)
+        for i in range(1, height, 2):
+            self.set_wall(0, i)
+            self.set_wall(width - 1, i)
 
     def _fill_zeroes(self):
-        self.data = [[0] * (2 * self.w + 1) for x in range(2 * self.h + 1)
-                     ]  # generate maze array with zeros
+        self.__drop_graphs()  # new grid is not announced to wall listeners
+        if self.backend == "lazy":
+            from .stream import LazyGrid
+            self.data = LazyGrid(2 * self.h + 1, 2 * self.w + 1)
+        elif self.backend == "numpy":
+            self.data = np.zeros((2 * self.h + 1, 2 * self.w + 1),
+                                 dtype=np.uint8)
+        else:
+            self.data = [[0] * (2 * self.w + 1) for x in range(2 * self.h + 1)
+                         ]  # generate maze array with zeros
 
+    # headless tile write, replaced by _set_tile_visual when visualizer is attached
     def _set_tile(self, x, y, type: TileType):
         self.data[y][x] = type
-        if self.visual is not None:
-            self.visual.draw_cell(x, y, self.visual.TILE_COLORS.get(type),
-                                  0.01)
+
+    def _set_tile_visual(self, x, y, type: TileType):
+        self.data[y][x] = type
+        self.visual.draw_cell_batched(x, y, self.visual.TILE_COLORS.get(type))
+
+    def _set_tile_traced(self, x, y, type: TileType):
+        if self.visual is None:
+            self.data[y][x] = type
+        else:
+            self._untraced_set_tile(x, y, type)
+        trace = self.trace  # SearchTrace.record inlined, it is called for every tile write
+        if trace.count == len(trace.types):
+            trace.record(x, y, type)
+            return
+        trace.cells[trace.count] = y * trace.cols + x
+        trace.types[trace.count] = type
+        trace.count += 1
+
+    # records every following tile write (with or without visualisation) until stop_trace
+    def start_trace(self, capacity=1 << 16):
+        from .trace import SearchTrace
+        if self.trace is None:
+            self._untraced_set_tile = self._set_tile
+            self._set_tile = self._set_tile_traced
+        self.trace = SearchTrace.from_maze(self, capacity)
+        return self.trace
+
+    def stop_trace(self):
+        trace = self.trace
+        if trace is not None:
+            self._set_tile = self._untraced_set_tile
+            self.trace = None
+        return trace
+
+    def _attach_visualizer(self, n, m):
+        from .visualizer import MazeVisualizer  # pygame is imported only when visualisation is requested
+        self.visual = MazeVisualizer(n, m, **self.visual_options)
+        if self.trace is not None:  # traced writes go on to visualizer, trace keeps recording
+            self._untraced_set_tile = self._set_tile_visual
+        else:
+            self._set_tile = self._set_tile_visual
 
     def get_tile(self, x, y) -> TileType:
         return self.data[y][x]
 
     def set_wall(self, x, y):
+        changed = self.wall_listeners and self.data[y][x] != TileType.WALL
         self._set_tile(x, y, TileType.WALL)
+        if changed:
+            self.__notify_wall(x, y, True)
 
     def set_empty(self, x, y):
+        changed = self.wall_listeners and self.data[y][x] == TileType.WALL
         self._set_tile(x, y, TileType.EMPTY)
+        if changed:
+            self.__notify_wall(x, y, False)
+
+    def add_wall_listener(self, callback):
+        self.wall_listeners.append(callback)
+
+    def remove_wall_listener(self, callback):
+        self.wall_listeners.remove(callback)
+
+    # maze contracted to graph of junctions, built once and reused until walls change
+    def junction_graph(self):
+        if self._junction_graph is None:
+            from .graph import JunctionGraph
+            self._junction_graph = JunctionGraph(self)
+            self.add_wall_listener(self.__drop_junction_graph)
+        return self._junction_graph
+
+    def __drop_junction_graph(self, x, y, is_wall):
+        self._junction_graph = None
+        self.remove_wall_listener(self.__drop_junction_graph)
+
+    # landmark distances for ALT heuristic, computed once and reused until walls change
+    def landmarks(self, count=8):
+        if self._landmarks is None or self._landmarks.count != count:
+            from .landmarks import Landmarks
+            if self._landmarks is None:
+                self.add_wall_listener(self.__drop_landmarks)
+            self._landmarks = Landmarks(self, count)
+        return self._landmarks
+
+    def __drop_landmarks(self, x, y, is_wall):
+        self._landmarks = None
+        self.remove_wall_listener(self.__drop_landmarks)
+
+    def __drop_graphs(self):  # cached graphs of replaced grid
+        if self._junction_graph is not None:
+            self.__drop_junction_graph(0, 0, True)
+        if self._landmarks is not None:
+            self.__drop_landmarks(0, 0, True)
+        if self._hierarchy is not None:
+            self._hierarchy.close()
+            self._hierarchy = None
+
+    # tiled graph for hierarchical search, built once, changed tiles are recomputed on next search,
+    # cached graph is reused when cluster size is not given
+    def hierarchical_graph(self, cluster=None, workers=None):
+        if self._hierarchy is None or cluster not in (
+                None, self._hierarchy.cluster):
+            from .hierarchy import HierarchicalGraph, CLUSTER
+            if self._hierarchy is not None:
+                self._hierarchy.close()
+            self._hierarchy = HierarchicalGraph(self, cluster or CLUSTER,
+                                                workers)
+        return self._hierarchy
+
+    def __notify_wall(self, x, y, is_wall):
+        for callback in list(self.wall_listeners):
+            callback(x, y, is_wall)
 
     def set_checked(self, x, y):
         self._set_tile(x, y, TileType.CHECKED)
@@ -159,91 +378,85 @@ class Maze:
         return x, y
 
     def show(self):
-        if self.visual is not None:
-            self.visual.show(self.data)
-        else:
-            self.visual = MazeVisualizer(2 * self.h + 1, 2 * self.w + 1)
-            self.visual.show(self.data)
+        if self.visual is None:
+            self._attach_visualizer(2 * self.h + 1, 2 * self.w + 1)
+        self.visual.show(self.data)
 
     def __zero(self):
         self._fill_zeroes()
-        for i in range(self.h):
-            for j in range(self.w):
-                self.nodes[i * self.w + j].parent = None
+        if self._nodes is not None:
+            for node in self._nodes:
+                node.parent = None
 
     # restarts labirynth state (useful for trying different solvers)
     def restart(self):
-        for y in range(self.h):
-            for x in range(self.w):
-                self.nodes[x * self.w + y].parent = None
-                if self.data[y][x] != TileType.WALL:
-                    self.data[y][x] = TileType.EMPTY
+        self.reset_tiles([
+            TileType.CHECKED, TileType.CURRENT, TileType.FINAL_PATH
+        ])
+
+    # changes all tiles of given types to empty tiles
+    def reset_tiles(self, tile_types):
+        if self.backend == "lazy":
+            self.data.reset(tile_types)
+            return
+        if self.backend == "numpy":
+            self.data[np.isin(self.data, tile_types)] = TileType.EMPTY
+            return
+        tile_types = set(tile_types)
+        for row in self.data:
+            for x, tile in enumerate(row):
+                if tile in tile_types:
+                    row[x] = TileType.EMPTY
 
     def get_tiles_count(self, tile_type: TileType = TileType.CHECKED):
-        l = [cell for row in self.data for cell in row]
-        return Counter(l)[tile_type]
-
-
-class MazeVisualizer:
-    LIGHT_GRAY = (224, 224, 224)
-    BLACK = (0, 0, 0)
-    RED = (255, 0, 0)
-    GREEN = (0, 255, 0)
-    BLUE = (0, 0, 255)
-
-    WIDTH = 800
-    HEIGHT = 800
-
-    TILE_COLORS = {
-        TileType.WALL: BLACK,
-        TileType.CHECKED: GREEN,
-        TileType.CURRENT: RED,
-        TileType.FINAL_PATH: BLUE,
-    }
-
-    def __init__(self, n, m, title="maze"):
-        self.n = self.HEIGHT / n
-        self.m = self.WIDTH / m
-        if self.m < self.n:
-            self.n = self.m
-        self.padding = (self.HEIGHT - self.n * n) / 2
-        self.display = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
-        self.display.fill(self.LIGHT_GRAY)
-        pygame.display.set_caption(title)
-
-    def draw_cell(self, x, y, color=None, delay=0, update=True):
-        x = x * self.m
-        y = self.padding + (y * self.n)
-        w = self.m
-        h = self.n
-        if not w.is_integer():
-            w = math.ceil(w)
-        if not h.is_integer():
-            h = math.ceil(h)
-        if color is None:
-            color = self.LIGHT_GRAY
-        pygame.draw.rect(self.display, color, pygame.Rect(x, y, w, h))
-        if update:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-            pygame.display.update()
-        if delay != 0:
-            time.sleep(delay)
-
-    def show(self, data):
-        self.display.fill(self.LIGHT_GRAY)
-        for i in range(len(data)):
-            for j in range(len(data[i])):
-                self.draw_cell(j, i, self.TILE_COLORS.get(data[i][j]), 0,
-                               False)
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-            pygame.display.update()
-            keys = pygame.key.get_pressed()
-            if keys[pygame.K_SPACE]:
-                break
\ No newline at end of file
+        return self.get_tiles_counts()[tile_type]
+
+    # number of tiles of every type in one pass, indexed by tile type
+    def get_tiles_counts(self):
+        if self.backend == "lazy":
+            return self.data.counts()
+        if self.backend == "numpy":
+            return np.bincount(self.data.ravel(),
+                               minlength=len(TileType)).tolist()
+        counter = Counter()
+        for row in self.data:
+            counter.update(row)
+        return [counter[tile_type] for tile_type in TileType]
+
+
+# array-backed union-find with path compression and union by rank
+class DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.rank = [0] * size
+
+    def find(self, i):
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:  # path compression
+            parent[i], i = root, parent[i]
+        return root
+
+    # joins sets of both elements, returns False if they were already joined
+    def union(self, i, j):
+        root_i = self.find(i)
+        root_j = self.find(j)
+        if root_i == root_j:
+            return False
+        rank = self.rank
+        if rank[root_i] < rank[root_j]:
+            root_i, root_j = root_j, root_i
+        self.parent[root_j] = root_i
+        if rank[root_i] == rank[root_j]:
+            rank[root_i] += 1
+        return True
+
+
+def __getattr__(name):  # MazeVisualizer used to live in this module
+    if name == "MazeVisualizer":
+        from .visualizer import MazeVisualizer
+        return MazeVisualizer
+    raise AttributeError("module " + repr(__name__) + " has no attribute " +
+                         repr(name))
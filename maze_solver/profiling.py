@@ -0,0 +1,46 @@
+import cProfile, io, pstats, tracemalloc
+
+
+# Context manager used by Solver.search (and main.py around maze generation),
+# measurements of every entered block are added up until report() is called.
+# cprofile - function call statistics, tracemalloc - peak memory and biggest allocations
+class Profiler:
+    KINDS = ("cprofile", "tracemalloc")
+
+    def __init__(self, kind="cprofile", limit=15):
+        if kind not in self.KINDS:
+            raise ValueError("Unknown profiler: " + str(kind))
+        self.kind = kind
+        self.limit = limit  # number of lines in report
+        self.profile = cProfile.Profile() if kind == "cprofile" else None
+        self.peak = 0  # highest traced memory [B]
+        self.snapshot = None  # tracemalloc snapshot of last block
+
+    def __enter__(self):
+        if self.profile is not None:
+            self.profile.enable()
+        else:
+            tracemalloc.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profile is not None:
+            self.profile.disable()
+        else:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            self.snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        return False
+
+    def report(self):
+        if self.profile is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.profile,
+                         stream=stream).sort_stats("cumulative").print_stats(
+                             self.limit)
+            return stream.getvalue()
+        lines = ["Peak traced memory: %.1f KiB" % (self.peak / 1024)]
+        if self.snapshot is not None:
+            for stat in self.snapshot.statistics("lineno")[:self.limit]:
+                lines.append(str(stat))
+        return "\n".join(lines)
@@ -0,0 +1,272 @@
+import random, multiprocessing
+from collections import namedtuple
+from timeit import default_timer as timer
+
+from .maze import Maze, TileType
+from .solver import Solver
+
+# single benchmark run: maze size, iteration number, heuristic and seed used to generate maze,
+# with corpus (path to corpus file) maze is loaded from corpus instead of being generated,
+# engine - Solver search engine or "genetic" for GeneticSolver (heuristic is not used then),
+# cache - folder of cache.MazeCache disk tier, mazes and A* results are reused from there,
+# count_tiles - tiles of searched maze are counted on whole grid instead of derived (see search_tiles)
+Job = namedtuple("Job", [
+    "width", "height", "iteration", "heuristic", "seed", "corpus", "engine",
+    "cache", "count_tiles"
+],
+                 defaults=[None, "heap", None, False])
+# time [ms] measured around Solver.search, tiles - tile counts indexed by tile type,
+# expanded - tiles expanded by search (evaluated genomes for genetic), saved - expansions saved
+# compared with heap A*, generations_per_second and converged (first generation which reached end,
+# None if it was never reached) - only for genetic, stats - solver.SearchStats of A* search
+Result = namedtuple("Result", [
+    "job", "time", "tiles", "expanded", "saved", "generations_per_second",
+    "converged", "stats"
+],
+                    defaults=[0, None, None])
+GENETIC = "genetic"
+LOCKSTEP = "lockstep"  # engine of results made by BenchmarkRunner.run_lockstep
+
+
+# seed of a maze depends only on base seed, size and iteration, so every heuristic gets the same maze
+# and results do not depend on number of workers or order of jobs
+def derive_seed(seed, width, height, iteration):
+    return random.Random("%d:%dx%d:%d" %
+                         (seed, width, height, iteration)).getrandbits(64)
+
+
+def make_jobs(sizes,
+              iterations,
+              heuristics,
+              seed,
+              corpus=None,
+              engine="heap",
+              cache=None,
+              count_tiles=False):
+    return [
+        Job(width, height, i, heuristic, derive_seed(seed, width, height, i),
+            corpus, engine, cache, count_tiles) for heuristic in heuristics
+        for (width, height) in sizes for i in range(iterations)
+    ]
+
+
+_corpora = {}  # corpus files opened by this process
+
+
+def _open_corpus(path):
+    if path not in _corpora:
+        from .corpus import MazeCorpus
+        _corpora[path] = MazeCorpus(path)
+    return _corpora[path]
+
+
+_caches = {}  # caches opened by this process, every process keeps own memory tier
+
+
+def _open_cache(folder):
+    if folder not in _caches:
+        from .cache import MazeCache
+        _caches[folder] = MazeCache(folder=folder)
+    return _caches[folder]
+
+
+def run_job(job: Job) -> Result:
+    cache = _open_cache(job.cache) if job.cache is not None else None
+    if job.corpus is not None:
+        corpus = _open_corpus(job.corpus)
+        maze = corpus.maze(
+            corpus.find(job.width, job.height, job.iteration, job.seed))
+    elif cache is not None and job.engine != GENETIC:
+        maze = cache.maze(job.width, job.height, job.seed)
+    else:
+        random.seed(job.seed)
+        maze = Maze(job.width, job.height)
+    start_tile = (1, len(maze.data) - 2)
+    end_tile = (len(maze.data[0]) - 2, 1)
+    if job.engine == GENETIC:
+        return run_genetic(job, maze, start_tile, end_tile)
+    solver = Solver(maze,
+                    start_tile,
+                    end_tile,
+                    init=False,
+                    heuristic_type=job.heuristic,
+                    engine=job.engine)
+    if cache is not None:  # time and tiles of cached search are the ones measured first time
+        solution = cache.search(solver)
+        time = solution.time
+        tiles = solution.tiles
+    else:
+        start = timer()
+        solver.search()
+        time = (timer() - start) * 1000
+        tiles = maze.get_tiles_counts() if job.count_tiles else search_tiles(
+            maze, solver)
+
+    saved = 0
+    if job.engine != "heap":  # untimed reference search on the same maze
+        maze.restart()
+        reference = Solver(maze,
+                           solver.start,
+                           solver.end,
+                           init=cache is None,
+                           heuristic_type=job.heuristic)
+        if cache is not None:
+            cache.search(reference)
+        saved = reference.expanded - solver.expanded
+    return Result(job, time,
+                  tiles,
+                  solver.expanded,
+                  saved,
+                  stats=solver.stats)
+
+
+# tile counts after search without reading whole grid: generated mazes are perfect (2 * w * h - 1
+# walkable tiles) and expanded tiles which are not on path are counted as checked (current included),
+# for engines expanding graph nodes (corridor, junction, hierarchical) checked tiles are only estimate
+def search_tiles(maze, solver):
+    walkable = 2 * maze.w * maze.h - 1
+    path = len(solver.path) if solver.path is not None else 0
+    checked = min(max(solver.expanded - path, 0), walkable - path)
+    tiles = [0] * len(TileType)
+    tiles[TileType.EMPTY] = walkable - path - checked
+    tiles[TileType.WALL] = (2 * maze.w + 1) * (2 * maze.h + 1) - walkable
+    tiles[TileType.CHECKED] = checked
+    tiles[TileType.FINAL_PATH] = path
+    return tiles
+
+
+def run_genetic(job, maze, start_tile, end_tile):
+    from .genetic import GeneticSolver
+    # pool workers can not start their own processes, so islands are not used here
+    solver = GeneticSolver(maze, start_tile, end_tile, init=False, seed=job.seed)
+    start = timer()
+    solver.search()
+    end = timer()
+    return Result(job, (end - start) * 1000, maze.get_tiles_counts(),
+                  solver.expanded, 0, solver.generations_per_second,
+                  solver.converged)
+
+
+class BenchmarkRunner:
+    def __init__(self, workers=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.count = 0  # number of finished jobs
+        self.elapsed = 0  # wall time of all runs [s]
+
+    # yields results in order of jobs, so one collector can write them straight away
+    def run(self, jobs, chunksize=1):
+        start = timer()
+        try:
+            if self.workers == 1:
+                for result in map(run_job, jobs):
+                    self.count += 1
+                    yield result
+            else:
+                with multiprocessing.Pool(self.workers) as pool:
+                    for result in pool.imap(run_job, jobs, chunksize):
+                        self.count += 1
+                        yield result
+        finally:
+            self.elapsed += timer() - start
+
+    # jobs - {key: jobs in order of iterations}, jobs are run in rounds of round_size jobs of every key
+    # and keys for which stop(key) is true (checked before every round, e.g. when results yielded
+    # so far are precise enough) get no more rounds
+    def run_adaptive(self, jobs, stop, round_size=5):
+        start = timer()
+        pending = {key: list(key_jobs) for key, key_jobs in jobs.items()}
+        pool = multiprocessing.Pool(self.workers) if self.workers > 1 else None
+        try:
+            while pending:
+                batch = []
+                for key in list(pending):
+                    if stop(key):
+                        del pending[key]
+                        continue
+                    batch += pending[key][:round_size]
+                    del pending[key][:round_size]
+                    if not pending[key]:
+                        del pending[key]
+                if pool is None:
+                    results = map(run_job, batch)
+                else:
+                    results = pool.imap(run_job, batch)
+                for result in results:
+                    self.count += 1
+                    yield result
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            self.elapsed += timer() - start
+
+    # solves all iterations of every size with one lockstep BFS call (lockstep.lockstep_bfs) and
+    # yields results like run with heuristic 3 (BFS is A* without heuristic), mazes are the same
+    # as run generates, time is time of whole batch divided by number of mazes
+    def run_lockstep(self, sizes, iterations, seed, corpus=None):
+        import numpy as np
+        from .corpus import _generate_walls, grid_size
+        from .lockstep import lockstep_bfs
+
+        start = timer()
+        pool = None
+        try:
+            for width, height in sizes:
+                jobs = [
+                    Job(width, height, i, 3,
+                        derive_seed(seed, width, height, i), corpus,
+                        LOCKSTEP) for i in range(iterations)
+                ]
+                rows, cols = grid_size(width, height)
+                if corpus is not None:
+                    mazes = _open_corpus(corpus)
+                    walls = np.stack([
+                        mazes.walls(
+                            mazes.find(width, height, job.iteration, job.seed))
+                        for job in jobs
+                    ])
+                else:
+                    generation = [(width, height, job.seed) for job in jobs]
+                    if self.workers == 1:
+                        packed = list(map(_generate_walls, generation))
+                    else:
+                        if pool is None:
+                            pool = multiprocessing.Pool(self.workers)
+                        packed = pool.map(_generate_walls, generation)
+                    walls = np.stack([
+                        np.unpackbits(np.frombuffer(data, dtype=np.uint8),
+                                      count=rows * cols).reshape(rows, cols)
+                        for data in packed
+                    ])
+
+                begin = timer()
+                lengths, visited = lockstep_bfs(walls, (1, rows - 2),
+                                                (cols - 2, 1))
+                per_maze = (timer() - begin) * 1000 / iterations
+
+                wall_counts = walls.sum(axis=(1, 2))
+                for job, length, seen, wall_count in zip(
+                        jobs, lengths.tolist(), visited.tolist(),
+                        wall_counts.tolist()):
+                    path = max(length, 0)
+                    tiles = [0] * len(TileType)
+                    tiles[TileType.EMPTY] = rows * cols - wall_count - seen
+                    tiles[TileType.WALL] = wall_count
+                    tiles[TileType.CHECKED] = seen - path
+                    tiles[TileType.FINAL_PATH] = path
+                    self.count += 1
+                    yield Result(job, per_maze, tiles, seen, 0)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            self.elapsed += timer() - start
+
+    def throughput(self):  # mazes per second
+        if self.elapsed == 0:
+            return 0
+        return self.count / self.elapsed
+
+    def report(self):
+        return "%d mazes in %.2f s (%.2f mazes/s, %d workers)" % (
+            self.count, self.elapsed, self.throughput(), self.workers)
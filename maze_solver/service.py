@@ -0,0 +1,220 @@
+import asyncio, json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+import numpy as np
+
+from .batch import BatchSolver
+from .corpus import _generate_walls, grid_size
+from .maze import Maze
+
+# Protocol: one JSON object per line in both directions, requests are answered in any order
+# (responses carry request "id"), so one connection can keep many requests in flight.
+#   {"id": 1, "op": "generate", "width": 50, "height": 50, "seed": 1}
+#       -> {"id": 1, "maze": "50x50-1", "rows": 51, "cols": 51, "time": 12.3, "cached": false}
+#   {"id": 2, "op": "solve", "maze": "50x50-1", "start": [1, 49], "end": [49, 1], "path": true}
+#       -> {"id": 2, "length": 96, "path": [[1, 49], ...], "batch": 3}
+#   {"id": 3, "op": "stats"} -> counters of service
+# Errors are answered with {"id": ..., "error": message}.
+
+FIELDS_KEPT = 32  # BFS distance fields kept per maze between batches
+
+
+class ServiceError(Exception):
+    pass
+
+
+# checked before request joins a batch, one bad tile would fail whole batch
+def _tile(value, maze):
+    if not (isinstance(value, (list, tuple)) and len(value) == 2 and all(
+            isinstance(v, int) and not isinstance(v, bool) for v in value)):
+        raise ServiceError("tile must be [x, y] of integers: " +
+                           str(value))
+    x, y = value
+    if not (0 <= x < len(maze.data[0]) and 0 <= y < len(maze.data)):
+        raise ServiceError("tile outside of maze: " + str([x, y]))
+    return x, y
+
+
+class WarmMaze:
+    def __init__(self, maze):
+        self.maze = maze
+        self.solver = BatchSolver(maze)
+        self.pending = []  # (start, end, paths, future) waiting for next batch
+        self.scheduled = False
+
+
+# Keeps generated mazes in memory (LRU, capacity mazes) and answers solve requests.
+# Generation runs in process pool, so event loop keeps accepting requests. Solves of one maze
+# which arrive while a batch is waiting or running are coalesced into next batch: one BFS
+# (BatchSolver.solve_shared) answers every pair with that tile as start or end, batch runs in a thread.
+class MazeService:
+    def __init__(self, workers=None, capacity=64):
+        self.pool = ProcessPoolExecutor(workers)
+        self.capacity = capacity
+        self.mazes = OrderedDict()  # maze id -> WarmMaze, least recently used first
+        self.generating = {}  # maze id -> future of running generation
+        self.counters = {
+            "requests": 0,
+            "errors": 0,
+            "generated": 0,
+            "solves": 0,
+            "batches": 0,
+            "searches": 0
+        }
+
+    def close(self):
+        self.pool.shutdown()
+
+    async def handle(self, request):
+        self.counters["requests"] += 1
+        if not isinstance(request, dict):
+            raise ServiceError("request must be a JSON object")
+        op = request.get("op")
+        if op == "generate":
+            return await self.generate(int(request["width"]),
+                                       int(request["height"]),
+                                       int(request.get("seed", 0)))
+        if op == "solve":
+            return await self.solve(request["maze"], request["start"],
+                                    request["end"],
+                                    bool(request.get("path", False)))
+        if op == "stats":
+            return dict(self.counters, mazes=len(self.mazes))
+        raise ServiceError("unknown op: " + str(op))
+
+    async def generate(self, width, height, seed):
+        maze_id = "%dx%d-%d" % (width, height, seed)
+        rows, cols = grid_size(width, height)
+        if maze_id in self.mazes:
+            self.mazes.move_to_end(maze_id)
+            return {"maze": maze_id, "rows": rows, "cols": cols, "time": 0,
+                    "cached": True}
+        start = timer()
+        if maze_id not in self.generating:  # concurrent requests wait for the same generation
+            self.generating[maze_id] = asyncio.ensure_future(
+                self.__generate(maze_id, width, height, seed))
+        try:
+            await asyncio.shield(self.generating[maze_id])
+        finally:
+            self.generating.pop(maze_id, None)
+        return {"maze": maze_id, "rows": rows, "cols": cols,
+                "time": (timer() - start) * 1000, "cached": False}
+
+    async def __generate(self, maze_id, width, height, seed):
+        loop = asyncio.get_running_loop()
+        packed = await loop.run_in_executor(self.pool, _generate_walls,
+                                            (width, height, seed))
+        rows, cols = grid_size(width, height)
+        walls = np.unpackbits(np.frombuffer(packed, dtype=np.uint8),
+                              count=rows * cols).reshape(rows, cols)
+        self.mazes[maze_id] = WarmMaze(Maze.from_walls(walls))
+        self.counters["generated"] += 1
+        while len(self.mazes) > self.capacity:
+            self.mazes.popitem(last=False)
+
+    async def solve(self, maze_id, start, end, paths=False):
+        warm = self.mazes.get(maze_id)
+        if warm is None:
+            raise ServiceError("unknown maze: " + str(maze_id))
+        self.mazes.move_to_end(maze_id)
+        start = _tile(start, warm.maze)
+        end = _tile(end, warm.maze)
+        future = asyncio.get_running_loop().create_future()
+        warm.pending.append((start, end, paths, future))
+        self.counters["solves"] += 1
+        if not warm.scheduled:
+            warm.scheduled = True
+            asyncio.ensure_future(self.__run_batches(warm))
+        return await future
+
+    async def __run_batches(self, warm):
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.sleep(0)  # requests read in the same loop iteration join the batch
+            while warm.pending:
+                batch = warm.pending
+                warm.pending = []  # requests coming while batch runs wait for next one
+                solver = warm.solver
+                self.counters["batches"] += 1
+                fields = len(solver.fields)
+                try:
+                    results = await loop.run_in_executor(
+                        None, self.__search, warm, batch)
+                    self.counters["searches"] += len(solver.fields) - fields
+                    if len(solver.fields) > FIELDS_KEPT:
+                        solver.fields.clear()
+                except Exception as error:
+                    for *_, future in batch:
+                        if not future.done():
+                            future.set_exception(error)
+                    continue
+                for (*_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            warm.scheduled = False
+
+    def __search(self, warm, batch):
+        solver = warm.solver
+        results = []
+        solved = solver.solve_shared([(start, end) for start, end, *_ in batch],
+                                     any(paths for _, _, paths, _ in batch))
+        for (_, _, paths, _), result in zip(batch, solved):
+            response = {
+                "length": -1 if result.length is None else result.length,
+                "batch": len(batch)
+            }
+            if paths:
+                response["path"] = result.path
+            results.append(response)
+        return results
+
+    async def serve_client(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            request_id = None
+            try:
+                request = json.loads(line)
+                if isinstance(request, dict):
+                    request_id = request.get("id")
+                response = await self.handle(request)
+            except (ServiceError, ValueError, KeyError, TypeError) as error:
+                self.counters["errors"] += 1
+                response = {"error": str(error)}
+            except Exception as error:  # every request line gets an answer
+                self.counters["errors"] += 1
+                response = {"error": type(error).__name__ + ": " + str(error)}
+            response["id"] = request_id
+            async with lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8765, unix_path=None):
+    if unix_path is not None:
+        server = await asyncio.start_unix_server(service.serve_client,
+                                                 unix_path)
+    else:
+        server = await asyncio.start_server(service.serve_client, host, port)
+    async with server:
+        await server.serve_forever()
@@ -1,13 +1,83 @@
 import math
 from collections import Counter
+from heapq import heappush, heappop
+from timeit import default_timer as timer
 
-from anytree import AnyNode
+from .maze import Maze, TileType, plain_rows
 
-from .maze import Maze, TileType
+
+LANDMARKS = 4  # heuristic type of landmark (ALT) heuristic
+
+
+# heuristic value of tile (x, y) for maze of size h x w,
+# landmarks (Maze.landmarks) are needed only for LANDMARKS heuristic type
+def heuristic(h_type, x, y, end, h, w, landmarks=None):
+    if h_type == 0:
+        return abs(x - end[0]) + abs(y - end[1])
+    elif h_type == 1:
+        return math.sqrt((x - end[0])**2 + (y - end[1])**2)
+    elif h_type == 2:
+        if h > w:
+            return abs(y - end[1])
+        else:
+            return abs(x - end[0])
+    elif h_type == LANDMARKS:
+        return landmarks.estimate(x, y, end)
+    return 0
+
+
+# flat array replacement for lazy (file backed) mazes, only written values are stored
+class SparseArray(dict):
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
+
+
+# counters collected by Solver.search, times in [ms]
+class SearchStats:
+    FIELDS = ("expanded", "generated", "peak_open", "reopened",
+              "heuristic_evaluations", "generation_time", "search_time",
+              "path_time")
+
+    def __init__(self, generation_time=0):
+        self.expanded = 0  # tiles taken from open list and checked
+        self.generated = 0  # entries added to open list
+        self.peak_open = 0  # highest number of entries in open list(s), outdated heap entries included
+        self.reopened = 0  # tiles which got better path while waiting in open list
+        self.heuristic_evaluations = 0
+        self.generation_time = generation_time  # maze generation (Maze.generation_time)
+        self.search_time = 0  # search without path reconstruction
+        self.path_time = 0  # path reconstruction and marking
+
+    def row(self):  # values in order of FIELDS
+        return [getattr(self, field) for field in self.FIELDS]
+
+    def __repr__(self):
+        return "SearchStats(" + ", ".join(
+            field + "=" + str(round(getattr(self, field), 3))
+            for field in self.FIELDS) + ")"
 
 
 class Solver:
-    def __init__(self, maze: Maze, start, end, init=True, heuristic_type=0):
+    # heap - binary heap A*, list - original list based A*, bidirectional - A* from both ends,
+    # corridor - A* which jumps along 1-wide corridors and expands only junctions,
+    # junction - A* on junction graph cached by maze (Maze.junction_graph),
+    # hierarchical - HPA* on tiled graph cached by maze (Maze.hierarchical_graph)
+    ENGINES = ("heap", "list", "bidirectional", "corridor", "junction",
+               "hierarchical")
+
+    def __init__(self,
+                 maze: Maze,
+                 start,
+                 end,
+                 init=True,
+                 heuristic_type=0,
+                 engine="heap",
+                 profiler=None,
+                 trace=False):
         self.maze = maze
         self.maze_data = maze.data  # data with walkable tiles and walls maze[n][m] <-> maze[y][x]
         self.h = len(self.maze_data)  # height of maze
@@ -15,146 +85,420 @@ class Solver:
         self.start = start  # starting point coordinates (x,y)
         self.end = end  # end point coordinates (x,y)
         self.h_type = heuristic_type  # choose which heuristic to use
+        if engine not in self.ENGINES:
+            raise ValueError("Unknown search engine: " + str(engine))
+        self.engine = engine
+        if heuristic_type == LANDMARKS and engine != "hierarchical":  # hierarchical graph keeps own landmarks
+            self.landmarks = maze.landmarks(
+            )  # preprocessing is done before search
+        else:
+            self.landmarks = None
+        self.expanded = 0  # number of tiles expanded by last search
+        self.stats = SearchStats(maze.generation_time)  # counters of last search
+        self.profiler = profiler  # context manager entered around every search, e.g. profiling.Profiler
+        self.record_trace = trace  # record tile writes of every search
+        self.trace = None  # trace.SearchTrace of last search when record_trace is set
         if init:
             self.search()
         else:
             self.path = None
 
     def search(self):
-        open_n = []  # waiting list - tiles adjusted to already visited tiles
-        closed_n = []  # checked list - tiles already visited
-
-        # add first tile
-        open_n.append(
-            AnyNode(x=self.start[0],
-                    y=self.start[1],
-                    f_c=0,
-                    f_h=self.__heuristic(self.start[0], self.start[1])))
-        while (1):
-            current_n = open_n[self.__find_min(open_n)]  # current visited tile
-            del open_n[self.__get_id(
-                current_n, open_n)]  # delete current tile from waiting list
-            closed_n.append(current_n)  # add current tile to already checked
-            self.maze.set_checked(current_n.x, current_n.y)
-
-            if (current_n.x == self.end[0] and current_n.y
-                    == self.end[1]):  # check if we reached end of path
-                self.path = current_n
-                self.__update_maze_path(current_n)
+        self.expanded = 0
+        self.stats = SearchStats(self.maze.generation_time)
+        if self.record_trace:
+            self.maze.start_trace()  # grid snapshot is taken before time measurement
+        start = timer()
+        try:
+            if self.profiler is not None:
+                with self.profiler:
+                    self.__run_engine()
+            else:
+                self.__run_engine()
+        finally:
+            end = timer()
+            if self.record_trace:
+                self.trace = self.maze.stop_trace()
+        self.stats.search_time = (end - start) * 1000 - self.stats.path_time
+        self.stats.expanded = self.expanded
+
+    def __run_engine(self):
+        if self.engine == "heap":
+            self.__search_heap()
+        elif self.engine == "bidirectional":
+            self.__search_bidirectional()
+        elif self.engine == "corridor":
+            self.__search_corridor()
+        elif self.engine == "junction":
+            self.__search_junction()
+        elif self.engine == "hierarchical":
+            self.__search_hierarchical()
+        else:
+            self.__search_list()
+
+    # A* with binary heap open list (lazy deletion), flat g-score array and closed bitmap
+    def __search_heap(self):
+        w = self.w
+        data = plain_rows(self.maze_data)  # walls do not change during search, plain lists are faster to index
+        end_i = self.end[1] * w + self.end[0]
+        start_i = self.start[1] * w + self.start[0]
+        g_score = self.__array(-1)  # -1 - tile not reached yet
+        parent = self.__array(-1)
+        closed = self.__array(0)
+
+        f_h = self.__heuristic(self.start[0], self.start[1])
+        open_n = [(f_h, f_h, start_i)]  # (f, h, index) - on equal f lower h wins
+        g_score[start_i] = 0
+        generated = peak_open = 1
+        reopened = 0
+        self.path = None
+        while open_n:
+            _, _, i = heappop(open_n)
+            if closed[i]:  # outdated entry of already checked tile
+                continue
+            closed[i] = 1
+            self.expanded += 1
+            x = i % w
+            y = i // w
+            self.maze.set_checked(x, y)
+
+            if i == end_i:  # check if we reached end of path
+                path_start = timer()
+                self.path = self.__update_maze_path_index(i, parent)
+                self.stats.path_time = (timer() - path_start) * 1000
+                break
+
+            f_c = g_score[i] + 1
+            for n_x, n_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if n_x < 0 or n_y < 0 or n_x >= w - 1 or n_y >= self.h - 1 or data[
+                        n_y][n_x] == TileType.WALL:
+                    continue
+                n_i = n_y * w + n_x
+                if closed[n_i]:
+                    continue
+                if g_score[n_i] == -1:
+                    self.maze.set_current(x, y)
+                elif g_score[n_i] <= f_c:  # not a better path
+                    continue
+                else:
+                    reopened += 1
+                g_score[n_i] = f_c
+                parent[n_i] = i
+                f_h = self.__heuristic(n_x, n_y)
+                heappush(open_n, (f_c + f_h, f_h, n_i))
+                generated += 1
+                if len(open_n) > peak_open:
+                    peak_open = len(open_n)
+        self.__count(generated, peak_open, reopened)
+
+    def __count(self, generated, peak_open, reopened):  # counters kept in locals during search
+        self.stats.generated = generated
+        self.stats.peak_open = peak_open
+        self.stats.reopened = reopened
+
+    def __array(self, default):  # array with value for every tile
+        if self.maze.backend == "lazy":  # lazy mazes can be too big for flat arrays
+            return SparseArray(default)
+        if default == 0:
+            return bytearray(self.w * self.h)
+        return [default] * (self.w * self.h)
+
+    def __update_maze_path_index(self, i, parent):
+        path = []
+        while i != -1:
+            path.append(i)
+            i = parent[i]
+        path.reverse()
+        return self.__mark_path(path)
+
+    def __mark_path(self, path):  # path - indexes of tiles from start to end
+        coordinates = []
+        for i in path:
+            x = i % self.w
+            y = i // self.w
+            self.maze.set_path(x, y)
+            coordinates.append((x, y))
+        return coordinates  # coordinates of path from start to end
+
+    def __open_neighbours(self, data, i):  # indexes of walkable neighbours of tile
+        w = self.w
+        x = i % w
+        y = i // w
+        neighbours = []
+        if x + 1 < w - 1 and data[y][x + 1] != TileType.WALL:
+            neighbours.append(i + 1)
+        if x - 1 >= 0 and data[y][x - 1] != TileType.WALL:
+            neighbours.append(i - 1)
+        if y + 1 < self.h - 1 and data[y + 1][x] != TileType.WALL:
+            neighbours.append(i + w)
+        if y - 1 >= 0 and data[y - 1][x] != TileType.WALL:
+            neighbours.append(i - w)
+        return neighbours
+
+    # A* run from start and end at once with balanced potentials p(v) = (h_end(v) - h_start(v)) / 2
+    # (p for forward and -p for backward side), so both sides search the same reduced graph and
+    # search can stop as soon as sum of lowest keys on both sides is not lower than best path
+    def __search_bidirectional(self):
+        w = self.w
+        data = plain_rows(self.maze_data)
+        start_i = self.start[1] * w + self.start[0]
+        end_i = self.end[1] * w + self.end[0]
+        g_score = (self.__array(-1), self.__array(-1)
+                   )  # forward side from start, backward side from end
+        parent = (self.__array(-1), self.__array(-1))
+        closed = (self.__array(0), self.__array(0))
+
+        open_n = ([], [])  # (key, h, index) - on equal key lower h wins
+        for side, i in ((0, start_i), (1, end_i)):
+            g_score[side][i] = 0
+            heappush(open_n[side], self.__bidirectional_key(side, i, 0))
+        generated = peak_open = 2
+        reopened = 0
+        best = 0 if start_i == end_i else math.inf
+        meet = start_i
+        self.path = None
+        while open_n[0] and open_n[1]:
+            if open_n[0][0][0] + open_n[1][0][0] >= best:
+                break
+            side = 0 if len(open_n[0]) <= len(open_n[1]) else 1
+            _, _, i = heappop(open_n[side])
+            if closed[side][i]:  # outdated entry of already checked tile
+                continue
+            closed[side][i] = 1
+            self.expanded += 1
+            self.maze.set_checked(i % w, i // w)
+
+            own = g_score[side]
+            other = g_score[1 - side]
+            f_c = own[i] + 1
+            for n_i in self.__open_neighbours(data, i):
+                if closed[side][n_i] or (own[n_i] != -1 and own[n_i] <= f_c):
+                    continue
+                if own[n_i] != -1:
+                    reopened += 1
+                own[n_i] = f_c
+                parent[side][n_i] = i
+                heappush(open_n[side], self.__bidirectional_key(side, n_i, f_c))
+                generated += 1
+                if len(open_n[0]) + len(open_n[1]) > peak_open:
+                    peak_open = len(open_n[0]) + len(open_n[1])
+                if other[n_i] != -1 and f_c + other[n_i] < best:  # both searches met in this tile
+                    best = f_c + other[n_i]
+                    meet = n_i
+        self.__count(generated, peak_open, reopened)
+
+        if best == math.inf:
+            return
+        path_start = timer()
+        path = []
+        i = meet
+        while i != -1:
+            path.append(i)
+            i = parent[0][i]
+        path.reverse()
+        i = parent[1][meet]
+        while i != -1:
+            path.append(i)
+            i = parent[1][i]
+        self.path = self.__mark_path(path)
+        self.stats.path_time = (timer() - path_start) * 1000
+
+    def __bidirectional_key(self, side, i, g):
+        x = i % self.w
+        y = i // self.w
+        to_end = heuristic(self.h_type, x, y, self.end, self.h, self.w,
+                           self.landmarks)
+        to_start = heuristic(self.h_type, x, y, self.start, self.h, self.w,
+                             self.landmarks)
+        self.stats.heuristic_evaluations += 2
+        if side == 0:
+            return (g + (to_end - to_start) / 2, to_end, i)
+        return (g + (to_start - to_end) / 2, to_start, i)
+
+    # follows corridor (tiles with two walkable neighbours) which starts with tile next to origin,
+    # returns first junction or end tile and number of steps, None for corridors ending in dead end
+    def __follow_corridor(self, data, origin, i, end_i):
+        previous = origin
+        steps = 1
+        while i != end_i:
+            neighbours = self.__open_neighbours(data, i)
+            if len(neighbours) == 1:
+                return None, steps
+            if len(neighbours) != 2:
+                break
+            n_i = neighbours[0] if neighbours[0] != previous else neighbours[1]
+            if n_i == origin:  # corridor loops back to origin
                 break
+            previous = i
+            i = n_i
+            steps += 1
+        return i, steps
+
+    # A* over junctions and dead ends only, tiles inside corridors are skipped
+    def __search_corridor(self):
+        w = self.w
+        data = plain_rows(self.maze_data)
+        start_i = self.start[1] * w + self.start[0]
+        end_i = self.end[1] * w + self.end[0]
+        g_score = self.__array(-1)  # -1 - tile not reached yet
+        parent = self.__array(-1)
+        first_step = self.__array(-1)  # first corridor tile after parent
+        closed = self.__array(0)
+
+        f_h = self.__heuristic(self.start[0], self.start[1])
+        open_n = [(f_h, f_h, start_i)]  # (f, h, index) - on equal f lower h wins
+        g_score[start_i] = 0
+        generated = peak_open = 1
+        reopened = 0
+        self.path = None
+        while open_n:
+            _, _, i = heappop(open_n)
+            if closed[i]:  # outdated entry of already checked tile
+                continue
+            closed[i] = 1
+            self.expanded += 1
+            self.maze.set_checked(i % w, i // w)
 
-            neighbours = self.__find_neighbours(
-                current_n)  # find all neighbours of current tile
+            if i == end_i:  # check if we reached end of path
+                path_start = timer()
+                self.path = self.__mark_path(
+                    self.__expand_corridors(data, i, parent, first_step))
+                self.stats.path_time = (timer() - path_start) * 1000
+                break
 
-            for n in neighbours:  # check all walkable neighbours
-                if self.__check_inside(
-                        n, closed_n
-                ):  # check if neighbour is inside of already checked tiles
+            for step in self.__open_neighbours(data, i):
+                n_i, steps = self.__follow_corridor(data, i, step, end_i)
+                if n_i is None or closed[n_i]:
                     continue
-                # calculate f_c for tile only if we found better path with it or if it is not on waiting list
-                if self.__check_better_path(
-                        n, open_n) or not self.__check_inside(n, open_n):
-                    index = self.__get_id(n, open_n)
-                    if index is None:  # tile is not in open list
-                        open_n.append(n)  # add to open list
-                        index = -1  # set index for this tile
-                        self.maze.set_current(current_n.x, current_n.y)
-                    open_n[
-                        index].parent = current_n  # make current parent of this neighbour
-                    open_n[index].f_c = n.f_c  # update cost function
+                f_c = g_score[i] + steps
+                if g_score[n_i] != -1:
+                    if g_score[n_i] <= f_c:  # not a better path
+                        continue
+                    reopened += 1
+                g_score[n_i] = f_c
+                parent[n_i] = i
+                first_step[n_i] = step
+                f_h = self.__heuristic(n_i % w, n_i // w)
+                heappush(open_n, (f_c + f_h, f_h, n_i))
+                generated += 1
+                if len(open_n) > peak_open:
+                    peak_open = len(open_n)
+        self.__count(generated, peak_open, reopened)
+
+    def __expand_corridors(self, data, i, parent, first_step):  # all tiles of path ending in i
+        path = [i]
+        while parent[i] != -1:
+            corridor = []
+            previous = parent[i]
+            n_i = first_step[i]
+            while n_i != i:  # walk corridor again from parent to i
+                corridor.append(n_i)
+                neighbours = self.__open_neighbours(data, n_i)
+                n_i, previous = neighbours[0] if neighbours[
+                    0] != previous else neighbours[1], n_i
+            path.extend(reversed(corridor))
+            i = parent[i]
+            path.append(i)
+        path.reverse()
+        return path
+
+    def __search_junction(self):
+        self.__search_graph(self.maze.junction_graph())
+
+    def __search_hierarchical(self):
+        self.__search_graph(self.maze.hierarchical_graph())
+
+    # search runs on cached graph, expanded nodes and path are written into maze at the end
+    def __search_graph(self, graph):
+        path, expanded = graph.search(self.start, self.end, self.h_type,
+                                      self.stats, self.landmarks)
+        self.expanded = len(expanded)
+        for i in expanded:
+            self.maze.set_checked(i % self.w, i // self.w)
+        path_start = timer()
+        self.path = self.__mark_path(path) if path is not None else None
+        self.stats.path_time = (timer() - path_start) * 1000
+
+    # original A* with linear open list, nodes are kept in flat arrays indexed by tile
+    # (g-score, cached heuristic, parent index and state) instead of tree node objects
+    def __search_list(self):
+        w = self.w
+        data = plain_rows(self.maze_data)
+        start_i = self.start[1] * w + self.start[0]
+        end_i = self.end[1] * w + self.end[0]
+        g_score = self.__array(-1)
+        h_score = self.__array(-1)  # heuristic is computed once, when tile is reached
+        parent = self.__array(-1)
+        state = self.__array(0)  # 0 - not reached, 1 - in open list, 2 - checked
+        open_n = [start_i]  # waiting list - tiles adjusted to already visited tiles
+
+        g_score[start_i] = 0
+        h_score[start_i] = self.__heuristic(self.start[0], self.start[1])
+        state[start_i] = 1
+        generated = peak_open = 1
+        reopened = 0
+        self.path = None
+        while open_n:
+            i = open_n.pop(self.__find_min(open_n, g_score, h_score))  # current visited tile
+            state[i] = 2
+            self.expanded += 1
+            x = i % w
+            y = i // w
+            self.maze.set_checked(x, y)
+
+            if i == end_i:  # check if we reached end of path
+                path_start = timer()
+                self.path = self.__update_maze_path_index(i, parent)
+                self.stats.path_time = (timer() - path_start) * 1000
+                break
+
+            f_c = g_score[i] + 1
+            for n_x, n_y in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if n_x < 0 or n_y < 0 or n_x >= w - 1 or n_y >= self.h - 1 or data[
+                        n_y][n_x] == TileType.WALL:
+                    continue
+                n_i = n_y * w + n_x
+                if state[n_i] == 2:  # already checked
+                    continue
+                if state[n_i] == 0:  # tile is not in open list
+                    open_n.append(n_i)
+                    state[n_i] = 1
+                    h_score[n_i] = self.__heuristic(n_x, n_y)
+                    self.maze.set_current(x, y)
+                    generated += 1
+                    if len(open_n) > peak_open:
+                        peak_open = len(open_n)
+                elif f_c < g_score[n_i]:  # better path to tile from open list
+                    reopened += 1
+                else:
+                    continue
+                parent[n_i] = i  # make current parent of this neighbour
+                g_score[n_i] = f_c  # update cost function
+        self.__count(generated, peak_open, reopened)
 
     def __heuristic(self, x, y):  # calculate heuristic value
-        if self.h_type == 0:
-            return abs(x - self.end[0]) + abs(y - self.end[1])
-        elif self.h_type == 1:
-            return math.sqrt((x - self.end[0])**2 + (y - self.end[1])**2)
-        elif self.h_type == 2:
-            if self.h > self.w:
-                return abs(y - self.end[1])
-            else:
-                return abs(x - self.end[0])
-        return 0
+        self.stats.heuristic_evaluations += 1
+        return heuristic(self.h_type, x, y, self.end, self.h, self.w,
+                         self.landmarks)
 
-    def __find_min(self, data):  # find minimum function value in open list
+    def __find_min(self, open_n, g_score, h_score):  # find minimum function value in open list
         f_min = self.h + self.w + 1
-        i_min = 0
-        for i, n in enumerate(data):
-            f = n.f_c + n.f_h
+        k_min = 0
+        for k, i in enumerate(open_n):
+            f = g_score[i] + h_score[i]
             if f < f_min:
                 f_min = f
-                i_min = i
-        return i_min  # return index of the best tile
-
-    def __find_neighbours(self, node):
-        neighbours = []
-        # check all for neighbours if they are walkable
-        if node.x + 1 < self.w - 1 and self.maze_data[node.y][node.x + 1] != 1:
-            neighbours.append(
-                AnyNode(x=node.x + 1,
-                        y=node.y,
-                        f_c=node.f_c + 1,
-                        f_h=self.__heuristic(node.x + 1, node.y)))
-        if node.x - 1 >= 0 and self.maze_data[node.y][node.x - 1] != 1:
-            neighbours.append(
-                AnyNode(x=node.x - 1,
-                        y=node.y,
-                        f_c=node.f_c + 1,
-                        f_h=self.__heuristic(node.x - 1, node.y)))
-        if node.y + 1 < self.h - 1 and self.maze_data[node.y + 1][node.x] != 1:
-            neighbours.append(
-                AnyNode(x=node.x,
-                        y=node.y + 1,
-                        f_c=node.f_c + 1,
-                        f_h=self.__heuristic(node.x, node.y + 1)))
-        if node.y - 1 >= 0 and self.maze_data[node.y - 1][node.x] != 1:
-            neighbours.append(
-                AnyNode(x=node.x,
-                        y=node.y - 1,
-                        f_c=node.f_c + 1,
-                        f_h=self.__heuristic(node.x, node.y - 1)))
-
-        return neighbours
-
-    def __check_better_path(self, node, data):  # check if this path is better
-        s = next((s for s in data if s.x == node.x and s.y == node.y),
-                 None)  # search open list for this tile
-        if s is None:  # tile is not in open list
-            return False
-        if node.f_c + node.f_h < s.f_c + s.f_h:  # function is better
-            return True
-        elif node.f_c + node.f_h == s.f_c + s.f_h:  # cost function equal -> check heuristic function
-            if node.f_h < s.f_h:
-                return True
-        return False
-
-    def __check_inside(self, node,
-                       data):  # check if tile is inside open/closed list
-        for n in data:
-            if node.x == n.x and node.y == n.y:
-                return True
-        return False
-
-    def __get_id(self, node, data):  # get id of tile from open list
-        for i, n in enumerate(data):
-            if n.x == node.x and n.y == node.y:
-                return i
-        return None
-
-    def __update_maze_path(self, node):
-        self.maze.set_path(node.x, node.y)
-        while (not node.is_root):
-            self.maze.set_path(node.x, node.y)
-            node = node.parent
-        self.maze.set_path(node.x, node.y)  # root value
+                k_min = k
+        return k_min  # return position of the best tile
 
     def clean(self):
-        for i, _ in enumerate(self.maze_data):
-            for j, _ in enumerate(self.maze_data[i]):
-                if self.maze_data[i][j] == 2 or self.maze_data[i][j] == 3:
-                    self.maze_data[i][j] = 0
+        self.maze.reset_tiles([TileType.CHECKED, TileType.CURRENT])
         self.maze_data[self.start[1]][self.start[0]] = 0
         self.maze_data[self.end[1]][self.end[0]] = 0
 
     def calculate_data(self) -> Counter:
-        temp = [cell for row in self.maze_data for cell in row]
-        return Counter(temp)
+        counts = self.maze.get_tiles_counts()
+        return Counter({
+            tile_type: count
+            for tile_type, count in enumerate(counts) if count
+        })
@@ -0,0 +1,233 @@
+import random
+
+import numpy as np
+
+from .maze import TileType
+
+# Maze file layout (little endian): header with grid size, seed and name of generator, then every
+# grid row bit-packed to whole bytes (1 - wall), so any row can be read without reading previous ones.
+# First version of header had no generator.
+
+MAGIC = b"MAZESTR2"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("rows", "<u8"), ("cols", "<u8"),
+                         ("seed", "<u8"), ("generator", "S16")])
+MAGIC_V1 = b"MAZESTR1"
+HEADER_V1_DTYPE = np.dtype([("magic", "S8"), ("rows", "<u8"), ("cols", "<u8"),
+                            ("seed", "<u8")])
+BIT_COUNTS = np.array([bin(i).count("1") for i in range(256)],
+                      dtype=np.uint8)  # number of set bits of every byte
+
+
+# Eller's algorithm, yields grid rows (bytearrays of tile types) one by one keeping only
+# sets of one row of rooms in memory. Width and height have the same meaning as in Maze.
+def eller_rows(width, height, seed=None):
+    rng = random.Random(seed)
+    w = int(width / 2)
+    h = int(height / 2)
+    cols = 2 * w + 1
+    yield bytearray([TileType.WALL]) * cols  # top border
+
+    sets = list(range(w))  # set of every room in current row
+    members = {s: [s] for s in sets}  # set -> rooms of current row in this set
+    next_set = w
+    for r in range(h):
+        last = r == h - 1
+        row = bytearray(cols)
+        row[0] = row[-1] = TileType.WALL
+        for c in range(w - 1):  # join neighbours from different sets
+            if sets[c] != sets[c + 1] and (last or rng.random() < 0.5):
+                kept = sets[c]
+                joined = sets[c + 1]
+                if len(members[kept]) < len(members[joined]):
+                    kept, joined = joined, kept
+                for room in members[joined]:  # relabel smaller set
+                    sets[room] = kept
+                members[kept].extend(members.pop(joined))
+            else:
+                row[2 * c + 2] = TileType.WALL
+        yield row
+        if last:
+            break
+
+        below = bytearray([TileType.WALL]) * cols
+        new_members = {}
+        for s, rooms in members.items():  # every set goes down at least once
+            forced = rng.choice(rooms)
+            for room in rooms:
+                if room == forced or rng.random() < 0.5:
+                    below[2 * room + 1] = TileType.EMPTY
+                    new_members.setdefault(s, []).append(room)
+                else:
+                    sets[room] = next_set
+                    new_members[next_set] = [room]
+                    next_set += 1
+        members = new_members
+        yield below
+    yield bytearray([TileType.WALL]) * cols  # bottom border
+
+
+# writes maze file from grid rows (sequences of tile types) given one by one
+def write_rows(path, rows, cols, grid_rows, seed=0, generator=""):
+    header = np.array([(MAGIC, rows, cols, seed or 0, generator.encode())],
+                      dtype=HEADER_DTYPE)
+    with open(path, "wb") as maze_file:
+        maze_file.write(header.tobytes())
+        for row in grid_rows:
+            if not isinstance(row, np.ndarray):
+                row = np.frombuffer(bytes(row), dtype=np.uint8)
+            maze_file.write(np.packbits(row == TileType.WALL).tobytes())
+
+
+# generates maze row by row straight into bit-packed file
+def write_maze_file(path, width, height, seed=None):
+    rows = 2 * int(height / 2) + 1
+    cols = 2 * int(width / 2) + 1
+    write_rows(path, rows, cols, eller_rows(width, height, seed), seed,
+               "eller")
+    return rows, cols
+
+
+class MazeFile:
+    def __init__(self, path):
+        self.path = path
+        self.buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        magic = self.buffer[:8].tobytes()
+        if magic == MAGIC:
+            header_dtype = HEADER_DTYPE
+        elif magic == MAGIC_V1:
+            header_dtype = HEADER_V1_DTYPE
+        else:
+            raise ValueError(path + " is not a maze file")
+        header = self.buffer[:header_dtype.itemsize].view(header_dtype)[0]
+        self.rows = int(header["rows"])
+        self.cols = int(header["cols"])
+        self.seed = int(header["seed"])
+        self.generator = header["generator"].decode(
+        ) if magic == MAGIC else ""  # name of algorithm which generated maze
+        self.row_bytes = (self.cols + 7) // 8
+        self.offset = header_dtype.itemsize
+
+    def is_wall(self, x, y):
+        byte = int(self.buffer[self.offset + y * self.row_bytes + (x >> 3)])
+        return (byte >> (7 - (x & 7))) & 1
+
+    def row(self, y):  # tiles of one row as uint8 array
+        start = self.offset + y * self.row_bytes
+        return np.unpackbits(self.buffer[start:start + self.row_bytes],
+                             count=self.cols)
+
+    def __iter__(self):
+        for y in range(self.rows):
+            yield self.row(y)
+
+    def wall_count(self, chunk=1 << 24):
+        count = 0
+        for start in range(self.offset, len(self.buffer), chunk):
+            count += int(BIT_COUNTS[self.buffer[start:start + chunk]].sum(
+                dtype=np.int64))
+        return count  # padding bits at the end of rows are zeros
+
+
+# Maze.data replacement for lazy backend: walls are read from maze file on demand,
+# tiles written later (search marks, edited walls) are kept in a sparse overlay
+class LazyGrid:
+    def __init__(self, rows, cols, walls: MazeFile = None):
+        self.rows = rows
+        self.cols = cols
+        self.walls = walls  # None - grid without walls
+        self.overlay = {}  # index -> tile type different from file
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.rows
+        return LazyRow(self, y)
+
+    def __iter__(self):
+        for y in range(self.rows):
+            yield LazyRow(self, y)
+
+    def base(self, x, y):  # tile type stored in file
+        if self.walls is None:
+            return TileType.EMPTY
+        return self.walls.is_wall(x, y)
+
+    def get(self, x, y):
+        tile = self.overlay.get(y * self.cols + x)
+        if tile is None:
+            return self.base(x, y)
+        return tile
+
+    def set(self, x, y, tile):
+        if tile == self.base(x, y):
+            self.overlay.pop(y * self.cols + x, None)
+        else:
+            self.overlay[y * self.cols + x] = tile
+
+    def row(self, y):  # whole row as list of tile types
+        if self.walls is None:
+            row = [TileType.EMPTY] * self.cols
+        else:
+            row = self.walls.row(y).tolist()
+        if self.overlay:
+            start = y * self.cols
+            for x in range(self.cols):
+                tile = self.overlay.get(start + x)
+                if tile is not None:
+                    row[x] = tile
+        return row
+
+    def counts(self):  # number of tiles of every type, indexed by tile type
+        counts = [0] * len(TileType)
+        walls = self.walls.wall_count() if self.walls is not None else 0
+        counts[TileType.WALL] = walls
+        counts[TileType.EMPTY] = self.rows * self.cols - walls
+        for i, tile in self.overlay.items():
+            counts[self.base(i % self.cols, i // self.cols)] -= 1
+            counts[tile] += 1
+        return counts
+
+    def reset(self, tile_types):  # changes tiles of given types to empty tiles
+        for i, tile in list(self.overlay.items()):
+            if tile in tile_types:
+                self.set(i % self.cols, i // self.cols, TileType.EMPTY)
+
+
+class LazyRow:
+    __slots__ = ("grid", "y")
+
+    def __init__(self, grid, y):
+        self.grid = grid
+        self.y = y
+
+    def __len__(self):
+        return self.grid.cols
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.grid.cols
+        return self.grid.get(x, self.y)
+
+    def __setitem__(self, x, tile):
+        if x < 0:
+            x += self.grid.cols
+        self.grid.set(x, self.y, tile)
+
+    def __iter__(self):
+        return iter(self.grid.row(self.y))
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Streaming maze generator")
+    parser.add_argument("path")
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    rows, cols = write_maze_file(args.path, args.width, args.height,
+                                 args.seed)
+    print("Saved " + str(cols) + "x" + str(rows) + " maze to " + args.path)
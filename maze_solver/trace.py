@@ -0,0 +1,96 @@
+import array, struct, sys
+
+MAGIC = b"MAZETRC1"
+HEADER = struct.Struct("<8sQQQ")  # magic, rows, cols, number of events
+KEYFRAME = 4096  # events between cached grids used for seeking
+
+
+# Compact record of tile writes: tiles of whole grid before first event and then
+# (cell index, new tile type) of every write kept in preallocated arrays which grow by doubling.
+# Traces are recorded by Maze.start_trace / Solver(trace=True) and replayed by MazeVisualizer.
+class SearchTrace:
+    def __init__(self, rows, cols, base, capacity=1 << 16):
+        self.rows = rows
+        self.cols = cols
+        self.base = bytes(base)  # tile types before first event, row by row
+        self.cells = array.array("I", [0]) * capacity  # y * cols + x of every event
+        self.types = bytearray(capacity)  # new tile type of every event
+        self.count = 0
+        self.keyframes = {0: self.base}  # event position -> grid, filled when seeking
+
+    @classmethod
+    def from_maze(cls, maze, capacity=1 << 16):
+        if maze.backend == "lazy":
+            raise ValueError("Lazy mazes can not be traced")
+        if maze.backend == "numpy":
+            base = maze.data.tobytes()
+        else:
+            base = b"".join(bytes(row) for row in maze.data)
+        return cls(len(maze.data), len(maze.data[0]), base, capacity)
+
+    def __len__(self):
+        return self.count
+
+    def record(self, x, y, tile):
+        if self.count == len(self.types):
+            self.__grow()
+        self.cells[self.count] = y * self.cols + x
+        self.types[self.count] = tile
+        self.count += 1
+
+    def __grow(self):
+        size = max(len(self.types), 1024)
+        self.cells.extend(array.array("I", [0]) * size)
+        self.types.extend(bytes(size))
+
+    def events(self, start=0, stop=None):  # (x, y, tile type) of events in given range
+        if stop is None or stop > self.count:
+            stop = self.count
+        for k in range(start, stop):
+            i = self.cells[k]
+            yield i % self.cols, i // self.cols, self.types[k]
+
+    def apply(self, grid, start, stop):  # writes events from range into flat grid (bytearray)
+        cells = self.cells
+        types = self.types
+        for k in range(start, min(stop, self.count)):
+            grid[cells[k]] = types[k]
+
+    # flat grid (bytearray, row by row) after first position events
+    def grid(self, position):
+        position = max(0, min(position, self.count))
+        key = position - position % KEYFRAME
+        if key not in self.keyframes:
+            previous = max(k for k in self.keyframes if k <= key)
+            grid = bytearray(self.keyframes[previous])
+            for k in range(previous, key, KEYFRAME):
+                self.apply(grid, k, k + KEYFRAME)
+                self.keyframes[k + KEYFRAME] = bytes(grid)
+        grid = bytearray(self.keyframes[key])
+        self.apply(grid, key, position)
+        return grid
+
+    def save(self, path):
+        cells = self.cells[:self.count]
+        if sys.byteorder == "big":
+            cells.byteswap()
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, self.rows, self.cols, self.count))
+            file.write(self.base)
+            file.write(cells.tobytes())
+            file.write(self.types[:self.count])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            magic, rows, cols, count = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(path + " is not a search trace")
+            trace = cls(rows, cols, file.read(rows * cols), max(count, 1))
+            trace.cells = array.array("I")
+            trace.cells.frombytes(file.read(trace.cells.itemsize * count))
+            if sys.byteorder == "big":
+                trace.cells.byteswap()
+            trace.types = bytearray(file.read(count))
+            trace.count = count
+        return trace
@@ -0,0 +1,194 @@
+import time, math, sys, os
+from os import environ
+
+environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+import pygame
+import numpy as np
+
+from .maze import TileType
+
+
+class MazeVisualizer:
+    LIGHT_GRAY = (224, 224, 224)
+    BLACK = (0, 0, 0)
+    RED = (255, 0, 0)
+    GREEN = (0, 255, 0)
+    BLUE = (0, 0, 255)
+
+    WIDTH = 800
+    HEIGHT = 800
+
+    TILE_COLORS = {
+        TileType.WALL: BLACK,
+        TileType.CHECKED: GREEN,
+        TileType.CURRENT: RED,
+        TileType.FINAL_PATH: BLUE,
+    }
+
+    def __init__(self, n, m, title="maze", fps=30, speed=0):
+        self.fps = fps  # maximal number of display updates per second, 0 - no limit
+        self.speed = speed  # maximal number of drawn tiles per second, 0 - no limit
+        self.dirty = []  # rects changed since last display update
+        self.drawn = 0  # tiles drawn since first batched draw
+        self.start_time = None
+        self.last_flush = 0
+        self.n = self.HEIGHT / n
+        self.m = self.WIDTH / m
+        if self.m < self.n:
+            self.n = self.m
+        self.padding = (self.HEIGHT - self.n * n) / 2
+        self.display = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
+        self.display.fill(self.LIGHT_GRAY)
+        self.title = title
+        pygame.display.set_caption(title)
+
+    def draw_cell(self, x, y, color=None, delay=0, update=True):
+        x = x * self.m
+        y = self.padding + (y * self.n)
+        w = self.m
+        h = self.n
+        if not w.is_integer():
+            w = math.ceil(w)
+        if not h.is_integer():
+            h = math.ceil(h)
+        if color is None:
+            color = self.LIGHT_GRAY
+        rect = pygame.draw.rect(self.display, color, pygame.Rect(x, y, w, h))
+        if update:
+            self.__handle_events()
+            pygame.display.update(rect)
+        if delay != 0:
+            time.sleep(delay)
+        return rect
+
+    # draws cell without updating display, changed cells are shown with the next frame
+    def draw_cell_batched(self, x, y, color=None):
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        self.dirty.append(self.draw_cell(x, y, color, 0, False))
+        self.drawn += 1
+        if not self.fps or now - self.last_flush >= 1 / self.fps:
+            self.flush()
+
+    def flush(self):  # update display with all changed cells
+        self.__handle_events()
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
+        self.last_flush = time.perf_counter()
+        if self.speed and self.start_time is not None:
+            # wait once per frame instead of once per tile to keep requested animation speed
+            ahead = self.drawn / self.speed - (self.last_flush -
+                                                self.start_time)
+            if ahead > 0:
+                time.sleep(ahead)
+                self.last_flush = time.perf_counter()
+
+    def __handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+
+    # surface with 2D array of tile types scaled to size, works without display
+    @classmethod
+    def tiles_surface(cls, tiles, size):
+        colors = np.empty((256, 3), dtype=np.uint8)  # color of every tile type
+        colors[:] = cls.LIGHT_GRAY
+        for tile_type, color in cls.TILE_COLORS.items():
+            colors[tile_type] = color
+        tiles = np.asarray(tiles, dtype=np.uint8)
+        surface = pygame.surfarray.make_surface(colors[tiles.T])  # surfarray is indexed [x][y]
+        return pygame.transform.scale(surface, size)
+
+    def __draw_tiles(self, tiles):
+        self.display.fill(self.LIGHT_GRAY)
+        size = (math.ceil(self.m * tiles.shape[1]),
+                math.ceil(self.n * tiles.shape[0]))
+        self.display.blit(self.tiles_surface(tiles, size), (0, self.padding))
+        self.dirty = []
+
+    def show(self, data):
+        self.__draw_tiles(np.asarray(data, dtype=np.uint8))
+        clock = pygame.time.Clock()
+        while True:
+            self.__handle_events()
+            pygame.display.update()
+            keys = pygame.key.get_pressed()
+            if keys[pygame.K_SPACE]:
+                break
+            clock.tick(self.fps)
+
+    # plays trace.SearchTrace with given speed [events/s] (0 - whole trace in 10 s),
+    # space - pause, left/right - seek by one second, up/down - faster/slower,
+    # home/end - first/last event, escape - stop
+    def replay(self, trace, speed=0, position=0):
+        speed = speed or max(trace.count / 10, 1)
+        position = max(0, min(position, trace.count))
+        grid = trace.grid(position)
+        paused = False
+        clock = pygame.time.Clock()
+        progress = float(position)
+        while True:
+            seek = None
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+                if event.type != pygame.KEYDOWN:
+                    continue
+                if event.key == pygame.K_ESCAPE:
+                    return position
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    seek = position + int(speed)
+                elif event.key == pygame.K_LEFT:
+                    seek = position - int(speed)
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed / 2, 1)
+                elif event.key == pygame.K_HOME:
+                    seek = 0
+                elif event.key == pygame.K_END:
+                    seek = trace.count
+            elapsed = clock.tick(self.fps) / 1000
+            if seek is not None:
+                position = max(0, min(seek, trace.count))
+                progress = float(position)
+                grid = trace.grid(position)
+            elif not paused and position < trace.count:
+                progress = min(progress + speed * elapsed, trace.count)
+                trace.apply(grid, position, int(progress))
+                position = int(progress)
+            self.__draw_tiles(
+                np.frombuffer(grid, dtype=np.uint8).reshape(
+                    trace.rows, trace.cols))
+            pygame.display.set_caption(self.title + " - " + str(position) +
+                                       "/" + str(trace.count))
+            pygame.display.update()
+
+
+# renders trace.SearchTrace into PNG files (frames evenly spread over trace, last one shows
+# final state) without opening a window, returns paths of saved files
+def render_frames(trace, folder, frames=100, size=800):
+    os.makedirs(folder, exist_ok=True)
+    scale = max(size / max(trace.rows, trace.cols), 1)
+    surface_size = (math.ceil(trace.cols * scale), math.ceil(trace.rows * scale))
+    grid = bytearray(trace.base)
+    position = 0
+    paths = []
+    for frame in range(frames):
+        target = trace.count if frames == 1 else round(trace.count * frame /
+                                                       (frames - 1))
+        trace.apply(grid, position, target)
+        position = target
+        tiles = np.frombuffer(grid, dtype=np.uint8).reshape(
+            trace.rows, trace.cols)
+        path = os.path.join(folder, "frame_%05d.png" % frame)
+        pygame.image.save(MazeVisualizer.tiles_surface(tiles, surface_size),
+                          path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import pandas as pd
+import matplotlib.pyplot as plt
+import random, csv, os
+from argparse import ArgumentParser
+from timeit import default_timer as timer
+from tqdm import tqdm
+from maze_solver.maze import Maze, TileType
+from maze_solver.solver import Solver
+from maze_solver.incremental import IncrementalSolver
+from main import HEURISTIC_VALUES
+
+
+def create_folder(name):
+    parent_dir = os.getcwd()
+    path = os.path.join(parent_dir, name)
+    os.makedirs(path, exist_ok=True)
+
+
+def result_name(size, ticks, edits, heuristic, engine):
+    return str(size) + "_" + str(ticks) + "x" + str(edits) + "__" + str(
+        heuristic) + "_" + engine
+
+
+# toggles random walls between rooms every tick and compares LPA* repair with full search of engine
+def test_replan(size, ticks, edits, heuristic=0, seed=578, engine="heap"):
+    folder_name = 'results'
+    create_folder(folder_name)
+    filename = os.path.join(
+        folder_name,
+        "replan_" + result_name(size, ticks, edits, heuristic, engine) +
+        ".csv")
+
+    random.seed(seed)
+    maze = Maze(size, size)
+    rng = random.Random(seed)
+    start = (1, len(maze.data) - 2)
+    end = (len(maze.data[0]) - 2, 1)
+    candidates = [(x, y) for y in range(1,
+                                        len(maze.data) - 1)
+                  for x in range(1,
+                                 len(maze.data[0]) - 1) if (x + y) % 2 == 1]
+
+    incremental = IncrementalSolver(maze, start, end, heuristic)
+    incremental.search()
+    with open(filename, 'w', newline="") as csvfile:
+        csvwriter = csv.writer(csvfile, delimiter=",")
+        csvwriter.writerow([
+            'tick', 'edits', 'incremental time [ms]', 'incremental expanded',
+            'full time [ms]', 'full expanded', 'path length'
+        ])
+        for tick in tqdm(range(ticks)):
+            for _ in range(edits):
+                x, y = rng.choice(candidates)
+                if maze.get_tile(x, y) == TileType.WALL:
+                    maze.set_empty(x, y)
+                else:
+                    maze.set_wall(x, y)
+
+            begin = timer()
+            path = incremental.search()
+            incremental_time = timer() - begin
+
+            solver = Solver(maze,
+                            start,
+                            end,
+                            init=False,
+                            heuristic_type=heuristic,
+                            engine=engine)
+            begin = timer()
+            solver.search()
+            full_time = timer() - begin
+            tiles = maze.get_tiles_counts()
+            maze.restart()
+
+            csvwriter.writerow([
+                tick + 1, (tick + 1) * edits,
+                round(incremental_time * 1000, 3), incremental.expanded,
+                round(full_time * 1000, 3), tiles[TileType.CHECKED] +
+                tiles[TileType.CURRENT] + tiles[TileType.FINAL_PATH],
+                len(path) if path is not None else 0
+            ])
+    incremental.close()
+
+
+def make_replan_plot(size, ticks, edits, heuristic=0, engine="heap"):
+    folder_name = 'plots'
+    create_folder(folder_name)
+    name = result_name(size, ticks, edits, heuristic, engine)
+    file_name = os.path.join(folder_name, "replan_" + name + ".jpg")
+    data = pd.read_csv(os.path.join('results', "replan_" + name + ".csv"))
+
+    fig, axs = plt.subplots(nrows=1,
+                            ncols=2,
+                            tight_layout=True,
+                            figsize=(10, 5))
+    fig.suptitle('Replanning after ' + str(edits) +
+                 ' wall changes per tick, ' + str(size) + 'x' + str(size) +
+                 ' maze')
+    for i, column in enumerate(['time [ms]', 'expanded']):
+        axs[i].plot(data['edits'],
+                    data['full ' + column],
+                    label='full search (' + engine + ')')
+        axs[i].plot(data['edits'],
+                    data['incremental ' + column],
+                    label='incremental')
+        axs[i].set_xlabel('edits')
+        axs[i].set_ylabel(column)
+        axs[i].legend()
+    plt.savefig(file_name)
+
+
+def parse_args():
+    parser = ArgumentParser(
+        description="Incremental replanning compared with full search")
+    parser.add_argument("size", nargs="?", type=int, default=100)
+    parser.add_argument("ticks", nargs="?", type=int, default=200)
+    parser.add_argument("edits",
+                        nargs="?",
+                        type=int,
+                        default=5,
+                        help="Wall changes per tick")
+    parser.add_argument('-e',
+                        '--heuristic',
+                        help="Heuristic function used with both searches",
+                        type=str,
+                        default="ABS",
+                        choices=[name for name in HEURISTIC_VALUES
+                                 if name != "ALT"])  # landmarks need fixed walls
+    parser.add_argument('--engine',
+                        help="A* implementation of full search",
+                        type=str,
+                        default="heap",
+                        choices=Solver.ENGINES)
+    parser.add_argument("--seed", type=int, default=578)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    heuristic = HEURISTIC_VALUES[args.heuristic]
+    test_replan(args.size, args.ticks, args.edits, heuristic, args.seed,
+                args.engine)
+    make_replan_plot(args.size, args.ticks, args.edits, heuristic,
+                     args.engine)
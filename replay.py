@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+from argparse import ArgumentParser
+
+from maze_solver.trace import SearchTrace
+
+
+def parse_args():
+    parser = ArgumentParser(description="Search trace replay")
+    parser.add_argument("trace", help="Trace saved with main.py --trace")
+    parser.add_argument("--speed",
+                        help="Events per second, 0 - whole trace in 10 s",
+                        type=int,
+                        default=0)
+    parser.add_argument("--fps",
+                        help="Display updates per second, 0 - no limit",
+                        type=int,
+                        default=30)
+    parser.add_argument("--frames",
+                        help="Render PNG frames to this folder instead of opening a window",
+                        type=str,
+                        default=None)
+    parser.add_argument("-n",
+                        "--count",
+                        help="Number of rendered frames",
+                        type=int,
+                        default=100)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    trace = SearchTrace.load(args.trace)
+    if args.frames is not None:
+        from maze_solver.visualizer import render_frames
+        paths = render_frames(trace, args.frames, args.count)
+        print("Saved " + str(len(paths)) + " frames to " + args.frames)
+        return
+    from maze_solver.visualizer import MazeVisualizer
+    visual = MazeVisualizer(trace.rows, trace.cols, args.trace, args.fps)
+    visual.replay(trace, args.speed)
+
+
+if __name__ == "__main__":
+    main()
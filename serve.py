@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import asyncio
+from argparse import ArgumentParser
+from maze_solver.service import MazeService, serve
+
+# Long running maze service, protocol is described in maze_solver/service.py, see also loadgen.py
+
+
+def parse_args():
+    parser = ArgumentParser(description="Maze generate/solve service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8765)
+    parser.add_argument("--unix",
+                        help="Listen on Unix socket instead of TCP port",
+                        default=None)
+    parser.add_argument("-j",
+                        "--workers",
+                        help="Number of generation processes (default: all cores)",
+                        type=int,
+                        default=None)
+    parser.add_argument("--capacity",
+                        help="Number of mazes kept in memory",
+                        type=int,
+                        default=64)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    service = MazeService(args.workers, args.capacity)
+    print("Listening on " + (args.unix or args.host + ":" + str(args.port)))
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 
-import pandas as pd
 import matplotlib.pyplot as plt
-import math, random, csv, os, sys
-from timeit import default_timer as timer
+import csv, os, itertools
+from argparse import ArgumentParser
 from tqdm import tqdm
-from maze_solver.maze import Maze, TileType
-from maze_solver.solver import Solver
+from maze_solver.maze import TileType
+from maze_solver.aggregate import Aggregator
+from maze_solver.corpus import create_corpus
+from maze_solver.runner import BenchmarkRunner, make_jobs, GENETIC
+from maze_solver.solver import Solver, SearchStats, LANDMARKS
+
+STATS_FIELDS = SearchStats.FIELDS[1:]  # expanded tiles already have their own column
+PLOTTED = ['time [ms]', 'path length', 'visited tiles [%]']  # also checked for early stopping
 
 
 def create_folder(name):
@@ -15,55 +20,136 @@ def create_folder(name):
     os.makedirs(path, exist_ok=True)
 
 
-def test_h(n, m, iterations, heuristic=0):
+def test_h(n,
+           m,
+           iterations,
+           heuristics=range(4),
+           workers=None,
+           seed=578,
+           corpus=None,
+           engine="heap",
+           genetic=False,
+           lockstep=False,
+           cache=None,
+           ci=None,
+           min_iterations=5,
+           count_tiles=False):
+    # ci - relative half width of 95% confidence interval of plotted metrics after which
+    # iterations of heuristic stop early, results are aggregated as they come
+    aggregates = Aggregator(sketch=True)
     folder_name = 'results'
     create_folder(folder_name)
-    filename = str(n) + "x" + str(m) + "_" + str(iterations) + "_" + "_" + str(
-        heuristic) + ".csv"
-    filename = os.path.join(folder_name, filename)
-    with open(filename, 'w', newline="") as csvfile:
-        csvwriter = csv.writer(csvfile, delimiter=",")
-
-        csvwriter.writerow(
-            ['iteration', 'time [ms]', 'path length', 'visited tiles [%]'])
-
-        for i in tqdm(range(iterations)):
-            maze = Maze(n, m)
-            path = Solver(maze, (1, len(maze.data) - 2),
-                          (len(maze.data[0]) - 2, 1),
-                          init=False,
-                          heuristic_type=heuristic)
-
-            path.maze = maze
-            path.path = None
-            start = timer()
-            path.search()
-            end = timer()
-
-            empty_tiles = path.maze.get_tiles_count(TileType.EMPTY)
-            checked_tiles = path.maze.get_tiles_count(TileType.CHECKED)
-            path_tiles = path.maze.get_tiles_count(TileType.FINAL_PATH)
-
-            csvwriter.writerow([
-                i + 1,
-                round((end - start) * 1000, 2), path_tiles,
-                round(
-                    100 * (checked_tiles + path_tiles) /
-                    (empty_tiles + checked_tiles + path_tiles), 2)
-            ])
-
-            print(chr(27) + "[2J")
-
-
-def make_plots(n, m, iterations):
+    files = {}
+    csvwriters = {}
+    keys = list(heuristics) + ([GENETIC] if genetic else [])
+    for key in keys:
+        filename = str(n) + "x" + str(m) + "_" + str(
+            iterations) + "_" + "_" + str(key) + ".csv"
+        filename = os.path.join(folder_name, filename)
+        files[key] = open(filename, 'w', newline="")
+        csvwriters[key] = csv.writer(files[key], delimiter=",")
+        header = ['iteration', 'time [ms]', 'path length', 'visited tiles [%]',
+                  'expanded tiles', 'expansions saved']
+        if key == GENETIC:
+            header += ['generations/s', 'converged generation']
+        else:
+            header += list(STATS_FIELDS)
+        csvwriters[key].writerow(header)
+
+    runner = BenchmarkRunner(workers)
+    if corpus is not None and not os.path.exists(corpus):
+        create_corpus(corpus, [(n, m)], iterations, seed, workers)
+    lockstep = lockstep and 3 in heuristics
+    jobs = make_jobs([(n, m)], iterations,
+                     [h for h in heuristics if not (lockstep and h == 3)],
+                     seed, corpus, engine, cache, count_tiles)
+    if genetic:
+        jobs += make_jobs([(n, m)], iterations, [0], seed, corpus, GENETIC)
+    if ci is not None:
+        grouped = {}
+        for job in jobs:
+            grouped.setdefault(
+                (n, m, GENETIC if job.engine == GENETIC else job.heuristic),
+                []).append(job)
+
+        def stop(key):  # jobs of converged group are never run, so they leave progress bar
+            if not aggregates.converged(key, PLOTTED, ci, min_iterations):
+                return False
+            progress.total -= len(grouped[key]) - aggregates.count(key)
+            progress.refresh()
+            return True
+
+        results = runner.run_adaptive(grouped, stop, min_iterations)
+    else:
+        results = runner.run(jobs)
+    if lockstep:
+        results = itertools.chain(
+            runner.run_lockstep([(n, m)], iterations, seed, corpus), results)
+    try:
+        progress = tqdm(results,
+                        total=len(jobs) + (iterations if lockstep else 0))
+        for result in progress:
+            tiles = result.tiles
+            empty_tiles = tiles[TileType.EMPTY]
+            checked_tiles = tiles[TileType.CHECKED]
+            path_tiles = tiles[TileType.FINAL_PATH]
+            visited = 100 * (checked_tiles + path_tiles) / (
+                empty_tiles + checked_tiles + path_tiles)
+            key = GENETIC if result.job.engine == GENETIC else result.job.heuristic
+            aggregates.add((n, m, key), {
+                'time [ms]': result.time,
+                'path length': path_tiles,
+                'visited tiles [%]': visited,
+                'expanded tiles': result.expanded,
+                'expansions saved': result.saved
+            })
+
+            row = [
+                result.job.iteration + 1,
+                round(result.time, 2), path_tiles,
+                round(visited, 2), result.expanded, result.saved
+            ]
+            if result.job.engine == GENETIC:
+                row += [
+                    round(result.generations_per_second, 2),
+                    result.converged if result.converged is not None else ''
+                ]
+                csvwriters[GENETIC].writerow(row)
+            else:
+                row += [
+                    round(getattr(result.stats, field), 3)
+                    if result.stats is not None else ''
+                    for field in STATS_FIELDS
+                ]  # lockstep results have no search stats
+                csvwriters[result.job.heuristic].writerow(row)
+    finally:
+        for csvfile in files.values():
+            csvfile.close()
+
+    print(chr(27) + "[2J")
+    print(runner.report())
+    return aggregates
+
+
+def heuristic_label(heuristic):
+    if heuristic == GENETIC:
+        return 'genetic algorithm'
+    if heuristic == 3:
+        return 'without heuristic'
+    if heuristic == LANDMARKS:
+        return 'landmarks (ALT)'
+    return 'heuristic ' + str(heuristic)
+
+
+# histograms are drawn from quantile sketches and mean and sigma from running statistics of aggregates
+def make_plots(n, m, iterations, aggregates, genetic=False, heuristics=range(4)):
     folder_name = 'plots'
     create_folder(folder_name)
     file_name = str(n) + "x" + str(m) + "_" + str(iterations) + ".jpg"
     file_name = os.path.join(folder_name, file_name)
 
-    column_names = ['time [ms]', 'path length', 'visited tiles [%]']
-
-    fig, axs = plt.subplots(nrows=4,
+    rows = list(heuristics) + ([GENETIC] if genetic else [])
+    fig, axs = plt.subplots(nrows=len(rows),
                             ncols=3,
                             tight_layout=True,
                             figsize=(10, 10))
@@ -71,37 +157,33 @@ def make_plots(n, m, iterations):
                  str(iterations) + ' iterations.',
                  fontsize=25)
 
-    for heuristic in range(4):
-        data = pd.read_csv('results/' + str(n) + 'x' + str(m) + '_' +
-                           str(iterations) + '__' + str(heuristic) + '.csv')
-
-        if heuristic == 3:
-            axs[heuristic, 0].set_ylabel('without heuristic',
-                                         rotation=90,
-                                         fontsize=15)
-        else:
-            axs[heuristic, 0].set_ylabel('heuristic ' + str(heuristic),
-                                         rotation=90,
-                                         fontsize=15)
+    axs = axs.reshape(len(rows), 3)  # one heuristic gives 1D array of axes
+    for heuristic, key in enumerate(rows):
+        label = heuristic_label(key)
+        count = aggregates.count((n, m, key))
+        if count != iterations:  # stopped early
+            label += '\n(' + str(count) + ' iterations)'
+        axs[heuristic, 0].set_ylabel(label, rotation=90, fontsize=15)
 
-        for i in range(3):
-            axs[heuristic][i].hist(data[column_names[i]], edgecolor='black')
-            axs[heuristic][i].set_xlabel(column_names[i])
+        for i, column in enumerate(PLOTTED):
+            stats = aggregates.get((n, m, key), column)
+            values, counts = zip(*stats.sketch.items())
+            values = [min(max(value, stats.min), stats.max)
+                      for value in values]  # bucket values are only within 1% of real values
+            axs[heuristic][i].hist(values,
+                                   weights=counts,
+                                   range=(stats.min, stats.max),
+                                   edgecolor='black')
+            axs[heuristic][i].set_xlabel(column)
 
-            column_data = data[column_names[i]]
-            average = sum(column_data) / len(column_data)
+            average = stats.mean
             color = '#fc4f30'
 
             axs[heuristic][i].axvline(average,
                                       color=color,
-                                      label='average ' + column_names[i])
+                                      label='average ' + column)
 
-            squared_sum = 0
-            for row in column_data:
-                squared_sum += row**2
-
-            sigma = round(
-                math.sqrt(squared_sum / len(column_data) - average**2), 2)
+            sigma = round(stats.std(), 2)
 
             axs[heuristic][i].plot([], [],
                                    ' ',
@@ -111,18 +193,95 @@ def make_plots(n, m, iterations):
     plt.savefig(file_name)
 
 
-def analysis_received_data(n, m, iterations=10):
-    for i in range(4):
-        test_h(n, m, iterations, heuristic=i)
-    make_plots(n, m, iterations)
+def analysis_received_data(n,
+                           m,
+                           iterations=10,
+                           workers=None,
+                           seed=578,
+                           corpus=None,
+                           engine="heap",
+                           genetic=False,
+                           heuristics=range(4),
+                           lockstep=False,
+                           cache=None,
+                           ci=None,
+                           min_iterations=5,
+                           count_tiles=False):
+    aggregates = test_h(n,
+                        m,
+                        iterations,
+                        heuristics=heuristics,
+                        lockstep=lockstep,
+                        workers=workers,
+                        seed=seed,
+                        corpus=corpus,
+                        engine=engine,
+                        genetic=genetic,
+                        cache=cache,
+                        ci=ci,
+                        min_iterations=min_iterations,
+                        count_tiles=count_tiles)
+    make_plots(n, m, iterations, aggregates, genetic, heuristics)
+
+
+def parse_args():
+    parser = ArgumentParser(description="Heuristics comparison for one maze size")
+    parser.add_argument("width", nargs="?", type=int, default=20)
+    parser.add_argument("height", nargs="?", type=int, default=20)
+    parser.add_argument("iterations", nargs="?", type=int, default=10)
+    parser.add_argument("-j",
+                        "--workers",
+                        help="Number of worker processes (default: all cores)",
+                        type=int,
+                        default=None)
+    parser.add_argument("--seed", type=int, default=578)
+    parser.add_argument("--engine",
+                        help="Solver search engine",
+                        type=str,
+                        default="heap",
+                        choices=Solver.ENGINES)
+    parser.add_argument(
+        "--corpus",
+        help="Maze corpus file, generated first if it does not exist",
+        type=str,
+        default=None)
+    parser.add_argument("-e",
+                        "--heuristics",
+                        help="Compared heuristics: 0 - ABS, 1 - SQRT, 2 - MAX, 3 - NONE, 4 - ALT (landmarks)",
+                        type=int,
+                        nargs="+",
+                        default=[0, 1, 2, 3],
+                        choices=range(5))
+    parser.add_argument("--cache",
+                        help="Folder of maze and search result cache, unchanged runs are read from there",
+                        type=str,
+                        default=None)
+    parser.add_argument("--lockstep",
+                        help="Solve all mazes for heuristic 3 (NONE) at once with vectorized BFS",
+                        action="store_true")
+    parser.add_argument("--ci",
+                        help="Stop iterations of heuristic when 95%% confidence intervals of plotted "
+                        "metrics are narrower than this fraction of mean (e.g. 0.05)",
+                        type=float,
+                        default=None)
+    parser.add_argument("--min-iterations",
+                        help="Iterations run before and between checks of --ci",
+                        type=int,
+                        default=5)
+    parser.add_argument("--genetic",
+                        help="Compare heuristics with genetic algorithm solver",
+                        action="store_true")
+    parser.add_argument("--count-tiles",
+                        help="Count visited tiles on whole grid after every search instead of "
+                        "deriving them from expanded tiles (exact also for node based engines)",
+                        action="store_true")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    random.seed(578)
-    if len(sys.argv) > 3:
-        analysis_received_data(int(sys.argv[1]), int(sys.argv[2]),
-                               int(sys.argv[3]))
-    elif len(sys.argv) == 3:
-        analysis_received_data(int(sys.argv[1]), int(sys.argv[2]))
-    else:
-        analysis_received_data(20, 20)
\ No newline at end of file
+    args = parse_args()
+    analysis_received_data(args.width, args.height, args.iterations,
+                           args.workers, args.seed, args.corpus,
+                           args.engine, args.genetic, args.heuristics,
+                           args.lockstep, args.cache, args.ci,
+                           args.min_iterations, args.count_tiles)
\ No newline at end of file
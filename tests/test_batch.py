@@ -0,0 +1,26 @@
+from maze_solver.batch import BatchSolver
+from maze_solver.maze import Maze
+
+ROWS = ["XXXXX",
+        "X   .",
+        ".XXXX",
+        "X   X",
+        "XXXXX"]
+
+
+def test_border_tiles_do_not_wrap_rows():
+    # (4, 1) and (0, 2) are next to each other in index order only
+    maze = Maze.from_walls([[tile == "X" for tile in row] for row in ROWS])
+    solver = BatchSolver(maze)
+    results = solver.solve([((3, 1), (0, 2)), ((3, 1), (4, 1))])
+    assert results[0].length is None
+    assert results[1].length == 1
+    assert solver.solve_shared([((0, 2), (3, 1))])[0].length is None
+
+
+def test_shared_accepts_list_tiles():
+    maze = Maze.from_walls([[tile == "X" for tile in row] for row in ROWS])
+    solver = BatchSolver(maze)
+    results = solver.solve_shared([([1, 1], [3, 1]), ([3, 1], [4, 1])])
+    assert [result.length for result in results] == [2, 1]
+    assert results[0].path is None
@@ -0,0 +1,42 @@
+import pytest
+
+from maze_solver.corpus import create_corpus
+from maze_solver.runner import BenchmarkRunner, make_jobs
+
+SIZES = [(size, size) for size in range(20, 24)]  # odd and even sizes share grids
+ITERATIONS = 3
+SEED = 578
+
+
+def measured(results):  # results without times
+    return [(result.job.width, result.job.height, result.job.iteration,
+             result.job.heuristic, result.tiles, result.expanded)
+            for result in results]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = str(tmp_path / "mazes.crp")
+    create_corpus(path, SIZES, ITERATIONS, SEED, workers=1)
+    return path
+
+
+def test_corpus_gives_the_same_results_as_generated_mazes(corpus):
+    runner = BenchmarkRunner(1)
+    generated = runner.run(make_jobs(SIZES, ITERATIONS, [0, 3], SEED))
+    loaded = runner.run(make_jobs(SIZES, ITERATIONS, [0, 3], SEED, corpus))
+    assert measured(loaded) == measured(generated)
+
+
+def test_lockstep_corpus_gives_the_same_results(corpus):
+    runner = BenchmarkRunner(1)
+    assert measured(runner.run_lockstep(SIZES, ITERATIONS, SEED,
+                                        corpus)) == measured(
+                                            runner.run_lockstep(
+                                                SIZES, ITERATIONS, SEED))
+
+
+def test_corpus_of_other_seed_is_rejected(corpus):
+    runner = BenchmarkRunner(1)
+    with pytest.raises(KeyError):
+        list(runner.run(make_jobs(SIZES, ITERATIONS, [0], SEED + 1, corpus)))
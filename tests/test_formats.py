@@ -0,0 +1,96 @@
+import random, tracemalloc
+
+import numpy as np
+import pytest
+
+from maze_solver import formats
+from maze_solver.maze import Maze, TileType
+from maze_solver.solver import Solver
+from maze_solver.stream import MazeFile, write_maze_file
+
+
+def grid(maze):
+    return np.concatenate(list(formats.row_blocks(maze)))
+
+
+@pytest.fixture(params=["list", "numpy"])
+def solved(request):
+    random.seed(3)
+    maze = Maze(31, 17, backend=request.param)
+    solver = Solver(maze, (1, len(maze.data) - 2), (len(maze.data[0]) - 2, 1))
+    return maze, solver
+
+
+@pytest.mark.parametrize("name, options", [("m.txt", {}), ("m.maze", {}),
+                                           ("m.png", {}),
+                                           ("m.png", {"scale": 3})])
+@pytest.mark.parametrize("backend", ["list", "numpy"])
+def test_round_trip(tmp_path, solved, name, options, backend):
+    maze, _ = solved
+    path = str(tmp_path / name)
+    formats.save_maze(maze, path, **options)
+    loaded = formats.load_maze(path, backend, **options)
+    expected = grid(maze)
+    if name.endswith(".maze"):  # only walls are kept
+        expected = (expected == TileType.WALL).astype(np.uint8)
+    assert np.array_equal(grid(loaded), expected)
+    if name.endswith(".txt"):
+        with open(path) as file:
+            assert file.read() == str(maze)
+
+
+def test_text_of_even_size_without_last_newline(tmp_path):
+    path = tmp_path / "m.txt"
+    path.write_text("XXXX\nX  X\nX .X\nXXXX")
+    for backend in ("list", "numpy"):
+        assert str(formats.load_maze(str(path),
+                                     backend)) == "XXXX\nX  X\nX .X\nXXXX\n"
+
+
+@pytest.mark.parametrize("text", ["XXX\nX\nXXX\n", "XXX\nXZX\nXXX\n"])
+def test_text_errors_name_row(tmp_path, text):
+    path = tmp_path / "m.txt"
+    path.write_text(text)
+    with pytest.raises(ValueError, match="row 1"):
+        formats.load_maze(str(path))
+
+
+def test_binary_keeps_origin_only_of_unchanged_walls(tmp_path):
+    source = str(tmp_path / "eller.maze")
+    write_maze_file(source, 40, 30, 7)
+    maze = formats.load_maze(source, "lazy")
+    copy = str(tmp_path / "copy.maze")
+    formats.write_binary(maze, copy)
+    assert (MazeFile(copy).seed, MazeFile(copy).generator) == (7, "eller")
+
+    maze.set_empty(2, 2)
+    formats.write_binary(maze, copy)
+    assert (MazeFile(copy).seed, MazeFile(copy).generator) == (0, "")
+
+    formats.write_binary(formats.load_maze(source), copy)  # loaded into memory
+    assert (MazeFile(copy).seed, MazeFile(copy).generator) == (0, "")
+
+
+def test_reading_does_not_keep_second_grid(tmp_path):
+    path = str(tmp_path / "big.maze")
+    random.seed(1)
+    formats.write_binary(Maze(1000, 1000, backend="numpy"), path)
+    tracemalloc.start()
+    try:
+        maze = formats.load_maze(path, "numpy")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = 3 * formats.BLOCK_ROWS * maze.data.shape[1]  # block being decoded with temporaries
+    assert peak < maze.data.nbytes + blocks
+
+
+def test_paths(tmp_path, solved):
+    _, solver = solved
+    path = str(tmp_path / "paths.jsonl")
+    formats.write_paths(path, [formats.path_record(solver, maze="a")])
+    formats.write_paths(path, [formats.path_record(solver)], append=True)
+    records = list(formats.read_paths(path))
+    assert len(records) == 2
+    assert records[0]["path"] == [tuple(tile) for tile in solver.path]
+    assert records[0]["maze"] == "a"
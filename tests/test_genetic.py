@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+import pytest
+
+from maze_solver import genetic
+from maze_solver.genetic import GeneticSolver
+from maze_solver.maze import Maze
+
+
+def corners(maze):
+    return (1, len(maze.data) - 2), (len(maze.data[0]) - 2, 1)
+
+
+def test_evaluation_in_parts_gives_the_same_fitness(monkeypatch):
+    random.seed(2)
+    maze = Maze(10, 10)
+    solver = GeneticSolver(maze, *corners(maze), init=False)
+    genomes = np.random.default_rng(2).integers(4, size=(50, 80), dtype=np.int8)
+    whole = solver.problem.evaluate(genomes)
+    h, w = solver.problem.walls.shape
+    monkeypatch.setattr(genetic, "VISITED_BYTES", 7 * h * w)
+    parts = solver.problem.evaluate(genomes)
+    assert np.array_equal(parts[0], whole[0])
+    assert np.array_equal(parts[1], whole[1])
+
+
+@pytest.mark.parametrize("seed", [0, 7])
+def test_default_solver_reaches_end(seed):
+    random.seed(seed)
+    maze = Maze(20, 20)
+    solver = GeneticSolver(maze, *corners(maze), seed=seed)
+    assert solver.converged is not None
+    assert solver.path[0] == solver.start and solver.path[-1] == solver.end
@@ -0,0 +1,44 @@
+import random
+
+from maze_solver.maze import Maze, TileType
+from maze_solver.solver import Solver
+
+
+def path_length(maze, start, end, engine):
+    solver = Solver(maze, start, end, engine=engine)
+    maze.restart()
+    return len(solver.path) if solver.path is not None else -1
+
+
+def test_end_in_loop_corridor_takes_shorter_side():
+    # end (2, 3) lies on a ring whose both ends meet at junction (3, 3)
+    rows = ["XXXXXXX",
+            "X     X",
+            "X XXX X",
+            "X     X",
+            "XXX XXX",
+            "X     X",
+            "XXXXXXX"]
+    maze = Maze.from_walls([[tile == "X" for tile in row] for row in rows])
+    assert path_length(maze, (3, 5), (2, 3), "junction") == 4
+    assert path_length(maze, (2, 3), (3, 5), "junction") == 4
+
+
+def test_junction_matches_heap_with_removed_walls():
+    random.seed(3)
+    maze = Maze(60, 60)
+    h = len(maze.data)
+    w = len(maze.data[0])
+    rng = random.Random(3)
+    for _ in range(150):  # cycles make many corridors with two ways to one junction
+        x = rng.randrange(1, w - 1)
+        y = rng.randrange(1, h - 1)
+        if maze.data[y][x] == TileType.WALL:
+            maze.set_empty(x, y)
+    free = [(x, y) for y in range(h) for x in range(w)
+            if maze.data[y][x] != TileType.WALL]
+    for _ in range(300):
+        start = rng.choice(free)
+        end = rng.choice(free)
+        assert path_length(maze, start, end,
+                           "junction") == path_length(maze, start, end, "heap")
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from maze_solver.maze import Maze, TileType
+from maze_solver.solver import Solver
+
+
+def path_length(maze, start, end, engine, heuristic=0):
+    solver = Solver(maze, start, end, heuristic_type=heuristic, engine=engine)
+    maze.restart()
+    return len(solver.path) if solver.path is not None else -1
+
+
+@pytest.mark.parametrize("heuristic", [0, 4])
+def test_hierarchical_matches_heap_after_wall_changes(heuristic):
+    random.seed(5)
+    maze = Maze(50, 40)
+    h = len(maze.data)
+    w = len(maze.data[0])
+    maze.hierarchical_graph(cluster=8, workers=1)  # many clusters with few transitions
+    rng = random.Random(5)
+    for _ in range(4):
+        for _ in range(40):  # cycles give transitions more than one way between clusters
+            x = rng.randrange(1, w - 1)
+            y = rng.randrange(1, h - 1)
+            if maze.data[y][x] == TileType.WALL:
+                maze.set_empty(x, y)
+            else:
+                maze.set_wall(x, y)
+        free = [(x, y) for y in range(h) for x in range(w)
+                if maze.data[y][x] != TileType.WALL]
+        for _ in range(50):
+            start = rng.choice(free)
+            end = rng.choice(free)
+            assert path_length(maze, start, end, "hierarchical",
+                               heuristic) == path_length(maze, start, end, "heap")
+
+
+def test_landmarks_of_graph_with_few_transitions():
+    random.seed(2)
+    maze = Maze(8, 8)
+    graph = maze.hierarchical_graph(cluster=4, workers=1)
+    h = len(maze.data)
+    w = len(maze.data[0])
+    free = [(x, y) for y in range(h) for x in range(w)
+            if maze.data[y][x] != TileType.WALL]
+    for start in free:
+        assert path_length(maze, start, free[0], "hierarchical",
+                           4) == path_length(maze, start, free[0], "heap")
+    assert len(graph.landmarks) < graph.landmark_count  # fewer transitions than landmarks
@@ -0,0 +1,45 @@
+import random
+
+from maze_solver.incremental import IncrementalSolver
+from maze_solver.maze import Maze, TileType
+from maze_solver.solver import Solver
+
+ROWS = ["XXXXX",
+        "X   X",
+        "XXXXX",
+        "X   X",
+        "XXXXX"]
+
+
+def test_opened_border_tiles_do_not_wrap_rows():
+    maze = Maze.from_walls([[tile == "X" for tile in row] for row in ROWS])
+    solver = IncrementalSolver(maze, (3, 1), (0, 2))
+    assert solver.search() is None
+    maze.set_empty(4, 1)  # (4, 1) and (0, 2) are next to each other in index order
+    maze.set_empty(0, 2)
+    assert solver.search() is None
+
+
+def test_matches_full_search_after_edits_with_border():
+    random.seed(5)
+    maze = Maze(30, 30)
+    h = len(maze.data)
+    w = len(maze.data[0])
+    start = (1, h - 2)
+    end = (w - 2, 1)
+    incremental = IncrementalSolver(maze, start, end)
+    rng = random.Random(5)
+    for _ in range(20):
+        for _ in range(10):
+            x = rng.randrange(w)
+            y = rng.randrange(h)
+            if maze.get_tile(x, y) == TileType.WALL:
+                maze.set_empty(x, y)
+            elif (x, y) not in (start, end):
+                maze.set_wall(x, y)
+        path = incremental.search()
+        full = Solver(maze, start, end)
+        maze.restart()
+        assert (path is None) == (full.path is None)
+        if path is not None:
+            assert len(path) == len(full.path)
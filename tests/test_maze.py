@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from maze_solver.maze import Maze
+from maze_solver.solver import Solver
+
+
+def path_length(maze, engine, heuristic=0):
+    start = (1, len(maze.data) - 2)
+    end = (len(maze.data[0]) - 2, 1)
+    solver = Solver(maze, start, end, heuristic_type=heuristic, engine=engine)
+    maze.restart()
+    return len(solver.path) if solver.path is not None else -1
+
+
+@pytest.mark.parametrize("engine, heuristic", [("hierarchical", 0),
+                                               ("junction", 0), ("heap", 4)])
+def test_cached_graphs_follow_generated_maze(engine, heuristic):
+    random.seed(1)
+    maze = Maze(100, 100)
+    path_length(maze, engine, heuristic)  # builds cached graph
+    random.seed(2)
+    maze.generate()
+    assert path_length(maze, engine, heuristic) == path_length(maze, "heap")
+    assert len(maze.wall_listeners) == 1  # only rebuilt graph listens
+
+
+def test_walls_are_not_loaded_into_lazy_maze():
+    with pytest.raises(ValueError, match="lazy"):
+        Maze.from_walls([[1, 1, 1], [1, 0, 1], [1, 1, 1]], backend="lazy")
+
+
+@pytest.mark.parametrize("width, height", [(1, 4), (4, 1), (17, 12)])
+def test_backends_generate_the_same_layout(width, height):
+    grids = []
+    for backend in ("list", "numpy"):
+        random.seed(9)
+        grids.append(Maze(width, height, backend=backend).data)
+    assert [list(row) for row in grids[1]] == grids[0]
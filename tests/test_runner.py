@@ -0,0 +1,21 @@
+import pytest
+
+from maze_solver.maze import TileType
+from maze_solver.runner import BenchmarkRunner, make_jobs
+
+
+def visited(tiles):  # current tile is counted as checked in derived tiles
+    return [tiles[TileType.EMPTY], tiles[TileType.WALL],
+            tiles[TileType.CHECKED] + tiles[TileType.CURRENT],
+            tiles[TileType.FINAL_PATH]]
+
+
+@pytest.mark.parametrize("engine", ["heap", "list"])
+def test_derived_tiles_match_counted_tiles(engine):
+    sizes = [(20, 20), (21, 30)]
+    runner = BenchmarkRunner(1)
+    derived = runner.run(make_jobs(sizes, 3, range(5), 4, engine=engine))
+    counted = runner.run(
+        make_jobs(sizes, 3, range(5), 4, engine=engine, count_tiles=True))
+    for a, b in zip(derived, counted):
+        assert visited(a.tiles) == visited(b.tiles)
@@ -0,0 +1,61 @@
+import asyncio, json
+
+import pytest
+
+from maze_solver.service import MazeService, ServiceError
+
+
+def run_service(requests):  # answers of requests sent at once to one maze, errors are returned
+    async def run():
+        service = MazeService(workers=1)
+        try:
+            await service.handle({"op": "generate", "width": 20, "height": 20,
+                                  "seed": 1})
+            return await asyncio.gather(
+                *[service.handle(request) for request in requests],
+                return_exceptions=True)
+        finally:
+            service.close()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("bad", [[1.5, 1], ["1", 19], [1], [True, 19], "19"])
+def test_bad_tile_does_not_fail_batch(bad):
+    good = {"op": "solve", "maze": "20x20-1", "start": [1, 19], "end": [19, 1]}
+    answers = run_service([good, dict(good, start=bad), good])
+    assert isinstance(answers[1], ServiceError)
+    assert answers[0]["length"] > 0 and answers[0] == answers[2]
+    assert answers[0]["batch"] == 2
+
+
+def test_tile_outside_of_maze():
+    answers = run_service([{"op": "solve", "maze": "20x20-1", "start": [1, 21],
+                            "end": [19, 1]}])
+    assert isinstance(answers[0], ServiceError)
+
+
+def test_every_line_is_answered_over_connection():
+    lines = [b'{"id": 1, "op": "stats"}', b"5", b'["x"]', b"{bad",
+             b'{"id": 5, "op": "stats"}']
+
+    async def run():
+        service = MazeService(workers=1)
+        server = await asyncio.start_server(service.serve_client, "127.0.0.1", 0)
+        try:
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"\n".join(lines) + b"\n")
+            writer.write_eof()
+            data = await asyncio.wait_for(reader.read(), 10)
+            answers = [json.loads(line) for line in data.splitlines()]
+            writer.close()
+            return answers, service.counters["errors"]
+        finally:
+            server.close()
+            service.close()
+
+    answers, errors = asyncio.run(run())
+    assert len(answers) == len(lines)
+    assert sorted(a["id"] for a in answers if "error" not in a) == [1, 5]
+    assert errors == 3
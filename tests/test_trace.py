@@ -0,0 +1,33 @@
+import random
+
+import pytest
+
+from maze_solver.maze import Maze, TileType
+
+
+def test_visualizer_attached_during_trace_keeps_recording(monkeypatch):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pytest.importorskip("pygame")
+    random.seed(1)
+    maze = Maze(10, 10)
+    trace = maze.start_trace()
+    maze.set_checked(1, 1)
+    maze._attach_visualizer(len(maze.data), len(maze.data[0]))
+    maze.set_path(1, 2)
+    assert maze.stop_trace() is trace
+    assert len(trace) == 2
+    assert maze.visual.drawn == 1  # write after attaching reached visualizer
+    maze.set_path(1, 3)
+    assert len(trace) == 2
+    assert maze.get_tile(1, 3) == TileType.FINAL_PATH
+
+
+def test_visualizer_without_fps_limit_shows_every_tile(monkeypatch):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pytest.importorskip("pygame")
+    from maze_solver.visualizer import MazeVisualizer
+    visual = MazeVisualizer(5, 5, fps=0)
+    for x in range(3):
+        visual.draw_cell_batched(x, 1)
+        assert visual.dirty == []  # flushed right away
+    assert visual.drawn == 3